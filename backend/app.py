@@ -7,6 +7,7 @@ from datetime import datetime
 # Import services
 from services.chat_service import ChatService
 from services.voice_service import VoiceService
+from services.model_registry import model_registry
 from config.settings import Config
 
 # Import routes
@@ -24,6 +25,11 @@ def create_app():
     # Setup logging
     setup_logging()
     
+    # Load model weights once per process; under `gunicorn --preload` this
+    # runs in the master so forked workers share the pages copy-on-write
+    if Config.PRELOAD_MODELS:
+        model_registry.preload()
+    
     # Register blueprints
     app.register_blueprint(chat_bp, url_prefix='/api/chat')
     app.register_blueprint(voice_bp, url_prefix='/api/voice')
@@ -38,6 +44,34 @@ def create_app():
             'version': '1.0.0'
         })
     
+    # Inference and memory statistics for tuning
+    @app.route('/metrics')
+    def metrics():
+        disease_identifier = None
+        if model_registry.is_loaded('disease_identifier'):
+            disease_identifier = model_registry.get('disease_identifier')
+        
+        chat_service = model_registry.get('chat_service') if model_registry.is_loaded('chat_service') else None
+        symptom_detector = (
+            model_registry.get('symptom_detector') if model_registry.is_loaded('symptom_detector') else None
+        )
+        gemini_handler = model_registry.get('gemini_handler') if model_registry.is_loaded('gemini_handler') else None
+        llm_gateway = model_registry.get('llm_gateway') if model_registry.is_loaded('llm_gateway') else None
+        location_service = (
+            model_registry.get('location_service') if model_registry.is_loaded('location_service') else None
+        )
+        
+        return jsonify({
+            'timestamp': datetime.now().isoformat(),
+            'disease_classifier': disease_identifier.get_inference_stats() if disease_identifier else None,
+            'chat': chat_service.get_stats() if chat_service else None,
+            'symptom_detection': symptom_detector.get_stats() if symptom_detector else None,
+            'gemini': gemini_handler.get_stats() if gemini_handler else None,
+            'llm_gateway': llm_gateway.get_stats() if llm_gateway else None,
+            'location': location_service.get_stats() if location_service else None,
+            'memory': model_registry.memory_report()
+        })
+    
     # Error handlers
     @app.errorhandler(404)
     def not_found(error):
@@ -1,6 +1 @@
-# Models package init
-from .symptom_detector import SymptomDetector
-from .disease_identifier import DiseaseIdentifier
-from .gemini_handler import GeminiHandler
-
-__all__ = ['SymptomDetector', 'DiseaseIdentifier', 'GeminiHandler']
\ No newline at end of file
+# Config package init
@@ -19,7 +19,101 @@ class Config:
     # Models
     HUGGINGFACE_CACHE_DIR = os.getenv('HUGGINGFACE_CACHE_DIR', './models_cache')
     SYMPTOM_MODEL_NAME = os.getenv('SYMPTOM_MODEL_NAME', 'Zabihin/Symptom_to_Diagnosis')
+    SYMPTOM_MODEL_VERSION = os.getenv('SYMPTOM_MODEL_VERSION', '1')  # bump to invalidate cached predictions
     CONVERSATIONAL_MODEL = os.getenv('CONVERSATIONAL_MODEL', 'microsoft/DialoGPT-medium')
+    CONVERSATIONAL_IDLE_TIMEOUT = float(os.getenv('CONVERSATIONAL_IDLE_TIMEOUT', '600'))  # seconds, 0 disables
+    
+    # Inference backend: 'pytorch' (fp32), 'onnx' (int8 quantized ONNX Runtime)
+    # or 'remote' (the model server below, so web workers load no weights)
+    INFERENCE_BACKEND = os.getenv('INFERENCE_BACKEND', 'pytorch')
+    ONNX_MODEL_DIR = os.getenv('ONNX_MODEL_DIR', './models_cache/onnx/symptom_to_diagnosis')
+    ONNX_NUM_THREADS = int(os.getenv('ONNX_NUM_THREADS', '0'))
+    
+    # Out-of-process model server (python -m models.inference_server)
+    INFERENCE_SERVER_SOCKET = os.getenv('INFERENCE_SERVER_SOCKET', '/tmp/sehat_sathi_inference.sock')
+    INFERENCE_SERVER_BACKEND = os.getenv('INFERENCE_SERVER_BACKEND', 'pytorch')
+    INFERENCE_SERVER_TIMEOUT = float(os.getenv('INFERENCE_SERVER_TIMEOUT', '10'))  # seconds per request
+    INFERENCE_SERVER_CONNECT_TIMEOUT = float(os.getenv('INFERENCE_SERVER_CONNECT_TIMEOUT', '30'))  # wait for startup
+    
+    # Distilled TF-IDF classifier tried before the transformer (python -m models.cascade_classifier train)
+    CASCADE_ENABLED = os.getenv('CASCADE_ENABLED', 'True').lower() == 'true'
+    CASCADE_MODEL_PATH = os.getenv('CASCADE_MODEL_PATH', './models_cache/cascade/fast_classifier.pkl')
+    
+    # Lexicon confidence at or above which symptoms are extracted without Gemini
+    LOCAL_SYMPTOM_CONFIDENCE = float(os.getenv('LOCAL_SYMPTOM_CONFIDENCE', '0.8'))
+    
+    # One Gemini call both detects symptoms and drafts the general-conversation reply
+    FUSED_LLM_CALL = os.getenv('FUSED_LLM_CALL', 'True').lower() == 'true'
+    
+    # Parsed Gemini symptom results on local disk, shared by workers and kept across restarts
+    SYMPTOM_CACHE_PATH = os.getenv('SYMPTOM_CACHE_PATH', './models_cache/gemini_symptoms.sqlite3')
+    SYMPTOM_CACHE_SIZE = int(os.getenv('SYMPTOM_CACHE_SIZE', '5000'))
+    SYMPTOM_CACHE_TTL = float(os.getenv('SYMPTOM_CACHE_TTL', '604800'))  # seconds
+    
+    # Health guidance answers reused for near-duplicate questions (char n-gram TF-IDF cosine)
+    GUIDANCE_CACHE_ENABLED = os.getenv('GUIDANCE_CACHE_ENABLED', 'True').lower() == 'true'
+    GUIDANCE_CACHE_SIZE = int(os.getenv('GUIDANCE_CACHE_SIZE', '10000'))  # per language
+    GUIDANCE_CACHE_THRESHOLD = float(os.getenv('GUIDANCE_CACHE_THRESHOLD', '0.85'))
+    
+    # Translated recommendation and follow-up strings on local disk, by target language and source text
+    TRANSLATION_MEMORY_PATH = os.getenv('TRANSLATION_MEMORY_PATH', './models_cache/translation_memory.sqlite3')
+    TRANSLATION_MEMORY_SIZE = int(os.getenv('TRANSLATION_MEMORY_SIZE', '20000'))
+    TRANSLATION_BATCH_SIZE = int(os.getenv('TRANSLATION_BATCH_SIZE', '40'))  # strings per Gemini call
+    
+    # Free-text symptoms mapped to a canonical vocabulary before classification
+    SYMPTOM_NORMALIZER_ENABLED = os.getenv('SYMPTOM_NORMALIZER_ENABLED', 'True').lower() == 'true'
+    SYMPTOM_VOCABULARY_PATH = os.getenv('SYMPTOM_VOCABULARY_PATH', './data/symptom_vocabulary.json')
+    SYMPTOM_NORMALIZER_THRESHOLD = float(os.getenv('SYMPTOM_NORMALIZER_THRESHOLD', '0.7'))  # cosine similarity
+    
+    # Per-label severity/advice overrides (export with python -m models.label_metadata)
+    LABEL_METADATA_PATH = os.getenv('LABEL_METADATA_PATH', './data/label_metadata.json')
+    
+    # Follow-up questions chosen by expected information gain (build with python -m models.adaptive_questioner build)
+    ADAPTIVE_QUESTIONS_ENABLED = os.getenv('ADAPTIVE_QUESTIONS_ENABLED', 'True').lower() == 'true'
+    ADAPTIVE_QUESTIONS_PATH = os.getenv('ADAPTIVE_QUESTIONS_PATH', './models_cache/adaptive/symptom_matrix.npz')
+    ADAPTIVE_QUESTIONS_COUNT = int(os.getenv('ADAPTIVE_QUESTIONS_COUNT', '2'))  # symptom questions per reply
+    
+    # Shared Gemini gateway: every LLM call goes through one client with these limits
+    LLM_MODEL = os.getenv('LLM_MODEL', 'gemini-pro')
+    LLM_MAX_CONCURRENCY = int(os.getenv('LLM_MAX_CONCURRENCY', '8'))  # calls in flight per worker
+    LLM_QUEUE_TIMEOUT = float(os.getenv('LLM_QUEUE_TIMEOUT', '2'))  # seconds to wait for a free slot
+    LLM_TIMEOUT = float(os.getenv('LLM_TIMEOUT', '10'))  # seconds per attempt
+    LLM_DEADLINE = float(os.getenv('LLM_DEADLINE', '20'))  # seconds per call, retries included
+    LLM_MAX_RETRIES = int(os.getenv('LLM_MAX_RETRIES', '2'))
+    LLM_RETRY_BASE_DELAY = float(os.getenv('LLM_RETRY_BASE_DELAY', '0.5'))  # seconds, doubled per retry
+    LLM_BREAKER_THRESHOLD = int(os.getenv('LLM_BREAKER_THRESHOLD', '5'))  # consecutive failures
+    LLM_BREAKER_RESET_SECONDS = float(os.getenv('LLM_BREAKER_RESET_SECONDS', '30'))
+    
+    # Least time left in the request deadline (API_CONFIG['request_timeout']) for a stage to
+    # still run; below it the stage degrades to its local fallback
+    LLM_MIN_BUDGET_SECONDS = float(os.getenv('LLM_MIN_BUDGET_SECONDS', '3'))
+    MAPS_MIN_BUDGET_SECONDS = float(os.getenv('MAPS_MIN_BUDGET_SECONDS', '3'))
+    STORE_MIN_BUDGET_SECONDS = float(os.getenv('STORE_MIN_BUDGET_SECONDS', '1'))
+    
+    # Places searches from within ~100 m share one request (3 decimals of a degree)
+    PLACES_COORDINATE_DECIMALS = int(os.getenv('PLACES_COORDINATE_DECIMALS', '3'))
+    
+    # Inference batching
+    INFERENCE_BATCHING = os.getenv('INFERENCE_BATCHING', 'True').lower() == 'true'
+    INFERENCE_MAX_BATCH_SIZE = int(os.getenv('INFERENCE_MAX_BATCH_SIZE', '16'))
+    INFERENCE_MAX_WAIT_MS = float(os.getenv('INFERENCE_MAX_WAIT_MS', '5'))
+    
+    # Prediction cache keyed on the canonical symptom set
+    PREDICTION_CACHE_SIZE = int(os.getenv('PREDICTION_CACHE_SIZE', '10000'))
+    PREDICTION_CACHE_TTL = float(os.getenv('PREDICTION_CACHE_TTL', '86400'))  # seconds
+    PREDICTION_CACHE_MAX_MB = int(os.getenv('PREDICTION_CACHE_MAX_MB', '64'))
+    
+    # Diagnosis attached to emergency replies after they are sent
+    ENRICHMENT_WORKERS = int(os.getenv('ENRICHMENT_WORKERS', '2'))
+    ENRICHMENT_CACHE_SIZE = int(os.getenv('ENRICHMENT_CACHE_SIZE', '1000'))
+    ENRICHMENT_CACHE_TTL = float(os.getenv('ENRICHMENT_CACHE_TTL', '600'))  # seconds
+    
+    # Components loaded before gunicorn forks workers (see gunicorn.conf.py)
+    PRELOAD_MODELS = os.getenv('PRELOAD_MODELS', 'True').lower() == 'true'
+    PRELOAD_COMPONENTS = [
+        name.strip() for name in os.getenv('PRELOAD_COMPONENTS', 'disease_identifier').split(',')
+        if name.strip()
+    ]
     
     # Logging
     LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
@@ -0,0 +1,27 @@
+# Gunicorn configuration
+#
+#   gunicorn -c gunicorn.conf.py
+#
+# The app is loaded in the master before workers fork, so the classifier
+# weights loaded by model_registry.preload() are shared copy-on-write.
+import logging
+import os
+
+wsgi_app = 'app:create_app()'
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:5000')
+workers = int(os.getenv('GUNICORN_WORKERS', '2'))
+threads = int(os.getenv('GUNICORN_THREADS', '4'))
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '60'))
+preload_app = True
+
+def post_fork(server, worker):
+    """Report how much model memory this worker shares with the master"""
+    from services.model_registry import model_registry
+    
+    report = model_registry.memory_report()
+    saved = report['saved_per_worker_mb']
+    logging.getLogger('gunicorn.error').info(
+        f"Worker {worker.pid}: {saved['shared_with_master']} MB of preloaded models shared, "
+        f"{saved['deduplicated']} MB saved by the model registry "
+        f"(components: {', '.join(report['preloaded_components']) or 'none'})"
+    )
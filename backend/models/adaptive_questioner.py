@@ -0,0 +1,269 @@
+import argparse
+import json
+import logging
+import os
+import random
+import time
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from config.settings import Config
+from utils.constants import MODEL_CONFIG
+from models.cascade_classifier import teacher_probabilities
+from models.symptom_normalizer import load_symptom_vocabulary
+
+# Keeps every answer from ruling a disease out completely
+LIKELIHOOD_FLOOR = 0.02
+
+def entropy(probabilities: np.ndarray) -> np.ndarray:
+    """Shannon entropy in bits along the last axis"""
+    safe = np.clip(probabilities, 1e-12, 1.0)
+    return -(probabilities * np.log2(safe)).sum(axis=-1)
+
+def likelihoods_from_probabilities(probabilities: np.ndarray) -> np.ndarray:
+    """P(symptom present | disease) from the classifier's P(disease | symptom) rows.
+
+    Each symptom row is scaled by its largest entry, so the disease a
+    symptom points to most strongly expects it almost surely and the
+    others in proportion.
+    """
+    peak = probabilities.max(axis=1, keepdims=True)
+    scaled = probabilities / np.where(peak > 0, peak, 1.0)
+    return np.clip(scaled, LIKELIHOOD_FLOOR, 1 - LIKELIHOOD_FLOOR)
+
+class AdaptiveQuestioner:
+    """Chooses the follow-up symptom question with the largest expected information gain.
+
+    Holds a (symptoms, diseases) matrix of P(symptom present | disease).
+    For every candidate question the yes/no posteriors over the current
+    differential are computed at once, and the question whose expected
+    posterior entropy is lowest is asked first.
+    """
+
+    def __init__(self, likelihoods: np.ndarray, symptoms: List[str], labels: List[str], metadata: Dict = None):
+        self.likelihoods = np.asarray(likelihoods, dtype=np.float64)
+        self.symptoms = list(symptoms)
+        self.labels = list(labels)
+        self.metadata = metadata or {}
+        self._symptom_index = {symptom: index for index, symptom in enumerate(self.symptoms)}
+        self._label_index = {label: index for index, label in enumerate(self.labels)}
+
+    @classmethod
+    def build(cls, backend, symptoms: List[str]) -> "AdaptiveQuestioner":
+        """Score every vocabulary symptom on its own with the classifier, in batches"""
+        probabilities = teacher_probabilities(backend, symptoms)
+        metadata = {'backend': backend.name, 'symptoms': len(symptoms), 'built_at': time.strftime('%Y%m%dT%H%M%S')}
+        return cls(likelihoods_from_probabilities(probabilities), symptoms, backend.labels, metadata)
+
+    def save(self, path: str):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        np.savez_compressed(
+            path,
+            likelihoods=self.likelihoods,
+            symptoms=np.array(self.symptoms),
+            labels=np.array(self.labels),
+            metadata=np.array(json.dumps(self.metadata))
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "AdaptiveQuestioner":
+        with np.load(path, allow_pickle=False) as bundle:
+            return cls(
+                bundle['likelihoods'], bundle['symptoms'].tolist(), bundle['labels'].tolist(),
+                json.loads(str(bundle['metadata']))
+            )
+
+    def prior(self, differential: List[Dict] = None) -> np.ndarray:
+        """Distribution over all labels from a ranked differential; uniform without one.
+
+        Labels outside the differential share the probability it leaves
+        uncovered.
+        """
+        size = len(self.labels)
+        if not differential:
+            return np.full(size, 1.0 / size)
+
+        prior = np.zeros(size)
+        for candidate in differential:
+            index = self._label_index.get(candidate.get('disease', candidate.get('label')))
+            if index is not None:
+                prior[index] = candidate.get('probability', candidate.get('score', 0.0))
+
+        missing = prior == 0
+        if missing.any():
+            prior[missing] = max(1.0 - prior.sum(), 1e-3) / missing.sum()
+        return prior / prior.sum()
+
+    def update(self, posterior: np.ndarray, symptom: str, present: bool) -> np.ndarray:
+        """Posterior after the user confirms or denies a symptom"""
+        index = self._symptom_index.get(symptom)
+        if index is None:
+            return posterior
+        likelihood = self.likelihoods[index] if present else 1 - self.likelihoods[index]
+        updated = posterior * likelihood
+        return updated / updated.sum()
+
+    def information_gain(self, posterior: np.ndarray) -> np.ndarray:
+        """Expected entropy reduction of asking about each symptom"""
+        joint_yes = self.likelihoods * posterior                 # (symptoms, diseases)
+        joint_no = posterior - joint_yes
+        p_yes = joint_yes.sum(axis=1)
+        p_no = 1.0 - p_yes
+
+        expected = (
+            p_yes * entropy(joint_yes / p_yes[:, None])
+            + p_no * entropy(joint_no / np.maximum(p_no, 1e-12)[:, None])
+        )
+        return entropy(posterior) - expected
+
+    def next_questions(self, posterior: np.ndarray, known: Iterable[str] = (), count: int = 1) -> List[Dict]:
+        """The `count` most informative symptoms not yet reported or answered"""
+        gains = self.information_gain(posterior)
+        for symptom in known:
+            index = self._symptom_index.get(symptom)
+            if index is not None:
+                gains[index] = -np.inf
+
+        count = min(count, len(gains))
+        best = np.argpartition(-gains, count - 1)[:count]
+        best = best[np.argsort(-gains[best])]
+        return [
+            {'symptom': self.symptoms[index], 'information_gain': round(float(gains[index]), 4)}
+            for index in best if np.isfinite(gains[index]) and gains[index] > 0
+        ]
+
+    def is_confident(self, posterior: np.ndarray, threshold: float = None) -> bool:
+        threshold = MODEL_CONFIG['disease_confidence_threshold'] if threshold is None else threshold
+        return float(posterior.max()) >= threshold
+
+def question_text(symptom: str) -> str:
+    return f"Do you also have {symptom}?"
+
+def replay(questioner: AdaptiveQuestioner, cases: Iterable[Dict], max_turns: int = 10,
+           threshold: float = None, strategy: str = 'information_gain') -> Dict:
+    """Turns-to-confidence over recorded or simulated conversations.
+
+    Each case has the `symptoms` reported up front, `all_symptoms` the
+    patient would confirm if asked, and optionally the true `disease`.
+    Questions are answered from `all_symptoms` until the posterior reaches
+    the threshold or `max_turns` is used up. The 'fixed' strategy asks the
+    same most-common-first order every time, as a baseline.
+    """
+    # Baseline order: symptoms most expected across diseases first
+    fixed_order = [questioner.symptoms[index] for index in np.argsort(-questioner.likelihoods.mean(axis=1))]
+
+    turns, confident, correct, labeled, decision_ms = [], 0, 0, 0, []
+    for case in cases:
+        present = set(case.get('all_symptoms') or case['symptoms'])
+        known = set(case['symptoms'])
+
+        posterior = questioner.prior()
+        for symptom in known:
+            posterior = questioner.update(posterior, symptom, True)
+
+        turn = 0
+        while not questioner.is_confident(posterior, threshold) and turn < max_turns:
+            started = time.perf_counter()
+            if strategy == 'fixed':
+                candidates = [symptom for symptom in fixed_order if symptom not in known][:1]
+            else:
+                candidates = [question['symptom'] for question in questioner.next_questions(posterior, known)]
+            decision_ms.append((time.perf_counter() - started) * 1000)
+            if not candidates:
+                break
+
+            symptom = candidates[0]
+            known.add(symptom)
+            posterior = questioner.update(posterior, symptom, symptom in present)
+            turn += 1
+
+        turns.append(turn)
+        confident += questioner.is_confident(posterior, threshold)
+        if case.get('disease'):
+            labeled += 1
+            correct += questioner.labels[int(posterior.argmax())].lower() == case['disease'].lower()
+
+    cases_run = len(turns)
+    return {
+        'strategy': strategy,
+        'cases': cases_run,
+        'average_turns': round(float(np.mean(turns)), 3) if turns else None,
+        'confident_share': round(confident / cases_run, 3) if cases_run else None,
+        'accuracy_at_stop': round(correct / labeled, 3) if labeled else None,
+        'decision_ms_p50': round(float(np.percentile(decision_ms, 50)), 3) if decision_ms else None,
+        'decision_ms_p95': round(float(np.percentile(decision_ms, 95)), 3) if decision_ms else None
+    }
+
+def simulate_cases(questioner: AdaptiveQuestioner, count: int, reported: int = 1, seed: int = 0) -> List[Dict]:
+    """Synthetic patients: a disease, the symptoms it produces, and a few reported up front"""
+    rng = np.random.default_rng(seed)
+    cases = []
+    for _ in range(count):
+        disease = int(rng.integers(len(questioner.labels)))
+        present = rng.random(len(questioner.symptoms)) < questioner.likelihoods[:, disease]
+        symptoms = [questioner.symptoms[index] for index in np.flatnonzero(present)]
+        if not symptoms:
+            continue
+        random.Random(int(rng.integers(1 << 31))).shuffle(symptoms)
+        cases.append({
+            'symptoms': symptoms[:reported],
+            'all_symptoms': symptoms,
+            'disease': questioner.labels[disease]
+        })
+    return cases
+
+def load_adaptive_questioner(config: Config = None) -> Optional[AdaptiveQuestioner]:
+    """Load the symptom-by-disease matrix, or None when it is disabled or not built yet"""
+    config = config or Config()
+    logger = logging.getLogger(__name__)
+
+    if not config.ADAPTIVE_QUESTIONS_ENABLED:
+        return None
+
+    if not os.path.exists(config.ADAPTIVE_QUESTIONS_PATH):
+        logger.info(f"No symptom matrix at {config.ADAPTIVE_QUESTIONS_PATH}, follow-up questions are fixed")
+        return None
+
+    return AdaptiveQuestioner.load(config.ADAPTIVE_QUESTIONS_PATH)
+
+def main():
+    parser = argparse.ArgumentParser(description="Adaptive follow-up questions")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    subparsers.add_parser('build', help="Build the symptom-by-disease matrix from the classifier")
+
+    replay_parser = subparsers.add_parser('replay', help="Average turns-to-confidence against a fixed order")
+    replay_parser.add_argument('--cases', help="JSONL with symptoms, all_symptoms and disease (default: simulated)")
+    replay_parser.add_argument('--simulate', type=int, default=500, help="Simulated cases without --cases")
+    replay_parser.add_argument('--max-turns', type=int, default=10)
+    replay_parser.add_argument('--threshold', type=float, default=None)
+
+    args = parser.parse_args()
+    config = Config()
+
+    if args.command == 'build':
+        from models.inference_backends import load_backend
+
+        symptoms = list(load_symptom_vocabulary(config.SYMPTOM_VOCABULARY_PATH))
+        questioner = AdaptiveQuestioner.build(load_backend(config), symptoms)
+        questioner.save(config.ADAPTIVE_QUESTIONS_PATH)
+        print(f"Symptom matrix {questioner.likelihoods.shape} written to {config.ADAPTIVE_QUESTIONS_PATH}")
+        return
+
+    questioner = AdaptiveQuestioner.load(config.ADAPTIVE_QUESTIONS_PATH)
+    if args.cases:
+        with open(args.cases, encoding='utf-8') as case_file:
+            cases = [json.loads(line) for line in case_file if line.strip()]
+    else:
+        cases = simulate_cases(questioner, args.simulate)
+
+    report = [
+        replay(questioner, cases, args.max_turns, args.threshold, strategy)
+        for strategy in ('information_gain', 'fixed')
+    ]
+    print(json.dumps(report, indent=2))
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    main()
@@ -0,0 +1,227 @@
+import argparse
+import json
+import logging
+import os
+import pickle
+import random
+import time
+from datetime import datetime
+from typing import Dict, List
+
+import numpy as np
+
+from config.settings import Config
+from utils.constants import MODEL_CONFIG
+from models.inference_backends import load_backend, softmax
+
+# Symptom vocabulary the distillation corpus is sampled from
+DISTILLATION_SYMPTOMS = [
+    'fever', 'high fever', 'mild fever', 'chills', 'sweating', 'night sweats',
+    'headache', 'severe headache', 'dizziness', 'fainting', 'blurred vision', 'sensitivity to light',
+    'cough', 'dry cough', 'cough with phlegm', 'coughing blood', 'sore throat', 'runny nose',
+    'sneezing', 'watery eyes', 'wheezing', 'shortness of breath', 'breathlessness', 'chest tightness',
+    'chest pain', 'palpitations', 'swollen legs', 'high blood pressure',
+    'stomach pain', 'abdominal cramps', 'lower abdominal pain', 'nausea', 'vomiting', 'diarrhea',
+    'constipation', 'bloating', 'acidity', 'heartburn', 'sour taste', 'loss of appetite',
+    'yellow eyes', 'yellow skin', 'dark urine', 'burning urination', 'frequent urination',
+    'increased thirst', 'weight loss', 'fatigue', 'weakness', 'body ache',
+    'joint pain', 'joint swelling', 'stiffness', 'back pain', 'neck pain', 'muscle pain',
+    'skin rash', 'itching', 'red spots', 'blisters', 'peeling skin', 'dry skin', 'pimples',
+    'swollen lymph nodes', 'numbness', 'tingling in hands', 'confusion', 'anxiety', 'insomnia'
+]
+
+# Ways patients phrase the same symptom list
+DISTILLATION_TEMPLATES = [
+    "{}",
+    "I have {}",
+    "suffering from {}",
+    "{} since two days",
+    "patient reports {}"
+]
+
+def build_distillation_corpus(size: int = 5000, max_symptoms: int = 4, seed: int = 13) -> List[str]:
+    """Sample symptom combinations to label with the transformer"""
+    rng = random.Random(seed)
+    corpus = set()
+    
+    while len(corpus) < size:
+        symptoms = rng.sample(DISTILLATION_SYMPTOMS, rng.randint(1, max_symptoms))
+        corpus.add(rng.choice(DISTILLATION_TEMPLATES).format(", ".join(symptoms)))
+    
+    return sorted(corpus)
+
+def teacher_probabilities(backend, texts: List[str], batch_size: int = 64) -> np.ndarray:
+    """Transformer class probabilities for a corpus, in batches"""
+    outputs = []
+    for start in range(0, len(texts), batch_size):
+        outputs.append(softmax(backend.logits(texts[start:start + batch_size])))
+    return np.concatenate(outputs)
+
+class FastClassifier:
+    """TF-IDF plus logistic regression model distilled from the transformer.
+    
+    Probabilities are laid out in the transformer's label order, so the
+    cascade can rank either model's output the same way.
+    """
+    
+    name = 'tfidf-logreg'
+
+    def __init__(self, vectorizer, model, labels: List[str], metadata: Dict = None, training_texts=None):
+        self.vectorizer = vectorizer
+        self.model = model
+        self.labels = labels
+        self.metadata = metadata or {}
+        
+        # Kept so a report never scores the student on texts it was fitted on
+        self.training_texts = frozenset(training_texts or ())
+        
+        # Map the classes the student saw during training onto the full label set
+        self._columns = np.array([int(label_index) for label_index in model.classes_])
+
+    @property
+    def version(self) -> str:
+        return self.metadata.get('trained_at', 'untrained')
+
+    @classmethod
+    def train(cls, texts: List[str], teacher_labels: List[int], labels: List[str]) -> "FastClassifier":
+        """Fit the student on the transformer's top-1 labels"""
+        from sklearn.feature_extraction.text import TfidfVectorizer
+        from sklearn.linear_model import LogisticRegression
+        
+        vectorizer = TfidfVectorizer(ngram_range=(1, 2), sublinear_tf=True, min_df=1)
+        features = vectorizer.fit_transform(texts)
+        
+        model = LogisticRegression(C=10.0, max_iter=2000)
+        model.fit(features, teacher_labels)
+        
+        metadata = {
+            'trained_at': datetime.now().strftime('%Y%m%dT%H%M%S'),
+            'samples': len(texts),
+            'vocabulary_size': len(vectorizer.vocabulary_)
+        }
+        return cls(vectorizer, model, labels, metadata, texts)
+
+    def predict_proba(self, texts: List[str]) -> np.ndarray:
+        """Class probabilities over the transformer's full label set"""
+        student = self.model.predict_proba(self.vectorizer.transform(texts))
+        probabilities = np.zeros((len(texts), len(self.labels)))
+        probabilities[:, self._columns] = student
+        return probabilities
+
+    def save(self, path: str):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path, 'wb') as model_file:
+            pickle.dump({
+                'vectorizer': self.vectorizer,
+                'model': self.model,
+                'labels': self.labels,
+                'metadata': self.metadata,
+                'training_texts': sorted(self.training_texts)
+            }, model_file)
+
+    @classmethod
+    def load(cls, path: str) -> "FastClassifier":
+        with open(path, 'rb') as model_file:
+            bundle = pickle.load(model_file)
+        return cls(
+            bundle['vectorizer'], bundle['model'], bundle['labels'], bundle['metadata'],
+            bundle.get('training_texts')
+        )
+
+def load_fast_classifier(config: Config = None):
+    """Load the distilled first stage, or None when it is disabled or not trained yet"""
+    config = config or Config()
+    logger = logging.getLogger(__name__)
+    
+    if not config.CASCADE_ENABLED:
+        return None
+    
+    if not os.path.exists(config.CASCADE_MODEL_PATH):
+        logger.info(f"No fast classifier at {config.CASCADE_MODEL_PATH}, every request uses the transformer")
+        return None
+    
+    return FastClassifier.load(config.CASCADE_MODEL_PATH)
+
+def cascade_report(fast: FastClassifier, texts: List[str], teacher: np.ndarray,
+                   threshold: float = None) -> Dict:
+    """Agreement with the transformer and the share of traffic that escalates"""
+    threshold = MODEL_CONFIG['disease_confidence_threshold'] if threshold is None else threshold
+    
+    started = time.perf_counter()
+    student = fast.predict_proba(texts)
+    fast_ms = (time.perf_counter() - started) * 1000 / max(len(texts), 1)
+    
+    student_top1 = student.argmax(axis=1)
+    teacher_top1 = teacher.argmax(axis=1)
+    agrees = student_top1 == teacher_top1
+    
+    confident = student.max(axis=1) >= threshold
+    served = int(confident.sum())
+    
+    return {
+        'samples': len(texts),
+        'threshold': threshold,
+        'agreement': round(float(agrees.mean()), 4),
+        'escalation_rate': round(float(1 - confident.mean()), 4),
+        'served_by_fast_model': served,
+        'agreement_when_served': round(float(agrees[confident].mean()), 4) if served else None,
+        # Escalated requests get the transformer's own answer
+        'cascade_agreement': round(float((agrees | ~confident).mean()), 4),
+        'fast_model_ms_per_text': round(fast_ms, 3)
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Distilled first-stage disease classifier")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    
+    for command, help_text in (('train', "Distill the transformer into the fast classifier"),
+                               ('report', "Agreement and escalation rate of the saved fast classifier")):
+        command_parser = subparsers.add_parser(command, help=help_text)
+        command_parser.add_argument('--corpus', help="Text file with one symptom string per line")
+        command_parser.add_argument('--size', type=int, default=5000, help="Generated corpus size")
+        command_parser.add_argument('--threshold', type=float, default=None)
+    subparsers.choices['train'].add_argument('--holdout', type=float, default=0.2)
+    
+    args = parser.parse_args()
+    config = Config()
+    
+    if args.corpus:
+        with open(args.corpus) as corpus_file:
+            texts = [line.strip() for line in corpus_file if line.strip()]
+    else:
+        texts = build_distillation_corpus(args.size, seed=13 if args.command == 'train' else 29)
+    
+    if args.command == 'report':
+        # The generated corpora overlap, and seen texts would inflate agreement
+        fast = FastClassifier.load(config.CASCADE_MODEL_PATH)
+        unseen = [text for text in texts if text not in fast.training_texts]
+        print(f"Excluded {len(texts) - len(unseen)} texts the fast classifier was trained on")
+        texts = unseen
+        if not texts:
+            parser.error("every report text was in the training set")
+    
+    backend = load_backend(config)
+    teacher = teacher_probabilities(backend, texts)
+    
+    if args.command == 'train':
+        order = list(range(len(texts)))
+        random.Random(7).shuffle(order)
+        split = int(len(order) * (1 - args.holdout))
+        train_rows, test_rows = order[:split], order[split:]
+        
+        fast = FastClassifier.train(
+            [texts[i] for i in train_rows],
+            teacher[train_rows].argmax(axis=1).tolist(),
+            backend.labels
+        )
+        fast.save(config.CASCADE_MODEL_PATH)
+        print(f"Fast classifier written to {config.CASCADE_MODEL_PATH}")
+        
+        texts = [texts[i] for i in test_rows]
+        teacher = teacher[test_rows]
+    
+    print(json.dumps(cascade_report(fast, texts, teacher, args.threshold), indent=2))
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    main()
@@ -1,35 +1,84 @@
-import torch
-from transformers import pipeline, AutoTokenizer, AutoModelForSequenceClassification
-from transformers import AutoModelForCausalLM, AutoTokenizer as ConvTokenizer
-from typing import Dict, List
+from typing import Dict, List, Optional, Tuple
 import logging
+import threading
 from config.settings import Config
+from utils.constants import MODEL_CONFIG
+from models.inference_batcher import InferenceBatcher
+from models.inference_backends import load_backend, rank_top_k, softmax
+from models.inference_server import RemoteBackend
+from models.cascade_classifier import load_fast_classifier
+from models.symptom_normalizer import load_symptom_normalizer
+from models.label_metadata import load_label_metadata, rule_recommendations
+from models.adaptive_questioner import load_adaptive_questioner, question_text
+from models.model_lifecycle import ManagedModel
+from utils.cache import LRUCache
 
 class DiseaseIdentifier:
     def __init__(self):
         self.config = Config()
         self.logger = logging.getLogger(__name__)
         
-        # Conversational backbone
-        self.model_name = "microsoft/DialoGPT-medium"
+        # Conversational backbone, loaded on first use
+        self.model_name = self.config.CONVERSATIONAL_MODEL
         
         try:
-            # Disease classification model
-            self.classifier = pipeline(
-                "text-classification",
-                model="Zabihin/Symptom_to_Diagnosis",
-                tokenizer="Zabihin/Symptom_to_Diagnosis",
-                cache_dir=self.config.HUGGINGFACE_CACHE_DIR
-            )
+            # Disease classification model (PyTorch, quantized ONNX Runtime or the model server)
+            self.classifier = load_backend(self.config)
+            self.labels = self.classifier.labels
+            
+            # Cheap distilled first stage; the transformer only sees what it is unsure about
+            self.fast_classifier = load_fast_classifier(self.config)
+            if self.fast_classifier is not None and self.fast_classifier.labels != self.labels:
+                self.logger.warning("Fast classifier labels do not match the transformer, disabling cascade")
+                self.fast_classifier = None
+            # Severity, advice and follow-ups per label, computed once for the fixed label set
+            self.label_metadata = load_label_metadata(self.labels, self.config)
+            
+            # Free-text symptoms ("tummy ache") mapped onto the canonical vocabulary
+            self.symptom_normalizer = load_symptom_normalizer(self.config)
+            
+            # Symptom-by-disease matrix for picking the most informative next question
+            self.adaptive_questioner = load_adaptive_questioner(self.config)
+            if self.adaptive_questioner is not None and self.adaptive_questioner.labels != self.labels:
+                self.logger.warning("Symptom matrix labels do not match the classifier, follow-up questions are fixed")
+                self.adaptive_questioner = None
             
-            # Conversational model for follow-up questions
-            self.conv_tokenizer = ConvTokenizer.from_pretrained(
-                self.model_name,
-                cache_dir=self.config.HUGGINGFACE_CACHE_DIR
+            self.cascade_served = 0
+            self.cascade_escalated = 0
+            self._cascade_lock = threading.Lock()
+            
+            # Memoize classifier output per symptom set; the version is part of
+            # every key so a model change never serves stale predictions
+            self.model_version = (
+                f"{self.classifier.name}:{self.config.SYMPTOM_MODEL_NAME}:{self.config.SYMPTOM_MODEL_VERSION}"
+            )
+            if self.fast_classifier is not None:
+                self.model_version += f"+{self.fast_classifier.name}:{self.fast_classifier.version}"
+            self.prediction_cache = LRUCache(
+                max_entries=self.config.PREDICTION_CACHE_SIZE,
+                ttl_seconds=self.config.PREDICTION_CACHE_TTL,
+                max_bytes=self.config.PREDICTION_CACHE_MAX_MB * 1024 * 1024,
+                name='disease-predictions'
             )
-            self.conv_model = AutoModelForCausalLM.from_pretrained(
-                self.model_name,
-                cache_dir=self.config.HUGGINGFACE_CACHE_DIR
+            
+            # Micro-batch concurrent predictions into a single forward pass. The
+            # model server already batches across workers, so a second window
+            # here would only add latency
+            self.batcher = None
+            if self.config.INFERENCE_BATCHING and not isinstance(self.classifier, RemoteBackend):
+                self.batcher = InferenceBatcher(
+                    self._classify_batch,
+                    max_batch_size=self.config.INFERENCE_MAX_BATCH_SIZE,
+                    max_wait_ms=self.config.INFERENCE_MAX_WAIT_MS,
+                    name='disease-classifier'
+                )
+            
+            # Conversational model for follow-up questions is only loaded on
+            # first use and unloaded again after CONVERSATIONAL_IDLE_TIMEOUT
+            self.conversational_model = ManagedModel(
+                'conversational',
+                self._load_conversational_model,
+                idle_timeout=self.config.CONVERSATIONAL_IDLE_TIMEOUT
             )
             
             self.logger.info("Disease identification models loaded successfully")
@@ -38,159 +87,320 @@ class DiseaseIdentifier:
             self.logger.error(f"Error loading models: {e}")
             raise
 
-    def predict_disease(self, symptoms_list: List[str]) -> Dict:
-        """Predict disease from list of symptoms"""
+    def predict_disease(self, symptoms_list: List[str], explain: bool = False) -> Dict:
+        """Predict disease from list of symptoms, optionally with per-symptom attribution"""
         try:
-            # Prepare symptoms text
-            symptoms_text = ", ".join(symptoms_list)
-            
-            # Get prediction from the model
-            prediction = self.classifier(symptoms_text)
-            
-            # Extract top predictions
-            if isinstance(prediction, list):
-                top_prediction = prediction[0]
-            else:
-                top_prediction = prediction
-            
-            disease = top_prediction['label']
-            confidence = top_prediction['score']
-            
-            # Assess severity based on disease type
-            severity = self.assess_severity(disease)
-            
-            # Get additional info
-            recommendations = self.get_recommendations(disease, severity)
-            
-            result = {
-                "disease": disease,
-                "confidence": round(confidence, 3),
-                "severity": severity,
-                "symptoms_analyzed": symptoms_list,
-                "recommendations": recommendations,
-                "requires_immediate_attention": severity == "high"
-            }
+            # Same symptoms in any order or case share one cache entry
+            canonical = self.canonicalize_symptoms(self.normalize_symptoms(symptoms_list))
+            if not canonical:
+                # An empty string would still get a (meaningless) top label
+                return self._fallback_prediction(symptoms_list, ValueError("No symptoms to classify"))
+            cache_key = (self.model_version, canonical)
+            
+            candidates = self.prediction_cache.get(cache_key)
+            if candidates is None:
+                symptoms_text = ", ".join(canonical)
+                candidates = self._classify_fast([symptoms_text])[0]
+                
+                # Escalate to the transformer, batched with concurrent requests
+                if candidates is None:
+                    if self.batcher is not None:
+                        candidates = self.batcher.predict(symptoms_text)
+                    else:
+                        candidates = self._classify_batch([symptoms_text])[0]
+                
+                self.prediction_cache.set(cache_key, candidates)
             
-            self.logger.info(f"Disease prediction: {disease} (confidence: {confidence})")
+            result = self._build_prediction(symptoms_list, candidates)
+            if explain:
+                result['explanation'] = self.explain_prediction(symptoms_list, result['disease'])
             return result
             
         except Exception as e:
             self.logger.error(f"Error in disease prediction: {e}")
+            return self._fallback_prediction(symptoms_list, e)
+
+    def predict_disease_batch(self, symptom_lists: List[List[str]]) -> List[Dict]:
+        """Predict diseases for many symptom lists in one forward pass"""
+        if not symptom_lists:
+            return []
+        
+        try:
+            cache_keys = [
+                (self.model_version, self.canonicalize_symptoms(self.normalize_symptoms(symptoms_list)))
+                for symptoms_list in symptom_lists
+            ]
+            predictions = [self.prediction_cache.get(key) for key in cache_keys]
+            
+            # Only classify symptom sets that are not cached, each once
+            missing = list(dict.fromkeys(
+                key for key, cached in zip(cache_keys, predictions) if cached is None and key[1]
+            ))
+            if missing:
+                texts = [", ".join(key[1]) for key in missing]
+                fast = self._classify_fast(texts)
+                
+                escalated = [text for text, candidates in zip(texts, fast) if candidates is None]
+                transformer = iter(self._classify_batch(escalated) if escalated else [])
+                computed = {
+                    key: candidates if candidates is not None else next(transformer)
+                    for key, candidates in zip(missing, fast)
+                }
+                for key, candidates in computed.items():
+                    self.prediction_cache.set(key, candidates)
+                predictions = [
+                    cached if cached is not None else computed.get(key)
+                    for key, cached in zip(cache_keys, predictions)
+                ]
+            
+            return [
+                self._build_prediction(symptoms_list, candidates) if candidates is not None
+                else self._fallback_prediction(symptoms_list, ValueError("No symptoms to classify"))
+                for symptoms_list, candidates in zip(symptom_lists, predictions)
+            ]
+            
+        except Exception as e:
+            self.logger.error(f"Error in batch disease prediction: {e}")
+            return [self._fallback_prediction(symptoms_list, e) for symptoms_list in symptom_lists]
+
+    def explain_prediction(self, symptoms_list: List[str], label: str = None) -> Dict:
+        """Contribution of each symptom to the top label, from one batched forward pass.
+        
+        The full symptom list and every leave-one-out variant are scored
+        together; a symptom's contribution is how much the label's probability
+        drops without it. At most MODEL_CONFIG['explanation_max_variants']
+        symptoms are left out, in the order they were reported.
+        """
+        try:
+            reported = [symptom for symptom in symptoms_list if symptom and symptom.strip()]
+            normalized = self.normalize_symptoms(reported)
+            canonical = self.canonicalize_symptoms(normalized)
+            if not canonical:
+                return {"label": label, "contributions": [], "not_evaluated": [], "variants_scored": 0}
+            
+            # One variant per canonical symptom, named as the user first reported it
+            terms = {}
+            for symptom, term in zip(reported, normalized):
+                terms.setdefault(" ".join(term.lower().split()), " ".join(symptom.lower().split()))
+            limit = MODEL_CONFIG['explanation_max_variants']
+            evaluated, not_evaluated = list(terms)[:limit], list(terms)[limit:]
+            
+            texts = [", ".join(canonical)] + [
+                ", ".join(symptom for symptom in canonical if symptom != left_out)
+                for left_out in evaluated
+            ]
+            probabilities = self._class_probabilities(texts)
+            
+            # Explain the label the caller was shown, which may come from the cascade
+            index = self.labels.index(label) if label in self.labels else int(probabilities[0].argmax())
+            full = float(probabilities[0, index])
+            
+            contributions = sorted((
+                {
+                    "symptom": terms[term],
+                    "normalized": term,
+                    "contribution": round(full - float(without), 3),
+                    "probability_without": round(float(without), 3)
+                }
+                for term, without in zip(evaluated, probabilities[1:, index])
+            ), key=lambda item: item['contribution'], reverse=True)
+            
             return {
-                "disease": "Unable to determine",
-                "confidence": 0.0,
-                "severity": "medium",
-                "symptoms_analyzed": symptoms_list,
-                "recommendations": ["Please consult a healthcare professional"],
-                "requires_immediate_attention": False,
-                "error": str(e)
+                "label": self.labels[index],
+                "probability": round(full, 3),
+                "contributions": contributions,
+                "not_evaluated": [terms[term] for term in not_evaluated],
+                "variants_scored": len(texts)
             }
+            
+        except Exception as e:
+            self.logger.error(f"Error explaining prediction: {e}")
+            return {"label": label, "contributions": [], "not_evaluated": [], "error": str(e)}
 
-    def assess_severity(self, disease: str) -> str:
-        """Assess severity level of the predicted disease"""
+    def normalize_symptoms(self, symptoms_list: List[str]) -> List[str]:
+        """Map each symptom onto the canonical vocabulary, when a normalizer is loaded"""
+        if self.symptom_normalizer is None:
+            return list(symptoms_list)
+        return self.symptom_normalizer.normalize_all(symptoms_list)
+
+    @staticmethod
+    def canonicalize_symptoms(symptoms_list: List[str]) -> Tuple[str, ...]:
+        """Lower-cased, de-duplicated, sorted form of a symptom list"""
+        return tuple(sorted({
+            " ".join(symptom.lower().split()) for symptom in symptoms_list
+            if symptom and symptom.strip()
+        }))
+
+    def set_model_version(self, version: str):
+        """Record a new model version, dropping predictions from the old one"""
+        if version != self.model_version:
+            self.logger.info(f"Model version changed to {version}, clearing prediction cache")
+            self.model_version = version
+            self.prediction_cache.clear()
+
+    def _classify_fast(self, texts: List[str]) -> List[Optional[List[Dict]]]:
+        """Ranked differential from the fast classifier, or None where it must escalate"""
+        if self.fast_classifier is None:
+            return [None] * len(texts)
         
-        # High severity conditions - require immediate medical attention
-        high_severity = [
-            "heart attack", "stroke", "appendicitis", "heart failure",
-            "pneumonia", "meningitis", "sepsis", "pulmonary embolism",
-            "diabetic ketoacidosis", "severe allergic reaction",
-            "acute coronary syndrome", "anaphylaxis"
-        ]
+        probabilities = self.fast_classifier.predict_proba(texts)
+        confident = probabilities.max(axis=1) >= MODEL_CONFIG['disease_confidence_threshold']
+        ranked = self._rank(probabilities)
         
-        # Medium severity conditions - need medical consultation soon
-        medium_severity = [
-            "diabetes", "hypertension", "asthma", "bronchitis",
-            "urinary tract infection", "gastritis", "migraine",
-            "depression", "anxiety", "arthritis", "osteoporosis"
-        ]
+        served = int(confident.sum())
+        with self._cascade_lock:
+            self.cascade_served += served
+            self.cascade_escalated += len(texts) - served
         
-        # Low severity conditions - can be managed with care
-        low_severity = [
-            "common cold", "flu", "headache", "muscle strain",
-            "minor cuts", "mild fever", "fatigue", "indigestion",
-            "seasonal allergies", "minor skin irritation"
+        return [candidates if is_confident else None for candidates, is_confident in zip(ranked, confident)]
+
+    def _classify_batch(self, texts: List[str]) -> List[List[Dict]]:
+        """Run the classifier on a padded batch and rank the differential per text"""
+        return self._rank(self._class_probabilities(texts))
+
+    def _class_probabilities(self, texts: List[str]):
+        """Transformer (batch, labels) probabilities from one padded forward pass"""
+        return softmax(self.classifier.logits(texts))
+
+    def _rank(self, probabilities) -> List[List[Dict]]:
+        """Top candidates per row of a (batch, labels) probability matrix"""
+        ranked = rank_top_k(
+            probabilities,
+            MODEL_CONFIG['differential_top_k'],
+            MODEL_CONFIG['differential_cumulative_cutoff']
+        )
+        
+        return [
+            [{"label": self.labels[index], "score": score} for index, score in candidates]
+            for candidates in ranked
         ]
+
+    def _build_prediction(self, symptoms_list: List[str], candidates: List[Dict]) -> Dict:
+        """Build the prediction response from the ranked differential"""
+        differential = []
+        for candidate in candidates:
+            metadata = self.label_metadata.get(candidate['label'])
+            differential.append({
+                "disease": candidate['label'],
+                "probability": round(candidate['score'], 3),
+                "severity": metadata['severity'],
+                "recommendations": list(metadata['recommendations']),
+                "category": metadata['category']
+            })
         
-        disease_lower = disease.lower()
+        top_prediction = differential[0]
+        disease = top_prediction['disease']
+        confidence = candidates[0]['score']
+        severity = top_prediction['severity']
         
-        for condition in high_severity:
-            if condition in disease_lower:
-                return "high"
+        result = {
+            "disease": disease,
+            "confidence": round(confidence, 3),
+            "severity": severity,
+            "category": top_prediction['category'],
+            "risk_score": self.label_metadata.get(disease)['risk_score'],
+            "symptoms_analyzed": symptoms_list,
+            "recommendations": top_prediction['recommendations'],
+            "requires_immediate_attention": severity == "high",
+            "differential": differential
+        }
         
-        for condition in medium_severity:
-            if condition in disease_lower:
-                return "medium"
+        self.logger.info(f"Disease prediction: {disease} (confidence: {confidence})")
+        return result
+
+    def _fallback_prediction(self, symptoms_list: List[str], error: Exception) -> Dict:
+        """Prediction returned when the classifier fails"""
+        return {
+            "disease": "Unable to determine",
+            "confidence": 0.0,
+            "severity": "medium",
+            "symptoms_analyzed": symptoms_list,
+            "recommendations": ["Please consult a healthcare professional"],
+            "requires_immediate_attention": False,
+            "differential": [],
+            "error": str(error)
+        }
+
+    def get_inference_stats(self) -> Dict:
+        """Batching and model lifecycle statistics"""
+        if self.batcher is None:
+            stats = {'batching': False}
+        else:
+            stats = self.batcher.get_stats()
+            stats['batching'] = True
         
-        for condition in low_severity:
-            if condition in disease_lower:
-                return "low"
+        stats['backend'] = self.classifier.name
+        if self.symptom_normalizer is not None:
+            stats['symptom_normalizer'] = self.symptom_normalizer.get_stats()
+        if self.adaptive_questioner is not None:
+            stats['adaptive_questions'] = {'symptoms': len(self.adaptive_questioner.symptoms)}
+        if hasattr(self.classifier, 'get_stats'):
+            stats['inference_server'] = self.classifier.get_stats()
+        stats['model_version'] = self.model_version
+        stats['prediction_cache'] = self.prediction_cache.get_stats()
         
-        # Default to medium if unknown
-        return "medium"
+        with self._cascade_lock:
+            served, escalated = self.cascade_served, self.cascade_escalated
+        classified = served + escalated
+        stats['cascade'] = {
+            'enabled': self.fast_classifier is not None,
+            'fast_model_version': self.fast_classifier.version if self.fast_classifier is not None else None,
+            'served_by_fast_model': served,
+            'escalated': escalated,
+            'escalation_rate': round(escalated / classified, 3) if classified else None
+        }
+        stats['conversational_model'] = self.conversational_model.get_stats()
+        return stats
+
+    def assess_severity(self, disease: str) -> str:
+        """Assess severity level of the predicted disease"""
+        return self.label_metadata.get(disease)['severity']
 
     def get_recommendations(self, disease: str, severity: str) -> List[str]:
         """Get recommendations based on disease and severity"""
+        metadata = self.label_metadata.get(disease)
+        if metadata['severity'] == severity:
+            return list(metadata['recommendations'])
+        return rule_recommendations(disease, severity)
+
+    def _load_conversational_model(self):
+        """Load the DialoGPT tokenizer and model"""
+        from transformers import AutoModelForCausalLM, AutoTokenizer
+        
+        conv_tokenizer = AutoTokenizer.from_pretrained(
+            self.model_name,
+            cache_dir=self.config.HUGGINGFACE_CACHE_DIR
+        )
+        conv_model = AutoModelForCausalLM.from_pretrained(
+            self.model_name,
+            cache_dir=self.config.HUGGINGFACE_CACHE_DIR
+        )
+        conv_model.eval()
         
-        recommendations = []
-        
-        if severity == "high":
-            recommendations.extend([
-                "🚨 Seek immediate medical attention",
-                "🏥 Go to the nearest emergency room",
-                "📞 Call emergency services if symptoms worsen",
-                "🚫 Do not delay medical treatment"
-            ])
-        elif severity == "medium":
-            recommendations.extend([
-                "👨‍⚕️ Schedule an appointment with a doctor",
-                "📋 Monitor your symptoms closely",
-                "💊 Follow prescribed medications if any",
-                "🏥 Visit a clinic within 24-48 hours"
-            ])
-        else:  # low severity
-            recommendations.extend([
-                "🏠 Rest and take care of yourself",
-                "💧 Stay hydrated",
-                "🌡️ Monitor your temperature",
-                "👨‍⚕️ Consult a doctor if symptoms persist"
-            ])
-        
-        # Disease-specific recommendations
-        disease_lower = disease.lower()
-        
-        if "fever" in disease_lower:
-            recommendations.append("🌡️ Take temperature-reducing medication if needed")
-        
-        if "cough" in disease_lower:
-            recommendations.append("🍯 Try warm liquids and honey")
-        
-        if "pain" in disease_lower:
-            recommendations.append("💊 Consider over-the-counter pain relief")
-        
-        if "infection" in disease_lower:
-            recommendations.append("🧼 Maintain good hygiene")
-        
-        return recommendations
+        return conv_tokenizer, conv_model
 
     def generate_conversational_response(self, context: str, max_length: int = 100) -> str:
         """Generate conversational response using DialoGPT"""
         try:
-            # Encode the context
-            inputs = self.conv_tokenizer.encode(context + self.conv_tokenizer.eos_token, return_tensors='pt')
-            
-            # Generate response
-            with torch.no_grad():
-                outputs = self.conv_model.generate(
-                    inputs,
-                    max_length=max_length,
-                    num_return_sequences=1,
-                    pad_token_id=self.conv_tokenizer.eos_token_id,
-                    do_sample=True,
-                    temperature=0.7
-                )
+            import torch
             
-            # Decode the response
-            response = self.conv_tokenizer.decode(outputs[0], skip_special_tokens=True)
+            with self.conversational_model.use() as (conv_tokenizer, conv_model):
+                # Encode the context
+                inputs = conv_tokenizer.encode(context + conv_tokenizer.eos_token, return_tensors='pt')
+                
+                # Generate response
+                with torch.no_grad():
+                    outputs = conv_model.generate(
+                        inputs,
+                        max_length=max_length,
+                        num_return_sequences=1,
+                        pad_token_id=conv_tokenizer.eos_token_id,
+                        do_sample=True,
+                        temperature=0.7
+                    )
+                
+                # Decode the response
+                response = conv_tokenizer.decode(outputs[0], skip_special_tokens=True)
             
             # Extract only the new part (after the input context)
             if context in response:
@@ -202,35 +412,26 @@ class DiseaseIdentifier:
             self.logger.error(f"Error in conversational response: {e}")
             return "I understand your concern. Let me help you with that."
 
-    def get_follow_up_questions(self, disease: str, symptoms: List[str]) -> List[str]:
-        """Generate follow-up questions based on predicted disease"""
+    def get_follow_up_questions(self, disease: str, symptoms: List[str], differential: List[Dict] = None) -> List[str]:
+        """Generate follow-up questions based on predicted disease.
         
-        base_questions = [
-            "How long have you been experiencing these symptoms?",
-            "Have you taken any medication for this?",
-            "Do you have any other symptoms not mentioned?",
-            "Any family history of similar conditions?"
-        ]
-        
-        # Disease-specific questions
-        disease_lower = disease.lower()
-        
-        if "diabetes" in disease_lower:
-            base_questions.extend([
-                "Do you check your blood sugar regularly?",
-                "Have you noticed increased thirst or urination?"
-            ])
+        With a symptom matrix loaded, the symptoms that best separate the
+        current differential are asked about first, and the disease's own
+        questions fill the remaining slots.
+        """
+        questions = list(self.label_metadata.get(disease)['follow_up_questions'])
+        if self.adaptive_questioner is None or not differential:
+            return questions
         
-        if "heart" in disease_lower:
-            base_questions.extend([
-                "Do you experience chest pain during physical activity?",
-                "Any shortness of breath?"
-            ])
+        posterior = self.adaptive_questioner.prior(differential)
+        known = self.normalize_symptoms(symptoms)
+        for symptom in known:
+            posterior = self.adaptive_questioner.update(posterior, symptom, True)
         
-        if "infection" in disease_lower:
-            base_questions.extend([
-                "Do you have a fever?",
-                "Any recent travel or exposure to illness?"
-            ])
-        
-        return base_questions[:4]  # Return top 4 questions
\ No newline at end of file
+        adaptive = [
+            question_text(question['symptom'])
+            for question in self.adaptive_questioner.next_questions(
+                posterior, known, self.config.ADAPTIVE_QUESTIONS_COUNT
+            )
+        ]
+        return (adaptive + questions)[:max(len(questions), len(adaptive))]
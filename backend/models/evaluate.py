@@ -0,0 +1,170 @@
+import argparse
+import csv
+import json
+import logging
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Dict, Iterator, List
+
+from utils.helpers import get_process_memory_mb
+from utils.metrics import RollingStats
+
+def read_cases(path: str, symptoms_field: str = 'symptoms', label_field: str = 'disease',
+               file_format: str = None) -> Iterator[Dict]:
+    """Stream cases from a CSV or JSONL file without loading it into memory.
+
+    Symptoms may be a JSON list or a string separated by ';' (or ',').
+    Rows without a label are still predicted, just not scored.
+    """
+    file_format = file_format or ('csv' if path.lower().endswith('.csv') else 'jsonl')
+
+    with open(path, newline='' if file_format == 'csv' else None, encoding='utf-8') as case_file:
+        records = csv.DictReader(case_file) if file_format == 'csv' else (
+            json.loads(line) for line in case_file if line.strip()
+        )
+
+        for row, record in enumerate(records):
+            symptoms = record.get(symptoms_field) or []
+            if isinstance(symptoms, str):
+                separator = ';' if ';' in symptoms else ','
+                symptoms = [symptom.strip() for symptom in symptoms.split(separator) if symptom.strip()]
+
+            yield {
+                'row': row,
+                'id': record.get('id', row),
+                'symptoms': symptoms,
+                'label': record.get(label_field) or None
+            }
+
+def _batches(cases: Iterator[Dict], batch_size: int) -> Iterator[List[Dict]]:
+    batch = []
+    for case in cases:
+        batch.append(case)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def evaluate(identifier, cases: Iterator[Dict], batch_size: int = 32, threads: int = 4,
+             output=None) -> Dict:
+    """Run batched predictions over a case stream on several threads.
+
+    At most two batches per thread are in flight, so memory stays flat
+    however large the input is. Predictions are written to `output` as
+    JSON lines as each batch finishes, in completion order.
+    """
+    write_lock = threading.Lock()
+    stats_lock = threading.Lock()
+    batch_latency_ms = RollingStats(window=1_000_000)
+    predicted = Counter()
+    severities = Counter()
+    totals = Counter()
+    peak_rss_mb = get_process_memory_mb()
+
+    def run_batch(batch: List[Dict]):
+        nonlocal peak_rss_mb
+
+        started = time.perf_counter()
+        predictions = identifier.predict_disease_batch([case['symptoms'] for case in batch])
+        severity = [identifier.assess_severity(prediction['disease']) for prediction in predictions]
+        batch_latency_ms.record((time.perf_counter() - started) * 1000)
+
+        results = []
+        with stats_lock:
+            for case, prediction, case_severity in zip(batch, predictions, severity):
+                differential = [candidate['disease'].lower() for candidate in prediction['differential']]
+                predicted[prediction['disease']] += 1
+                severities[case_severity] += 1
+                totals['rows'] += 1
+                totals['errors'] += 'error' in prediction
+
+                if case['label']:
+                    label = case['label'].strip().lower()
+                    totals['labeled'] += 1
+                    totals['top1_correct'] += prediction['disease'].lower() == label
+                    totals['differential_correct'] += label in differential
+
+                results.append({
+                    'id': case['id'],
+                    'symptoms': case['symptoms'],
+                    'label': case['label'],
+                    'disease': prediction['disease'],
+                    'confidence': prediction['confidence'],
+                    'severity': case_severity,
+                    'differential': differential
+                })
+            peak_rss_mb = max(peak_rss_mb, get_process_memory_mb())
+
+        if output is not None:
+            lines = ''.join(json.dumps(result, ensure_ascii=False) + '\n' for result in results)
+            with write_lock:
+                output.write(lines)
+                output.flush()
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        pending = set()
+        for batch in _batches(cases, batch_size):
+            if len(pending) >= 2 * threads:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    future.result()
+            pending.add(executor.submit(run_batch, batch))
+
+        for future in pending:
+            future.result()
+    elapsed = time.perf_counter() - started
+
+    labeled = totals['labeled']
+    report = {
+        'rows': totals['rows'],
+        'errors': totals['errors'],
+        'seconds': round(elapsed, 2),
+        'rows_per_s': round(totals['rows'] / elapsed, 1) if elapsed else None,
+        'batch_size': batch_size,
+        'threads': threads,
+        'batch_latency_ms': batch_latency_ms.summary(),
+        'peak_rss_mb': round(peak_rss_mb, 1),
+        'label_distribution': dict(predicted.most_common()),
+        'severity_distribution': dict(severities.most_common()),
+        'labeled_rows': labeled,
+        'accuracy': round(totals['top1_correct'] / labeled, 4) if labeled else None,
+        'differential_accuracy': round(totals['differential_correct'] / labeled, 4) if labeled else None
+    }
+
+    if hasattr(identifier, 'prediction_cache'):
+        report['prediction_cache'] = identifier.prediction_cache.get_stats()
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline batch evaluation of the disease classifier")
+    parser.add_argument('input', help="CSV or JSONL file of cases")
+    parser.add_argument('--output', help="JSONL file to write predictions to as they finish")
+    parser.add_argument('--format', choices=('csv', 'jsonl'), help="Input format (default: from the extension)")
+    parser.add_argument('--symptoms-field', default='symptoms')
+    parser.add_argument('--label-field', default='disease', help="Ground-truth column, if present")
+    parser.add_argument('--batch-size', type=int, default=32)
+    parser.add_argument('--threads', type=int, default=4)
+
+    args = parser.parse_args()
+
+    from models.disease_identifier import DiseaseIdentifier
+    identifier = DiseaseIdentifier()
+
+    cases = read_cases(args.input, args.symptoms_field, args.label_field, args.format)
+    output = open(args.output, 'w', encoding='utf-8') if args.output else None
+    try:
+        report = evaluate(identifier, cases, max(1, args.batch_size), max(1, args.threads), output)
+    finally:
+        if output is not None:
+            output.close()
+
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.WARNING, stream=sys.stderr)
+    main()
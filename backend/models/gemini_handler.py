@@ -1,17 +1,29 @@
-import google.generativeai as genai
+import argparse
 import json
-from typing import Dict, List
+import threading
+from typing import Dict, Iterator, List
 import logging
 from config.settings import Config
+from services.model_registry import model_registry
+from utils.cache import PersistentLRUCache
+from utils.constants import SUPPORTED_LANGUAGES
+from utils.semantic_cache import SemanticCache
+
+# Target languages Gemini translates into; other codes fall back to Hindi
+TRANSLATION_LANGUAGES = {
+    'hindi': 'Hindi',
+    'tamil': 'Tamil',
+    'telugu': 'Telugu',
+    'bengali': 'Bengali'
+}
 
 class GeminiHandler:
-    def __init__(self):
+    def __init__(self, llm_gateway=None):
         self.config = Config()
         self.logger = logging.getLogger(__name__)
         
-        # Configure Gemini
-        genai.configure(api_key=self.config.GEMINI_API_KEY)
-        self.model = genai.GenerativeModel('gemini-pro')
+        # Shared Gemini client with timeouts, retries and a circuit breaker
+        self.llm = llm_gateway or model_registry.get('llm_gateway')
         
         # System prompts for different languages
         self.system_prompts = {
@@ -25,13 +37,78 @@ Always remind users that you're not a replacement for professional medical advic
             'tamil': """நீங்கள் சேகத் சாத்தி, அனைத்து இந்திய மொழிகளிலும் பேசும் ஒரு நட்பான AI சுகாதார உதவியாளர்.
 உங்கள் பங்கு பயனுள்ள சுகாதார வழிகாட்டுதலை வழங்குவதாகும்."""
         }
+        
+        # Answers to near-duplicate general questions, one index per language
+        self.guidance_cache = SemanticCache(
+            max_entries=self.config.GUIDANCE_CACHE_SIZE,
+            threshold=self.config.GUIDANCE_CACHE_THRESHOLD,
+            name='health-guidance'
+        ) if self.config.GUIDANCE_CACHE_ENABLED else None
+        
+        # Recommendation and follow-up strings repeat across requests; their
+        # translations are kept on disk and misses are translated in batches
+        self.translation_memory = PersistentLRUCache(
+            self.config.TRANSLATION_MEMORY_PATH,
+            max_entries=self.config.TRANSLATION_MEMORY_SIZE,
+            name='translation-memory'
+        )
+        self._stats_lock = threading.Lock()
+        self.translation_counts = {'batches': 0, 'batches_failed': 0, 'strings_translated': 0}
+
+    def generate_health_guidance(self, user_input: str, language: str, timeout: float = None) -> str:
+        """Generate general health guidance response, waiting at most `timeout` seconds for Gemini"""
+        
+        if self.guidance_cache is not None:
+            cached = self.guidance_cache.get(user_input, language)
+            if cached is not None:
+                return cached['value']
+        
+        try:
+            response = self.llm.generate(
+                self._guidance_prompt(user_input, language), caller='health_guidance', timeout=timeout
+            )
+            guidance = response.text.strip()
+            if self.guidance_cache is not None and guidance:
+                self.guidance_cache.set(user_input, guidance, language)
+            return guidance
+        except Exception as e:
+            self.logger.error(f"Gemini API error in health guidance: {e}")
+            return self.fallback_guidance(language)
 
-    def generate_health_guidance(self, user_input: str, language: str) -> str:
-        """Generate general health guidance response"""
+    def stream_health_guidance(self, user_input: str, language: str, timeout: float = None) -> Iterator[str]:
+        """Health guidance as text chunks, streamed from Gemini as they are generated.
         
+        A cached answer comes back as a single chunk. If Gemini fails before
+        sending anything, the fallback response is sent instead; a failure
+        mid-stream ends the reply where it stopped.
+        """
+        
+        if self.guidance_cache is not None:
+            cached = self.guidance_cache.get(user_input, language)
+            if cached is not None:
+                yield cached['value']
+                return
+        
+        parts = []
+        try:
+            prompt = self._guidance_prompt(user_input, language)
+            for chunk in self.llm.stream(prompt, caller='health_guidance', timeout=timeout):
+                parts.append(chunk)
+                yield chunk
+        except Exception as e:
+            self.logger.error(f"Gemini API error in streamed health guidance: {e}")
+            if not parts:
+                yield self.fallback_guidance(language)
+            return
+        
+        guidance = ''.join(parts).strip()
+        if self.guidance_cache is not None and guidance:
+            self.guidance_cache.set(user_input, guidance, language)
+
+    def _guidance_prompt(self, user_input: str, language: str) -> str:
         system_prompt = self.system_prompts.get(language, self.system_prompts['english'])
         
-        prompt = f"""{system_prompt}
+        return f"""{system_prompt}
 
 User message: "{user_input}"
 Language: {language}
@@ -44,46 +121,124 @@ Please provide a helpful, empathetic response in {language}. If the user is aski
 
 Keep the response conversational and supportive."""
 
-        try:
-            response = self.model.generate_content(prompt)
-            return response.text.strip()
-        except Exception as e:
-            self.logger.error(f"Gemini API error in health guidance: {e}")
-            
-            # Fallback responses
-            fallback_responses = {
-                'english': "I understand your concern. For the best guidance on your health, I recommend consulting with a healthcare professional who can provide personalized advice.",
-                'hindi': "मैं आपकी चिंता समझता हूं। आपके स्वास्थ्य के लिए सबसे अच्छा मार्गदर्शन पाने के लिए, मैं किसी स्वास्थ्य विशेषज्ञ से सलाह लेने की सिफारिश करता हूं।",
-                'tamil': "உங்கள் கவலையை நான் புரிந்துகொள்கிறேன். உங்கள் ஆரோக்கியத்திற்கான சிறந்த வழிகாட்டுதலுக்கு, தனிப்பட்ட ஆலோசனை வழங்கக்கூடிய சுகாதார நிபுணரை அணுகுமாறு பரிந்துரைக்கிறேன்."
-            }
-            
-            return fallback_responses.get(language, fallback_responses['english'])
+    @staticmethod
+    def fallback_guidance(language: str) -> str:
+        """Canned reply when Gemini is unavailable"""
+        fallback_responses = {
+            'english': "I understand your concern. For the best guidance on your health, I recommend consulting with a healthcare professional who can provide personalized advice.",
+            'hindi': "मैं आपकी चिंता समझता हूं। आपके स्वास्थ्य के लिए सबसे अच्छा मार्गदर्शन पाने के लिए, मैं किसी स्वास्थ्य विशेषज्ञ से सलाह लेने की सिफारिश करता हूं।",
+            'tamil': "உங்கள் கவலையை நான் புரிந்துகொள்கிறேன். உங்கள் ஆரோக்கியத்திற்கான சிறந்த வழிகாட்டுதலுக்கு, தனிப்பட்ட ஆலோசனை வழங்கக்கூடிய சுகாதார நிபுணரை அணுகுமாறு பரிந்துரைக்கிறேன்."
+        }
+        
+        return fallback_responses.get(language, fallback_responses['english'])
 
-    def translate_response(self, text: str, target_language: str) -> str:
+    def translate_response(self, text: str, target_language: str, timeout: float = None) -> str:
         """Translate response to target language"""
+        return self.translate_batch([text], target_language, timeout)[0]
+
+    def translate_batch(self, texts: List[str], target_language: str, timeout: float = None,
+                        remembered_only: bool = False) -> List[str]:
+        """Translations of several strings, in order, from memory or one Gemini call per batch.
         
-        if target_language == 'english':
-            return text
+        Strings not in the translation memory are sent together, at most
+        TRANSLATION_BATCH_SIZE per call, and Gemini answers with a JSON list.
+        With `remembered_only` nothing is sent. A string that could not be
+        translated comes back unchanged and is not remembered.
+        """
+        if target_language == 'english' or not texts:
+            return list(texts)
+        if target_language not in TRANSLATION_LANGUAGES:
+            target_language = 'hindi'
         
-        language_names = {
-            'hindi': 'Hindi',
-            'tamil': 'Tamil',
-            'telugu': 'Telugu',
-            'bengali': 'Bengali'
-        }
+        translations = {}
+        misses = []
+        for text in dict.fromkeys(texts):
+            remembered = self.translation_memory.get((target_language, text)) if text.strip() else text
+            if remembered is not None:
+                translations[text] = remembered
+            else:
+                misses.append(text)
         
-        target_lang_name = language_names.get(target_language, 'Hindi')
+        if not remembered_only:
+            batch_size = max(1, self.config.TRANSLATION_BATCH_SIZE)
+            for offset in range(0, len(misses), batch_size):
+                batch = misses[offset:offset + batch_size]
+                for text, translated in zip(batch, self._translate_misses(batch, target_language, timeout)):
+                    if translated:
+                        translations[text] = translated
+                        self.translation_memory.set((target_language, text), translated)
         
-        prompt = f"""Translate the following English text to {target_lang_name}. 
+        return [translations.get(text, text) for text in texts]
+
+    def _translate_misses(self, texts: List[str], target_language: str, timeout: float = None) -> List[str]:
+        """One Gemini call for a batch of strings; an empty list when the answer is unusable"""
+        prompt = f"""Translate each English string in the JSON array below to {TRANSLATION_LANGUAGES[target_language]}.
 Maintain the medical context and be culturally appropriate for Indian users.
+Keep emojis, numbers and phone numbers unchanged.
 
-Text to translate: "{text}"
+Strings: {json.dumps(texts, ensure_ascii=False)}
 
-Provide only the translation, no explanations."""
+Respond with only a JSON object of the form {{"translations": [...]}} holding one translation per string, in the same order."""
 
+        with self._stats_lock:
+            self.translation_counts['batches'] += 1
         try:
-            response = self.model.generate_content(prompt)
-            return response.text.strip()
+            response = self.llm.generate(prompt, caller='translation', timeout=timeout)
+            response_text = response.text.strip()
+            
+            # Extract JSON from response
+            if '```json' in response_text:
+                response_text = response_text.split('```json')[1].split('```')[0]
+            elif '```' in response_text:
+                response_text = response_text.split('```')[1].split('```')[0]
+            
+            translations = json.loads(response_text)['translations']
+            if not isinstance(translations, list) or len(translations) != len(texts):
+                raise ValueError(f"Expected {len(texts)} translations, got {len(translations)}")
+            translations = [str(translated).strip() for translated in translations]
         except Exception as e:
             self.logger.error(f"Translation error: {e}")
-            return text  # Return original if translation fails
\ No newline at end of file
+            with self._stats_lock:
+                self.translation_counts['batches_failed'] += 1
+            return []  # Keep the originals if translation fails
+        
+        with self._stats_lock:
+            self.translation_counts['strings_translated'] += len(translations)
+        return translations
+
+    def get_stats(self) -> Dict:
+        """Response cache and translation memory statistics"""
+        with self._stats_lock:
+            translations = dict(self.translation_counts)
+        return {
+            'guidance_cache': self.guidance_cache.get_stats() if self.guidance_cache is not None else None,
+            'translation_memory': self.translation_memory.get_stats(),
+            'translations': translations
+        }
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-translate reply templates into the translation memory")
+    parser.add_argument('--languages', nargs='+', choices=sorted(TRANSLATION_LANGUAGES),
+                        default=[language for language in SUPPORTED_LANGUAGES if language != 'english'])
+    args = parser.parse_args()
+
+    from models.adaptive_questioner import load_adaptive_questioner, question_text
+    from models.inference_backends import load_backend
+    from models.label_metadata import load_label_metadata
+
+    config = Config()
+    templates = load_label_metadata(load_backend(config).labels, config).template_strings()
+    questioner = load_adaptive_questioner(config)
+    if questioner is not None:
+        templates.extend(question_text(symptom) for symptom in questioner.symptoms)
+
+    handler = GeminiHandler()
+    for language in args.languages:
+        translated = handler.translate_batch(templates, language)
+        done = sum(translation != text for translation, text in zip(translated, templates))
+        print(f"{language}: {done}/{len(templates)} templates translated")
+    print(json.dumps(handler.get_stats()['translations']))
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    main()
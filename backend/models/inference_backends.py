@@ -0,0 +1,292 @@
+import argparse
+import json
+import logging
+import os
+import time
+from typing import Dict, List
+
+import numpy as np
+
+from config.settings import Config
+from utils.helpers import get_process_memory_mb
+
+# Symptom strings used for the ONNX parity check and latency comparison
+PARITY_SAMPLES = [
+    "fever, headache, body ache",
+    "cough, cold, sore throat",
+    "chest pain, breathlessness, sweating",
+    "stomach pain, vomiting, diarrhea",
+    "itching, skin rash, red spots",
+    "joint pain, swelling, stiffness",
+    "high fever, chills, sweating, nausea",
+    "frequent urination, increased thirst, fatigue",
+    "burning urination, lower abdominal pain",
+    "headache, sensitivity to light, nausea",
+    "yellow eyes, dark urine, loss of appetite",
+    "runny nose, sneezing, watery eyes",
+    "back pain, neck pain, dizziness",
+    "acidity, chest burning, sour taste",
+    "blisters, fever, itchy rash on face",
+    "wheezing, shortness of breath, cough at night"
+]
+
+def softmax(logits: np.ndarray) -> np.ndarray:
+    """Row-wise softmax over a (batch, labels) logits matrix"""
+    shifted = logits - logits.max(axis=-1, keepdims=True)
+    exp = np.exp(shifted)
+    return exp / exp.sum(axis=-1, keepdims=True)
+
+def rank_top_k(probabilities: np.ndarray, k: int, cumulative_cutoff: float = 1.0):
+    """Top-k label indices and probabilities per row, best first.
+    
+    Uses a partial sort (argpartition) over the whole batch, then drops
+    candidates after the cumulative probability first reaches the cutoff.
+    Returns one list of (index, probability) pairs per row.
+    """
+    k = max(1, min(k, probabilities.shape[1]))
+    
+    candidates = np.argpartition(-probabilities, k - 1, axis=1)[:, :k]
+    candidate_scores = np.take_along_axis(probabilities, candidates, axis=1)
+    order = np.argsort(-candidate_scores, axis=1)
+    indices = np.take_along_axis(candidates, order, axis=1)
+    scores = np.take_along_axis(candidate_scores, order, axis=1)
+    
+    # Keep a candidate while the mass before it is still below the cutoff
+    mass_before = np.cumsum(scores, axis=1) - scores
+    keep = mass_before < cumulative_cutoff
+    keep[:, 0] = True
+    
+    return [
+        [(int(index), float(score)) for index, score in zip(row_indices[row_keep], row_scores[row_keep])]
+        for row_indices, row_scores, row_keep in zip(indices, scores, keep)
+    ]
+
+class TransformersBackend:
+    """fp32 PyTorch inference through Hugging Face transformers"""
+    
+    name = 'pytorch'
+
+    def __init__(self, model_name: str, cache_dir: str = None):
+        import torch
+        from transformers import AutoTokenizer, AutoModelForSequenceClassification
+        
+        self.torch = torch
+        self.tokenizer = AutoTokenizer.from_pretrained(model_name, cache_dir=cache_dir)
+        self.model = AutoModelForSequenceClassification.from_pretrained(model_name, cache_dir=cache_dir)
+        self.model.eval()
+        
+        id2label = self.model.config.id2label
+        self.labels = [id2label[i] for i in range(len(id2label))]
+
+    def logits(self, texts: List[str]) -> np.ndarray:
+        """Raw classifier logits for a padded batch of texts"""
+        inputs = self.tokenizer(texts, padding=True, truncation=True, return_tensors='pt')
+        with self.torch.no_grad():
+            outputs = self.model(**inputs)
+        return outputs.logits.float().numpy()
+
+class OnnxBackend:
+    """int8 dynamically quantized ONNX Runtime inference"""
+    
+    name = 'onnx'
+    MODEL_FILE = 'model.int8.onnx'
+
+    def __init__(self, model_dir: str, num_threads: int = 0):
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+        
+        self.tokenizer = AutoTokenizer.from_pretrained(model_dir)
+        
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+        
+        self.session = ort.InferenceSession(
+            os.path.join(model_dir, self.MODEL_FILE),
+            sess_options=options,
+            providers=['CPUExecutionProvider']
+        )
+        self.input_names = [model_input.name for model_input in self.session.get_inputs()]
+        
+        with open(os.path.join(model_dir, 'labels.json')) as labels_file:
+            self.labels = json.load(labels_file)
+
+    def logits(self, texts: List[str]) -> np.ndarray:
+        """Raw classifier logits for a padded batch of texts"""
+        inputs = self.tokenizer(texts, padding=True, truncation=True, return_tensors='np')
+        feed = {name: inputs[name].astype(np.int64) for name in self.input_names}
+        return self.session.run(None, feed)[0]
+
+def export_onnx(model_name: str, output_dir: str, cache_dir: str = None) -> str:
+    """Export the classifier to ONNX and apply dynamic int8 quantization"""
+    import torch
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+    from transformers import AutoTokenizer, AutoModelForSequenceClassification
+    
+    logger = logging.getLogger(__name__)
+    os.makedirs(output_dir, exist_ok=True)
+    
+    tokenizer = AutoTokenizer.from_pretrained(model_name, cache_dir=cache_dir)
+    model = AutoModelForSequenceClassification.from_pretrained(model_name, cache_dir=cache_dir)
+    model.eval()
+    
+    sample = tokenizer(PARITY_SAMPLES[:2], padding=True, return_tensors='pt')
+    input_names = [name for name in ('input_ids', 'attention_mask', 'token_type_ids') if name in sample]
+    dynamic_axes = {name: {0: 'batch', 1: 'sequence'} for name in input_names}
+    dynamic_axes['logits'] = {0: 'batch'}
+    
+    fp32_path = os.path.join(output_dir, 'model.onnx')
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            tuple(sample[name] for name in input_names),
+            fp32_path,
+            input_names=input_names,
+            output_names=['logits'],
+            dynamic_axes=dynamic_axes,
+            opset_version=14,
+            dynamo=False
+        )
+    
+    int8_path = os.path.join(output_dir, OnnxBackend.MODEL_FILE)
+    quantize_dynamic(fp32_path, int8_path, weight_type=QuantType.QInt8)
+    
+    tokenizer.save_pretrained(output_dir)
+    id2label = model.config.id2label
+    with open(os.path.join(output_dir, 'labels.json'), 'w') as labels_file:
+        json.dump([id2label[i] for i in range(len(id2label))], labels_file)
+    
+    logger.info(f"Exported quantized ONNX classifier to {int8_path}")
+    return int8_path
+
+def load_backend(config: Config = None):
+    """Build the inference backend selected by INFERENCE_BACKEND"""
+    config = config or Config()
+    backend = config.INFERENCE_BACKEND.lower()
+    
+    if backend == 'onnx':
+        model_path = os.path.join(config.ONNX_MODEL_DIR, OnnxBackend.MODEL_FILE)
+        if not os.path.exists(model_path):
+            logging.getLogger(__name__).info(f"No ONNX model at {model_path}, exporting")
+            export_onnx(config.SYMPTOM_MODEL_NAME, config.ONNX_MODEL_DIR, config.HUGGINGFACE_CACHE_DIR)
+        return OnnxBackend(config.ONNX_MODEL_DIR, config.ONNX_NUM_THREADS)
+    
+    if backend == 'pytorch':
+        return TransformersBackend(config.SYMPTOM_MODEL_NAME, config.HUGGINGFACE_CACHE_DIR)
+    
+    if backend == 'remote':
+        from models.inference_server import RemoteBackend
+        return RemoteBackend(
+            config.INFERENCE_SERVER_SOCKET,
+            timeout=config.INFERENCE_SERVER_TIMEOUT,
+            connect_timeout=config.INFERENCE_SERVER_CONNECT_TIMEOUT
+        )
+    
+    raise ValueError(f"Unknown inference backend: {config.INFERENCE_BACKEND}")
+
+def _benchmark_backend(backend_name: str, texts: List[str], batch_size: int, repeats: int) -> Dict:
+    """Load one backend in a fresh process and measure memory, latency and outputs"""
+    config = Config()
+    config.INFERENCE_BACKEND = backend_name
+    
+    rss_before = get_process_memory_mb()
+    started = time.perf_counter()
+    backend = load_backend(config)
+    load_seconds = time.perf_counter() - started
+    rss_loaded = get_process_memory_mb()
+    
+    # Warm up once before timing
+    backend.logits(texts[:batch_size])
+    
+    latencies = []
+    outputs = []
+    for _ in range(repeats):
+        outputs = []
+        for start in range(0, len(texts), batch_size):
+            batch_started = time.perf_counter()
+            outputs.append(softmax(backend.logits(texts[start:start + batch_size])))
+            latencies.append((time.perf_counter() - batch_started) * 1000)
+    probabilities = np.concatenate(outputs)
+    
+    return {
+        'backend': backend_name,
+        'labels': backend.labels,
+        'probabilities': probabilities.tolist(),
+        'load_seconds': round(load_seconds, 2),
+        'model_rss_mb': round(rss_loaded - rss_before, 1),
+        'process_rss_mb': round(get_process_memory_mb(), 1),
+        'latency_ms_p50': round(float(np.percentile(latencies, 50)), 2),
+        'latency_ms_p95': round(float(np.percentile(latencies, 95)), 2)
+    }
+
+def compare_backends(texts: List[str] = None, batch_size: int = 8, repeats: int = 5) -> Dict:
+    """Parity and side-by-side latency/RSS comparison of the PyTorch and ONNX backends"""
+    from concurrent.futures import ProcessPoolExecutor
+    import multiprocessing
+    
+    texts = texts or PARITY_SAMPLES
+    results = {}
+    
+    # Each backend runs in its own process so RSS is not shared between them
+    context = multiprocessing.get_context('spawn')
+    for backend_name in ('pytorch', 'onnx'):
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+            results[backend_name] = executor.submit(
+                _benchmark_backend, backend_name, texts, batch_size, repeats
+            ).result()
+    
+    reference = np.array(results['pytorch']['probabilities'])
+    candidate = np.array(results['onnx']['probabilities'])
+    
+    if results['pytorch']['labels'] != results['onnx']['labels']:
+        raise ValueError("PyTorch and ONNX label sets differ")
+    
+    drift = np.abs(reference - candidate)
+    top1_reference = reference.argmax(axis=1)
+    top1_candidate = candidate.argmax(axis=1)
+    rows = np.arange(len(texts))
+    
+    report = {
+        'samples': len(texts),
+        'top1_agreement': round(float((top1_reference == top1_candidate).mean()), 4),
+        'top1_score_drift_max': round(float(drift[rows, top1_reference].max()), 6),
+        'score_drift_mean': round(float(drift.mean()), 6),
+        'score_drift_max': round(float(drift.max()), 6)
+    }
+    
+    for backend_name, result in results.items():
+        report[backend_name] = {
+            key: value for key, value in result.items()
+            if key not in ('labels', 'probabilities')
+        }
+    
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description="Disease classifier inference backends")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    
+    subparsers.add_parser('export', help="Export and quantize the classifier to ONNX")
+    
+    compare_parser = subparsers.add_parser('compare', help="Parity and latency/RSS check against PyTorch")
+    compare_parser.add_argument('--samples', help="Text file with one symptom string per line")
+    compare_parser.add_argument('--batch-size', type=int, default=8)
+    compare_parser.add_argument('--repeats', type=int, default=5)
+    
+    args = parser.parse_args()
+    config = Config()
+    
+    if args.command == 'export':
+        path = export_onnx(config.SYMPTOM_MODEL_NAME, config.ONNX_MODEL_DIR, config.HUGGINGFACE_CACHE_DIR)
+        print(f"Quantized model written to {path}")
+    else:
+        texts = None
+        if args.samples:
+            with open(args.samples) as samples_file:
+                texts = [line.strip() for line in samples_file if line.strip()]
+        print(json.dumps(compare_backends(texts, args.batch_size, args.repeats), indent=2))
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    main()
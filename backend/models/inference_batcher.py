@@ -0,0 +1,150 @@
+import os
+import queue
+import threading
+import time
+import logging
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List
+
+from utils.metrics import RollingStats
+
+class _PendingRequest:
+    __slots__ = ('payload', 'future', 'enqueued_at')
+
+    def __init__(self, payload: Any):
+        self.payload = payload
+        self.future = Future()
+        self.enqueued_at = time.perf_counter()
+
+class InferenceBatcher:
+    """Collects concurrent inference requests and runs them as one batch.
+
+    Callers block on `predict`, while a background worker drains the queue
+    into batches of at most `max_batch_size` items, waiting no longer than
+    `max_wait_ms` after the first request of a batch arrives.
+    """
+
+    def __init__(self, batch_fn: Callable[[List[Any]], List[Any]],
+                 max_batch_size: int = 16, max_wait_ms: float = 5.0,
+                 name: str = 'inference'):
+        self.logger = logging.getLogger(__name__)
+        self.batch_fn = batch_fn
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self.name = name
+        
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._worker = None
+        self._worker_pid = None
+        self._stopped = False
+        
+        # Tuning statistics
+        self.batch_sizes = RollingStats()
+        self.queue_wait_ms = RollingStats()
+        self.batch_latency_ms = RollingStats()
+        self.failed_batches = 0
+
+    def predict(self, payload: Any, timeout: float = None) -> Any:
+        """Submit a single item and wait for its result"""
+        return self.submit(payload).result(timeout=timeout)
+
+    def submit(self, payload: Any) -> Future:
+        """Queue a single item and return a future for its result"""
+        if self._stopped:
+            raise RuntimeError(f"{self.name} batcher has been shut down")
+        
+        self._ensure_worker()
+        request = _PendingRequest(payload)
+        self._queue.put(request)
+        return request.future
+
+    def _ensure_worker(self):
+        """Start the worker thread lazily, and again after a fork"""
+        pid = os.getpid()
+        if self._worker is not None and self._worker_pid == pid and self._worker.is_alive():
+            return
+        
+        with self._lock:
+            if self._worker is not None and self._worker_pid == pid and self._worker.is_alive():
+                return
+            
+            if self._worker_pid != pid:
+                # Threads do not survive fork, so anything queued in the parent is gone
+                self._queue = queue.Queue()
+            
+            self._worker = threading.Thread(
+                target=self._run, name=f"{self.name}-batcher", daemon=True
+            )
+            self._worker_pid = pid
+            self._worker.start()
+
+    def _collect_batch(self) -> List[_PendingRequest]:
+        """Block for the first request, then gather more until full or timed out"""
+        first = self._queue.get()
+        if first is None:
+            return []
+        
+        batch = [first]
+        deadline = first.enqueued_at + self.max_wait
+        
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                request = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            
+            if request is None:
+                self._stopped = True
+                break
+            batch.append(request)
+        
+        return batch
+
+    def _run(self):
+        while not self._stopped:
+            batch = self._collect_batch()
+            if not batch:
+                break
+            
+            started = time.perf_counter()
+            for request in batch:
+                self.queue_wait_ms.record((started - request.enqueued_at) * 1000)
+            self.batch_sizes.record(len(batch))
+            
+            try:
+                results = self.batch_fn([request.payload for request in batch])
+                if len(results) != len(batch):
+                    raise RuntimeError(
+                        f"Batch function returned {len(results)} results for {len(batch)} inputs"
+                    )
+            except Exception as e:
+                self.failed_batches += 1
+                self.logger.error(f"Error running {self.name} batch of {len(batch)}: {e}")
+                for request in batch:
+                    request.future.set_exception(e)
+                continue
+            finally:
+                self.batch_latency_ms.record((time.perf_counter() - started) * 1000)
+            
+            for request, result in zip(batch, results):
+                request.future.set_result(result)
+
+    def get_stats(self) -> Dict:
+        """Batch-size and queue-wait statistics for tuning"""
+        return {
+            'name': self.name,
+            'max_batch_size': self.max_batch_size,
+            'max_wait_ms': self.max_wait * 1000,
+            'queue_depth': self._queue.qsize(),
+            'batch_size': self.batch_sizes.summary(),
+            'queue_wait_ms': self.queue_wait_ms.summary(),
+            'batch_latency_ms': self.batch_latency_ms.summary(),
+            'failed_batches': self.failed_batches
+        }
+
+    def shutdown(self):
+        """Stop the worker after the current batch"""
+        self._stopped = True
+        self._queue.put(None)
@@ -0,0 +1,409 @@
+import argparse
+import json
+import logging
+import os
+import signal
+import socket
+import socketserver
+import struct
+import threading
+import time
+from multiprocessing import resource_tracker, shared_memory
+from typing import Dict, List
+
+import numpy as np
+
+from config.settings import Config
+from models.inference_backends import load_backend
+from models.inference_batcher import InferenceBatcher
+from utils.metrics import RollingStats
+
+# Socket messages are a 4-byte length followed by a small JSON header; arrays
+# the header refers to are written to shared memory instead of the socket
+_LENGTH = struct.Struct('!I')
+
+def send_message(sock: socket.socket, header: Dict):
+    """Write one length-prefixed JSON header"""
+    body = json.dumps(header).encode('utf-8')
+    sock.sendall(_LENGTH.pack(len(body)) + body)
+
+def _recv_exact(sock: socket.socket, size: int) -> bytes:
+    chunks = []
+    while size:
+        chunk = sock.recv(size)
+        if not chunk:
+            raise ConnectionError("Inference socket closed")
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b''.join(chunks)
+
+def recv_message(sock: socket.socket) -> Dict:
+    """Read one length-prefixed JSON header"""
+    size, = _LENGTH.unpack(_recv_exact(sock, _LENGTH.size))
+    return json.loads(_recv_exact(sock, size))
+
+def encode_texts(texts: List[str]) -> np.ndarray:
+    return np.frombuffer(json.dumps(texts).encode('utf-8'), dtype=np.uint8)
+
+def decode_texts(array: np.ndarray) -> List[str]:
+    return json.loads(array.tobytes().decode('utf-8'))
+
+class SharedBuffer:
+    """Growable shared-memory segment owned by one side of a connection.
+
+    The owner writes an array and sends its descriptor over the socket. The
+    peer copies the array out before replying, so the same segment is reused
+    for every message on the connection and only reallocated to grow.
+    """
+
+    MIN_SIZE = 64 * 1024
+
+    def __init__(self):
+        self._segment = None
+
+    def write(self, array: np.ndarray) -> Dict:
+        """Copy an array into the segment and return its descriptor"""
+        array = np.ascontiguousarray(array)
+
+        if self._segment is None or self._segment.size < array.nbytes:
+            self.close()
+            size = max(self.MIN_SIZE, 1 << (array.nbytes - 1).bit_length())
+            self._segment = shared_memory.SharedMemory(create=True, size=size)
+
+        view = np.ndarray(array.shape, dtype=array.dtype, buffer=self._segment.buf)
+        view[...] = array
+        del view
+
+        return {'name': self._segment.name, 'shape': list(array.shape), 'dtype': array.dtype.str}
+
+    def close(self):
+        """Release and unlink the segment"""
+        if self._segment is None:
+            return
+
+        self._segment.close()
+        try:
+            self._segment.unlink()
+        except FileNotFoundError:
+            pass
+        self._segment = None
+
+class SharedBufferReader:
+    """Peer-side attachment to the segment another process writes into"""
+
+    def __init__(self):
+        self._segment = None
+
+    def read(self, descriptor: Dict) -> np.ndarray:
+        """Copy the array a descriptor points at out of shared memory"""
+        if self._segment is None or self._segment.name != descriptor['name']:
+            self.close()
+            self._segment = shared_memory.SharedMemory(name=descriptor['name'])
+            # Attaching registers the segment with this process's resource
+            # tracker as if we had created it; the owner is the one to unlink it
+            resource_tracker.unregister(self._segment._name, 'shared_memory')
+
+        view = np.ndarray(descriptor['shape'], dtype=np.dtype(descriptor['dtype']), buffer=self._segment.buf)
+        array = view.copy()
+        del view
+        return array
+
+    def close(self):
+        if self._segment is not None:
+            self._segment.close()
+            self._segment = None
+
+class _ConnectionHandler(socketserver.BaseRequestHandler):
+
+    def handle(self):
+        self.server.inference_server.serve_connection(self.request)
+
+class _UnixServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, socket_path: str, inference_server: "InferenceServer"):
+        self.inference_server = inference_server
+        super().__init__(socket_path, _ConnectionHandler)
+
+class InferenceServer:
+    """Hosts the disease classifier for web workers on a Unix domain socket.
+
+    Texts from every connection go through one InferenceBatcher, so
+    concurrent web workers share forward passes. Texts and logits travel
+    through shared memory; the socket only carries small JSON headers.
+    """
+
+    def __init__(self, backend, socket_path: str, max_batch_size: int = 16, max_wait_ms: float = 5.0,
+                 request_timeout: float = 10.0):
+        self.logger = logging.getLogger(__name__)
+        self.backend = backend
+        self.socket_path = socket_path
+        self.request_timeout = request_timeout
+        self.batcher = InferenceBatcher(
+            self._logits_batch,
+            max_batch_size=max_batch_size,
+            max_wait_ms=max_wait_ms,
+            name='inference-server'
+        )
+
+        self._server = None
+        self._lock = threading.Lock()
+        self.active_connections = 0
+        self.requests = 0
+        self.request_latency_ms = RollingStats()
+
+    def _logits_batch(self, texts: List[str]) -> List[np.ndarray]:
+        return list(self.backend.logits(texts))
+
+    def bind(self):
+        """Listen on the socket path, replacing a stale socket file"""
+        if self._server is not None:
+            return
+
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        os.makedirs(os.path.dirname(self.socket_path) or '.', exist_ok=True)
+
+        self._server = _UnixServer(self.socket_path, self)
+        self.logger.info(f"Inference server ({self.backend.name}) listening on {self.socket_path}")
+
+    def serve_forever(self):
+        """Serve until `shutdown` is called"""
+        self.bind()
+        try:
+            self._server.serve_forever()
+        finally:
+            self._server.server_close()
+            self.batcher.shutdown()
+            if os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
+
+    def shutdown(self):
+        """Stop `serve_forever` from another thread"""
+        if self._server is not None:
+            self._server.shutdown()
+
+    def serve_connection(self, sock: socket.socket):
+        """Answer requests from one client until it disconnects"""
+        requests = SharedBufferReader()
+        responses = SharedBuffer()
+        with self._lock:
+            self.active_connections += 1
+
+        try:
+            while True:
+                try:
+                    message = recv_message(sock)
+                except ConnectionError:
+                    break
+
+                try:
+                    reply = self._handle(message, requests, responses)
+                except Exception as e:
+                    self.logger.error(f"Error handling {message.get('op')} request: {e}")
+                    reply = {'error': str(e) or type(e).__name__}
+
+                try:
+                    send_message(sock, reply)
+                except OSError:
+                    # The client timed out or went away while we were working
+                    break
+        finally:
+            requests.close()
+            responses.close()
+            with self._lock:
+                self.active_connections -= 1
+
+    def _handle(self, message: Dict, requests: SharedBufferReader, responses: SharedBuffer) -> Dict:
+        op = message.get('op')
+
+        if op == 'hello':
+            return {'name': self.backend.name, 'labels': self.backend.labels, 'pid': os.getpid()}
+
+        if op == 'logits':
+            started = time.perf_counter()
+            texts = decode_texts(requests.read(message['payload']))
+
+            futures = [self.batcher.submit(text) for text in texts]
+            if futures:
+                # Clients stop waiting after their own timeout, so don't outlive it
+                deadline = time.monotonic() + self.request_timeout
+                logits = np.stack([
+                    future.result(timeout=max(0.0, deadline - time.monotonic())) for future in futures
+                ]).astype(np.float32)
+            else:
+                logits = np.zeros((0, len(self.backend.labels)), dtype=np.float32)
+
+            with self._lock:
+                self.requests += 1
+            self.request_latency_ms.record((time.perf_counter() - started) * 1000)
+            return {'payload': responses.write(logits)}
+
+        if op == 'stats':
+            return self.get_stats()
+
+        raise ValueError(f"Unknown inference server op: {op}")
+
+    def get_stats(self) -> Dict:
+        """Connection, latency and batching statistics"""
+        return {
+            'backend': self.backend.name,
+            'socket': self.socket_path,
+            'pid': os.getpid(),
+            'active_connections': self.active_connections,
+            'requests': self.requests,
+            'request_latency_ms': self.request_latency_ms.summary(),
+            'batcher': self.batcher.get_stats()
+        }
+
+class _Connection:
+    """One socket to the server plus the shared-memory segments used on it"""
+
+    def __init__(self, sock: socket.socket):
+        self.sock = sock
+        self.requests = SharedBuffer()
+        self.responses = SharedBufferReader()
+
+    def close(self):
+        self.sock.close()
+        self.requests.close()
+        self.responses.close()
+
+class RemoteBackend:
+    """Client for an InferenceServer, usable anywhere a local backend is.
+
+    Holds no model weights, so a web worker using it starts in milliseconds.
+    Each call borrows a connection from a per-process pool, so request
+    threads don't queue behind each other, and connections opened before a
+    fork are never reused by the children.
+    """
+
+    def __init__(self, socket_path: str, timeout: float = 10.0, connect_timeout: float = 0.0):
+        self.logger = logging.getLogger(__name__)
+        self.socket_path = socket_path
+        self.timeout = timeout
+
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+        self._idle: List[_Connection] = []
+        self.round_trip_ms = RollingStats()
+
+        # Wait for a server that is still loading its weights
+        hello = self._call({'op': 'hello'}, connect_timeout=connect_timeout)
+        self.server_backend = hello['name']
+        self.name = f"remote:{hello['name']}"
+        self.labels = hello['labels']
+
+    def logits(self, texts: List[str]) -> np.ndarray:
+        """Raw classifier logits computed by the server"""
+        started = time.perf_counter()
+        reply = self._call({'op': 'logits'}, encode_texts(texts))
+        self.round_trip_ms.record((time.perf_counter() - started) * 1000)
+        return reply['payload']
+
+    def _connect(self, connect_timeout: float) -> socket.socket:
+        deadline = time.monotonic() + connect_timeout
+        while True:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            try:
+                sock.connect(self.socket_path)
+                return sock
+            except (FileNotFoundError, ConnectionRefusedError):
+                sock.close()
+                if time.monotonic() >= deadline:
+                    raise
+                time.sleep(0.1)
+
+    def _acquire(self, connect_timeout: float) -> _Connection:
+        with self._lock:
+            pid = os.getpid()
+            if self._pid != pid:
+                # Connections inherited through fork belong to the parent
+                self._idle = []
+                self._pid = pid
+            if self._idle:
+                return self._idle.pop()
+
+        return _Connection(self._connect(connect_timeout))
+
+    def _release(self, connection: _Connection):
+        with self._lock:
+            if self._pid == os.getpid():
+                self._idle.append(connection)
+                return
+        connection.close()
+
+    def _call(self, message: Dict, payload: np.ndarray = None, connect_timeout: float = 0.0) -> Dict:
+        connection = self._acquire(connect_timeout)
+        try:
+            if payload is not None:
+                message = dict(message, payload=connection.requests.write(payload))
+            send_message(connection.sock, message)
+            reply = recv_message(connection.sock)
+            if 'payload' in reply:
+                reply['payload'] = connection.responses.read(reply['payload'])
+        except Exception:
+            # The connection may be mid-message; later calls open a fresh one
+            connection.close()
+            raise
+
+        self._release(connection)
+        if 'error' in reply:
+            raise RuntimeError(f"Inference server error: {reply['error']}")
+        return reply
+
+    def get_stats(self) -> Dict:
+        """Round-trip latency seen by this process and the server's own statistics"""
+        try:
+            server = self._call({'op': 'stats'})
+        except Exception as e:
+            server = {'error': str(e)}
+
+        return {
+            'socket': self.socket_path,
+            'idle_connections': len(self._idle),
+            'round_trip_ms': self.round_trip_ms.summary(),
+            'server': server
+        }
+
+    def close(self):
+        """Close this process's pooled connections"""
+        with self._lock:
+            idle, self._idle = self._idle, []
+            if self._pid != os.getpid():
+                return
+        for connection in idle:
+            connection.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Out-of-process disease classifier server")
+    parser.add_argument('--socket', help="Unix socket path (default INFERENCE_SERVER_SOCKET)")
+    parser.add_argument('--backend', help="pytorch or onnx (default INFERENCE_SERVER_BACKEND)")
+
+    args = parser.parse_args()
+    config = Config()
+
+    config.INFERENCE_BACKEND = args.backend or config.INFERENCE_SERVER_BACKEND
+    if config.INFERENCE_BACKEND.lower() == 'remote':
+        raise ValueError("The inference server needs a local backend (pytorch or onnx)")
+
+    server = InferenceServer(
+        load_backend(config),
+        args.socket or config.INFERENCE_SERVER_SOCKET,
+        max_batch_size=config.INFERENCE_MAX_BATCH_SIZE,
+        max_wait_ms=config.INFERENCE_MAX_WAIT_MS,
+        request_timeout=config.INFERENCE_SERVER_TIMEOUT
+    )
+
+    # shutdown() blocks until serve_forever returns, so it can't run in the handler itself
+    signal.signal(signal.SIGTERM, lambda *_: threading.Thread(target=server.shutdown).start())
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    main()
@@ -0,0 +1,219 @@
+import argparse
+import json
+import logging
+import os
+from typing import Dict, List
+
+from config.settings import Config
+from utils.constants import DISEASE_CATEGORIES
+from utils.helpers import calculate_severity_score
+
+# High severity conditions - require immediate medical attention
+HIGH_SEVERITY_CONDITIONS = (
+    "heart attack", "stroke", "appendicitis", "heart failure",
+    "pneumonia", "meningitis", "sepsis", "pulmonary embolism",
+    "diabetic ketoacidosis", "severe allergic reaction",
+    "acute coronary syndrome", "anaphylaxis"
+)
+
+# Medium severity conditions - need medical consultation soon
+MEDIUM_SEVERITY_CONDITIONS = (
+    "diabetes", "hypertension", "asthma", "bronchitis",
+    "urinary tract infection", "gastritis", "migraine",
+    "depression", "anxiety", "arthritis", "osteoporosis"
+)
+
+# Low severity conditions - can be managed with care
+LOW_SEVERITY_CONDITIONS = (
+    "common cold", "flu", "headache", "muscle strain",
+    "minor cuts", "mild fever", "fatigue", "indigestion",
+    "seasonal allergies", "minor skin irritation"
+)
+
+SEVERITY_RECOMMENDATIONS = {
+    "high": (
+        "🚨 Seek immediate medical attention",
+        "🏥 Go to the nearest emergency room",
+        "📞 Call emergency services if symptoms worsen",
+        "🚫 Do not delay medical treatment"
+    ),
+    "medium": (
+        "👨‍⚕️ Schedule an appointment with a doctor",
+        "📋 Monitor your symptoms closely",
+        "💊 Follow prescribed medications if any",
+        "🏥 Visit a clinic within 24-48 hours"
+    ),
+    "low": (
+        "🏠 Rest and take care of yourself",
+        "💧 Stay hydrated",
+        "🌡️ Monitor your temperature",
+        "👨‍⚕️ Consult a doctor if symptoms persist"
+    )
+}
+
+# Disease-specific recommendations, by a word in the label
+KEYWORD_RECOMMENDATIONS = (
+    ("fever", "🌡️ Take temperature-reducing medication if needed"),
+    ("cough", "🍯 Try warm liquids and honey"),
+    ("pain", "💊 Consider over-the-counter pain relief"),
+    ("infection", "🧼 Maintain good hygiene")
+)
+
+BASE_FOLLOW_UP_QUESTIONS = (
+    "How long have you been experiencing these symptoms?",
+    "Have you taken any medication for this?",
+    "Do you have any other symptoms not mentioned?",
+    "Any family history of similar conditions?"
+)
+
+# Disease-specific questions, by a word in the label
+KEYWORD_FOLLOW_UP_QUESTIONS = (
+    ("diabetes", ("Do you check your blood sugar regularly?", "Have you noticed increased thirst or urination?")),
+    ("heart", ("Do you experience chest pain during physical activity?", "Any shortness of breath?")),
+    ("infection", ("Do you have a fever?", "Any recent travel or exposure to illness?"))
+)
+
+SEVERITIES = ("low", "medium", "high")
+
+# Fields every entry carries; an override file may replace any of them per label
+FIELDS = ("severity", "recommendations", "follow_up_questions", "category", "risk_score")
+
+def rule_severity(disease: str) -> str:
+    """Severity from the condition lists, defaulting to medium for unknown diseases"""
+    disease_lower = disease.lower()
+    for severity, conditions in (("high", HIGH_SEVERITY_CONDITIONS), ("medium", MEDIUM_SEVERITY_CONDITIONS),
+                                 ("low", LOW_SEVERITY_CONDITIONS)):
+        if any(condition in disease_lower for condition in conditions):
+            return severity
+    return "medium"
+
+def rule_recommendations(disease: str, severity: str) -> List[str]:
+    """Severity advice followed by disease-specific advice"""
+    disease_lower = disease.lower()
+    recommendations = list(SEVERITY_RECOMMENDATIONS.get(severity, SEVERITY_RECOMMENDATIONS["low"]))
+    recommendations.extend(advice for keyword, advice in KEYWORD_RECOMMENDATIONS if keyword in disease_lower)
+    return recommendations
+
+def rule_follow_up_questions(disease: str) -> List[str]:
+    """Top four follow-up questions for a disease"""
+    disease_lower = disease.lower()
+    questions = list(BASE_FOLLOW_UP_QUESTIONS)
+    for keyword, extra in KEYWORD_FOLLOW_UP_QUESTIONS:
+        if keyword in disease_lower:
+            questions.extend(extra)
+    return questions[:4]
+
+def rule_category(disease: str) -> str:
+    """First DISEASE_CATEGORIES category naming the disease, or 'general'"""
+    disease_lower = disease.lower()
+    for category, conditions in DISEASE_CATEGORIES.items():
+        if any(condition in disease_lower for condition in conditions):
+            return category
+    return "general"
+
+def rule_entry(disease: str) -> Dict:
+    """Metadata for one disease from the built-in rules"""
+    severity = rule_severity(disease)
+    return {
+        "severity": severity,
+        "recommendations": rule_recommendations(disease, severity),
+        "follow_up_questions": rule_follow_up_questions(disease),
+        "category": rule_category(disease),
+        "risk_score": calculate_severity_score([], disease)
+    }
+
+class LabelMetadata:
+    """Clinical metadata per classifier label, computed once at model load.
+
+    Severity, recommendations, follow-up questions, category and risk
+    score come from the built-in rules unless an override file replaces
+    them; per-request enrichment is then a dict lookup. Labels outside the
+    table fall back to the rules on each call.
+    """
+
+    def __init__(self, entries: Dict[str, Dict]):
+        self.entries = entries
+        self._lowered = {label.lower(): entry for label, entry in entries.items()}
+
+    @classmethod
+    def build(cls, labels: List[str], overrides: Dict[str, Dict] = None) -> 'LabelMetadata':
+        """Table for every label, with any overrides applied field by field"""
+        entries = {label: rule_entry(label) for label in labels}
+        for label, fields in (overrides or {}).items():
+            entry = entries.setdefault(label, rule_entry(label))
+            entry.update(validate_override(label, fields))
+        return cls(entries)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __contains__(self, label: str) -> bool:
+        return label in self.entries or label.lower() in self._lowered
+
+    def get(self, label: str) -> Dict:
+        """Metadata for a label; do not modify the returned dict"""
+        entry = self.entries.get(label) or self._lowered.get(label.lower())
+        return entry if entry is not None else rule_entry(label)
+
+    def template_strings(self) -> List[str]:
+        """Every recommendation and follow-up question a reply can contain, for pre-translation"""
+        strings = [advice for severity in SEVERITIES for advice in SEVERITY_RECOMMENDATIONS[severity]]
+        strings.extend(advice for _, advice in KEYWORD_RECOMMENDATIONS)
+        strings.extend(BASE_FOLLOW_UP_QUESTIONS)
+        for _, questions in KEYWORD_FOLLOW_UP_QUESTIONS:
+            strings.extend(questions)
+        for entry in self.entries.values():
+            strings.extend(entry['recommendations'])
+            strings.extend(entry['follow_up_questions'])
+        return list(dict.fromkeys(strings))
+
+    def export(self, path: str):
+        """Write the table as JSON, in the format load_overrides reads"""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as table_file:
+            json.dump(self.entries, table_file, indent=2, ensure_ascii=False)
+
+def validate_override(label: str, fields: Dict) -> Dict:
+    """Known fields of one override entry, rejecting invalid values"""
+    unknown = set(fields) - set(FIELDS)
+    if unknown:
+        raise ValueError(f"Unknown label metadata fields for {label!r}: {sorted(unknown)}")
+    if 'severity' in fields and fields['severity'] not in SEVERITIES:
+        raise ValueError(f"Invalid severity for {label!r}: {fields['severity']!r}")
+    for field in ('recommendations', 'follow_up_questions'):
+        if field in fields and not isinstance(fields[field], list):
+            raise ValueError(f"{field} for {label!r} must be a list")
+    return dict(fields)
+
+def load_overrides(path: str) -> Dict[str, Dict]:
+    """Per-label overrides from a JSON object of label -> fields"""
+    with open(path, encoding='utf-8') as table_file:
+        return json.load(table_file)
+
+def load_label_metadata(labels: List[str], config: Config = None) -> LabelMetadata:
+    """Build the table for the classifier labels, applying the override file if present"""
+    config = config or Config()
+    overrides = None
+    if config.LABEL_METADATA_PATH and os.path.exists(config.LABEL_METADATA_PATH):
+        overrides = load_overrides(config.LABEL_METADATA_PATH)
+        logging.getLogger(__name__).info(
+            f"Applied {len(overrides)} label metadata overrides from {config.LABEL_METADATA_PATH}"
+        )
+    return LabelMetadata.build(labels, overrides)
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the per-label clinical metadata table")
+    parser.add_argument('output', help="JSON file to write; edit it and point LABEL_METADATA_PATH at it")
+    args = parser.parse_args()
+
+    from models.inference_backends import load_backend
+
+    config = Config()
+    table = load_label_metadata(load_backend(config).labels, config)
+    table.export(args.output)
+    print(f"Wrote metadata for {len(table)} labels to {args.output}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,186 @@
+import ctypes
+import gc
+import logging
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Callable, Dict, List
+
+from utils.helpers import get_process_memory_mb
+
+def estimate_resident_mb(model: Any) -> float:
+    """Size of a model's weights in MB, from its parameters and buffers when available"""
+    modules = model if isinstance(model, (tuple, list)) else [model]
+    total_bytes = 0
+    
+    for module in modules:
+        if hasattr(module, 'parameters') and hasattr(module, 'buffers'):
+            for tensor in list(module.parameters()) + list(module.buffers()):
+                total_bytes += tensor.numel() * tensor.element_size()
+    
+    return round(total_bytes / (1024 * 1024), 1)
+
+def _release_freed_memory():
+    """Ask glibc to return freed heap pages to the OS after an unload"""
+    try:
+        ctypes.CDLL('libc.so.6').malloc_trim(0)
+    except (OSError, AttributeError):
+        pass
+
+class ManagedModel:
+    """Loads a model on first use and unloads it after an idle period.
+    
+    Use `with managed.use() as model:` so a model is never evicted while a
+    request is still running on it.
+    """
+
+    def __init__(self, name: str, loader: Callable[[], Any], idle_timeout: float = 600,
+                 max_events: int = 50):
+        self.logger = logging.getLogger(__name__)
+        self.name = name
+        self.loader = loader
+        self.idle_timeout = idle_timeout
+        
+        self._lock = threading.Condition()
+        self._model = None
+        self._in_use = 0
+        self._last_used = 0.0
+        self._resident_mb = 0.0
+        self._reaper = None
+        self._reaper_pid = None
+        
+        self.events = deque(maxlen=max_events)
+        self.load_count = 0
+        self.unload_count = 0
+        self._listeners: List[Callable[[Dict], None]] = []
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._model is not None
+
+    def add_listener(self, callback: Callable[[Dict], None]):
+        """Register a callback invoked with every load/unload event"""
+        self._listeners.append(callback)
+
+    @contextmanager
+    def use(self):
+        """Borrow the model, loading it if needed"""
+        with self._lock:
+            if self._model is None:
+                self._load()
+            self._in_use += 1
+            model = self._model
+        
+        try:
+            yield model
+        finally:
+            with self._lock:
+                self._in_use -= 1
+                self._last_used = time.monotonic()
+                self._lock.notify_all()
+
+    def unload(self, reason: str = 'manual', min_idle: float = None) -> bool:
+        """Unload the model once no request is using it.
+        
+        With `min_idle`, the unload is skipped if the model was used again
+        more recently than that many seconds ago.
+        """
+        with self._lock:
+            while self._in_use > 0:
+                self._lock.wait()
+            
+            if self._model is None:
+                return False
+            
+            if min_idle is not None and time.monotonic() - self._last_used < min_idle:
+                return False
+            
+            resident_mb = self._resident_mb
+            self._model = None
+            self._resident_mb = 0.0
+        
+        gc.collect()
+        _release_freed_memory()
+        
+        self.unload_count += 1
+        self._record_event('unload', resident_mb=resident_mb, reason=reason)
+        self.logger.info(f"Unloaded {self.name} model ({reason}, {resident_mb} MB freed)")
+        return True
+
+    def _load(self):
+        """Load the model; caller holds the lock"""
+        rss_before = get_process_memory_mb()
+        started = time.perf_counter()
+        
+        model = self.loader()
+        
+        seconds = round(time.perf_counter() - started, 2)
+        self._resident_mb = estimate_resident_mb(model) or round(get_process_memory_mb() - rss_before, 1)
+        self._model = model
+        self._last_used = time.monotonic()
+        
+        self.load_count += 1
+        self._record_event('load', resident_mb=self._resident_mb, seconds=seconds)
+        self.logger.info(f"Loaded {self.name} model in {seconds}s ({self._resident_mb} MB)")
+        
+        self._ensure_reaper()
+
+    def _ensure_reaper(self):
+        """Start the idle-eviction thread (again after a fork)"""
+        if not self.idle_timeout or self.idle_timeout <= 0:
+            return
+        
+        pid = os.getpid()
+        if self._reaper is not None and self._reaper_pid == pid and self._reaper.is_alive():
+            return
+        
+        self._reaper = threading.Thread(target=self._reap, name=f"{self.name}-reaper", daemon=True)
+        self._reaper_pid = pid
+        self._reaper.start()
+
+    def _reap(self):
+        interval = max(1.0, min(60.0, self.idle_timeout / 4))
+        
+        while True:
+            time.sleep(interval)
+            
+            with self._lock:
+                if self._model is None:
+                    continue
+                idle = time.monotonic() - self._last_used
+                if self._in_use or idle < self.idle_timeout:
+                    continue
+            
+            self.unload(reason=f"idle for {int(idle)}s", min_idle=self.idle_timeout)
+
+    def _record_event(self, event: str, **details):
+        entry = {'event': event, 'model': self.name, 'timestamp': datetime.now().isoformat()}
+        entry.update(details)
+        self.events.append(entry)
+        
+        for callback in self._listeners:
+            try:
+                callback(entry)
+            except Exception as e:
+                self.logger.error(f"Error in {self.name} lifecycle listener: {e}")
+
+    def get_stats(self) -> Dict:
+        """Lifecycle state, resident size and recent load/unload events"""
+        idle_seconds = None
+        if self._model is not None:
+            idle_seconds = round(time.monotonic() - self._last_used, 1)
+        
+        return {
+            'name': self.name,
+            'loaded': self.is_loaded,
+            'resident_mb': self._resident_mb,
+            'in_use': self._in_use,
+            'idle_seconds': idle_seconds,
+            'idle_timeout': self.idle_timeout,
+            'load_count': self.load_count,
+            'unload_count': self.unload_count,
+            'events': list(self.events)
+        }
@@ -1,15 +1,33 @@
 import re
+import copy
 import json
+import threading
+import time
 from typing import List, Dict, Tuple
-from langdetect import detect
-import google.generativeai as genai
 from config.settings import Config
+from services.model_registry import model_registry
+from utils.cache import PersistentLRUCache
+from utils.constants import LEXICON_STOPWORDS, NEGATION_WORDS, SYMPTOM_LEXICON, SYMPTOM_TRANSLATIONS
+from utils.helpers import is_emergency_keyword
+from utils.language import detect_language
+from utils.keyword_matcher import KeywordMatcher
+from utils.metrics import RollingStats
+
+# Part of every cache key; bump whenever the Gemini prompt or its parsing changes
+SYMPTOM_PROMPT_VERSION = 1
+
+# Canonical symptoms that make a locally extracted message urgent
+HIGH_URGENCY_SYMPTOMS = {'chest pain', 'shortness of breath'}
+MEDIUM_URGENCY_SYMPTOMS = {'bleeding', 'fever', 'vomiting', 'diarrhea', 'dizziness'}
+
+# Punctuation stripped from tokens when scoring lexicon coverage
+_TOKEN_PUNCTUATION = '.,;:!?"\'()[]{}।॥-'
 
 class SymptomDetector:
-    def __init__(self):
+    def __init__(self, llm_gateway=None):
         self.config = Config()
-        genai.configure(api_key=self.config.GEMINI_API_KEY)
-        self.model = genai.GenerativeModel('gemini-pro')
+        # Shared Gemini client with timeouts, retries and a circuit breaker
+        self.llm = llm_gateway or model_registry.get('llm_gateway')
         
         # Common symptom keywords in multiple languages
         self.symptom_keywords = {
@@ -51,42 +69,134 @@ class SymptomDetector:
             r'\b(since|for)\s+\d+\s+(days?|weeks?|months?|hours?)\b',
             r'\b(getting\s+worse|not\s+feeling\s+well)\b'
         ]
+        
+        # Built once: one automaton per language and one combined context regex,
+        # so a check is a single pass over the message
+        self.keyword_matchers = {
+            language: KeywordMatcher(self._build_lexicon(language, keywords))
+            for language, keywords in self.symptom_keywords.items()
+        }
+        self.medical_context = re.compile('|'.join(f'(?:{pattern})' for pattern in self.medical_patterns))
+        
+        # Local extraction counters; llm_calls_avoided counts messages the
+        # previous keyword/length rule would have sent to Gemini
+        self._stats_lock = threading.Lock()
+        self.detection_counts = {
+            'lexicon': 0, 'gemini': 0, 'gemini_failed': 0, 'gemini_skipped': 0, 'llm_calls_avoided': 0
+        }
+        
+        # Parsed Gemini results for repeated complaints, kept across restarts
+        self.gemini_cache = PersistentLRUCache(
+            self.config.SYMPTOM_CACHE_PATH,
+            max_entries=self.config.SYMPTOM_CACHE_SIZE,
+            ttl_seconds=self.config.SYMPTOM_CACHE_TTL,
+            name='gemini-symptoms'
+        )
+        self.gemini_latency_ms = RollingStats()
+        self.latency_saved_ms = 0.0
+
+    @staticmethod
+    def _build_lexicon(language: str, keywords: List[str]) -> Dict[str, str]:
+        """Keywords of one language mapped to canonical English symptoms"""
+        lexicon = {keyword: keyword for keyword in keywords}
+        for english, translations in SYMPTOM_TRANSLATIONS.items():
+            for term in translations.get(language, []):
+                lexicon[term] = english
+        lexicon.update(SYMPTOM_LEXICON.get(language, {}))
+        return lexicon
 
     def detect_language(self, text: str) -> str:
         """Detect the language of input text"""
-        try:
-            detected = detect(text)
-            language_map = {
-                'hi': 'hindi',
-                'ta': 'tamil',
-                'te': 'telugu',
-                'bn': 'bengali',
-                'en': 'english'
-            }
-            return language_map.get(detected, 'english')
-        except:
-            return 'english'
+        return detect_language(text)
+
+    def find_symptom_keywords(self, text: str, language: str) -> List[Dict]:
+        """Every symptom keyword in the text with its character span"""
+        matcher = self.keyword_matchers.get(language, self.keyword_matchers['english'])
+        return [
+            {'keyword': match.keyword, 'start': match.start, 'end': match.end}
+            for match in matcher.find_all(text)
+        ]
+
+    def local_symptom_detection(self, text: str, language: str) -> Dict:
+        """Extract symptoms from the multilingual lexicon, in Gemini's JSON schema.
+        
+        Confidence reflects how much of the message the lexicon explains: the
+        share of non-stopword tokens covered by a symptom match. Negations
+        ("no fever") and unmatched medical wording lower it, so those
+        messages still go to Gemini.
+        """
+        matcher = self.keyword_matchers.get(language, self.keyword_matchers['english'])
+        matches = matcher.find_all(text, overlapping=False)
+        symptoms = list(dict.fromkeys(match.label for match in matches))
+        
+        stopwords = LEXICON_STOPWORDS.get(language, set()) | LEXICON_STOPWORDS['english']
+        content_tokens = []
+        negated = False
+        for token in re.finditer(r'\S+', text):
+            word = token.group().strip(_TOKEN_PUNCTUATION).lower()
+            if not word:
+                continue
+            if word in NEGATION_WORDS:
+                negated = True
+            elif word not in stopwords:
+                content_tokens.append(token.span())
+        
+        covered = sum(
+            1 for start, end in content_tokens
+            if any(match.start < end and start < match.end for match in matches)
+        )
+        medical_context = bool(symptoms) or self.keyword_based_detection(text, language)
+        
+        if symptoms:
+            confidence = 0.5 + 0.5 * covered / max(1, len(content_tokens))
+        elif medical_context or len(content_tokens) > 3:
+            # Something health-related (or too much text) the lexicon cannot name
+            confidence = 0.3
+        else:
+            confidence = 0.9
+        if negated:
+            confidence -= 0.3
+        
+        if set(symptoms) & HIGH_URGENCY_SYMPTOMS or is_emergency_keyword(text):
+            urgency = 'high'
+        elif set(symptoms) & MEDIUM_URGENCY_SYMPTOMS or 'severe' in text.lower():
+            urgency = 'medium'
+        else:
+            urgency = 'low'
+        
+        return {
+            "has_symptoms": bool(symptoms),
+            "symptoms": symptoms,
+            "original_language": language,
+            "urgency": urgency if symptoms else 'low',
+            "medical_context": medical_context,
+            "confidence": round(max(0.0, confidence), 2)
+        }
+
+    @staticmethod
+    def normalize_text(text: str) -> str:
+        """Case- and whitespace-insensitive form of a message, for cache keys"""
+        return " ".join(text.lower().split()).strip(_TOKEN_PUNCTUATION + ' ')
 
     def keyword_based_detection(self, text: str, language: str) -> bool:
         """Check if text contains symptom keywords"""
-        text_lower = text.lower()
-        keywords = self.symptom_keywords.get(language, self.symptom_keywords['english'])
-        
-        # Check for direct keyword matches
-        for keyword in keywords:
-            if keyword in text_lower:
-                return True
+        matcher = self.keyword_matchers.get(language, self.keyword_matchers['english'])
+        if matcher.contains(text):
+            return True
         
         # Check for medical context patterns (mainly for English)
-        if language == 'english':
-            for pattern in self.medical_patterns:
-                if re.search(pattern, text_lower):
-                    return True
-        
-        return False
+        return language == 'english' and self.medical_context.search(text.lower()) is not None
 
-    def gemini_symptom_detection(self, text: str, language: str) -> Dict:
-        """Use Gemini to detect symptoms and extract them"""
+    def gemini_symptom_detection(self, text: str, language: str, draft_reply: bool = False,
+                                 timeout: float = None) -> Dict:
+        """Use Gemini to detect symptoms and extract them.
+        
+        With `draft_reply` the same call also drafts the answer to a
+        message without symptoms, returned under "reply", so the general
+        conversation path needs no second Gemini round trip. `timeout` is
+        the time left for the call; with less than LLM_MIN_BUDGET_SECONDS
+        the keyword fallback is used and "gemini_skipped" is set.
+        """
         
         language_prompts = {
             'hindi': 'हिंदी',
@@ -98,6 +208,31 @@ class SymptomDetector:
         
         lang_name = language_prompts.get(language, 'English')
         
+        prompt_version = f"{SYMPTOM_PROMPT_VERSION}+reply" if draft_reply else str(SYMPTOM_PROMPT_VERSION)
+        cache_key = (self.normalize_text(text), language, prompt_version)
+        cached = self.gemini_cache.get(cache_key)
+        if cached is not None:
+            # Each entry remembers the round trip it cost, which every hit saves
+            with self._stats_lock:
+                self.latency_saved_ms += cached['latency_ms']
+            return copy.deepcopy(cached['result'])
+        
+        if timeout is not None and timeout < self.config.LLM_MIN_BUDGET_SECONDS:
+            with self._stats_lock:
+                self.detection_counts['gemini_skipped'] += 1
+            result = self._keyword_fallback(text, language)
+            result['gemini_skipped'] = True
+            return result
+        
+        reply_field = reply_rules = ''
+        if draft_reply:
+            reply_field = ',\n    "reply": "answer to the user, or an empty string"'
+            reply_rules = f"""
+- reply: empty when has_symptoms is true. Otherwise answer the user as Sehat Saathi, a friendly
+  health assistant, in {lang_name}: general health information and healthy lifestyle tips,
+  culturally sensitive to the Indian context, conversational and supportive, and encourage
+  consulting healthcare professionals for specific concerns"""
+        
         prompt = f"""
 You are a medical AI assistant. Analyze the following {lang_name} text and determine:
 
@@ -114,7 +249,7 @@ Respond in this exact JSON format:
     "original_language": "{language}",
     "urgency": "low/medium/high",
     "medical_context": true/false,
-    "confidence": 0.0-1.0
+    "confidence": 0.0-1.0{reply_field}
 }}
 
 Rules:
@@ -122,11 +257,12 @@ Rules:
 - Extract symptoms in simple English terms
 - High urgency: chest pain, difficulty breathing, severe bleeding, unconsciousness
 - Medium urgency: persistent fever, severe pain, bleeding
-- Low urgency: mild symptoms, general discomfort
+- Low urgency: mild symptoms, general discomfort{reply_rules}
 """
 
         try:
-            response = self.model.generate_content(prompt)
+            started = time.perf_counter()
+            response = self.llm.generate(prompt, caller='symptom_detection', timeout=timeout)
             response_text = response.text.strip()
             
             # Clean the response to extract JSON
@@ -136,49 +272,69 @@ Rules:
                 response_text = response_text.split('```')[1].split('```')[0]
             
             result = json.loads(response_text)
-            return result
+            latency_ms = (time.perf_counter() - started) * 1000
+            self.gemini_latency_ms.record(latency_ms)
+            
+            self.gemini_cache.set(cache_key, {'result': result, 'latency_ms': round(latency_ms, 1)})
+            return copy.deepcopy(result)
             
         except Exception as e:
             print(f"Gemini API error: {e}")
-            # Fallback to keyword detection
-            has_symptoms = self.keyword_based_detection(text, language)
-            return {
-                "has_symptoms": has_symptoms,
-                "symptoms": [],
-                "original_language": language,
-                "urgency": "low",
-                "medical_context": has_symptoms,
-                "confidence": 0.5
-            }
-
-    def analyze_input(self, user_input: str) -> Dict:
-        """Main method to analyze user input for symptoms"""
+            with self._stats_lock:
+                self.detection_counts['gemini_failed'] += 1
+            return self._keyword_fallback(text, language)
+
+    def _keyword_fallback(self, text: str, language: str) -> Dict:
+        """Local lexicon result used in place of Gemini, which still names the symptoms"""
+        result = self.local_symptom_detection(text, language)
+        result['confidence'] = min(result['confidence'], 0.5)
+        result['detection_method'] = 'keyword'
+        return result
+
+    def analyze_input(self, user_input: str, draft_reply: bool = False, timeout: float = None) -> Dict:
+        """Main method to analyze user input for symptoms.
+        
+        `draft_reply` asks Gemini, when it is called at all, to also draft
+        the reply for a message without symptoms, and `timeout` bounds that
+        call (see gemini_symptom_detection).
+        """
         
         # Step 1: Detect language
         language = self.detect_language(user_input)
         
-        # Step 2: Quick keyword check for efficiency
-        has_keywords = self.keyword_based_detection(user_input, language)
+        # Step 2: Local lexicon extraction
+        result = self.local_symptom_detection(user_input, language)
         
-        # Step 3: If keywords found or uncertain, use Gemini for detailed analysis
-        if has_keywords or len(user_input.split()) > 3:
-            result = self.gemini_symptom_detection(user_input, language)
+        # Step 3: Use Gemini only when the lexicon cannot account for the message
+        if result['confidence'] >= self.config.LOCAL_SYMPTOM_CONFIDENCE:
+            result['detection_method'] = 'lexicon'
+            with self._stats_lock:
+                self.detection_counts['lexicon'] += 1
+                if result['medical_context'] or len(user_input.split()) > 3:
+                    self.detection_counts['llm_calls_avoided'] += 1
         else:
-            result = {
-                "has_symptoms": False,
-                "symptoms": [],
-                "original_language": language,
-                "urgency": "low",
-                "medical_context": False,
-                "confidence": 0.9
-            }
+            result = self.gemini_symptom_detection(user_input, language, draft_reply=draft_reply, timeout=timeout)
+            result.setdefault('detection_method', 'gemini')
+            with self._stats_lock:
+                self.detection_counts['gemini'] += 1
         
         # Step 4: Add metadata
         result['input_text'] = user_input
-        result['detection_method'] = 'gemini' if result.get('confidence', 0) > 0.7 else 'keyword'
         
         return result
 
+    def get_stats(self) -> Dict:
+        """How messages were analysed, including Gemini calls avoided"""
+        with self._stats_lock:
+            stats = dict(self.detection_counts)
+            stats['latency_saved_ms'] = round(self.latency_saved_ms, 1)
+        analysed = stats['lexicon'] + stats['gemini']
+        stats['lexicon_share'] = round(stats['lexicon'] / analysed, 3) if analysed else None
+        stats['confidence_threshold'] = self.config.LOCAL_SYMPTOM_CONFIDENCE
+        stats['gemini_cache'] = self.gemini_cache.get_stats()
+        stats['gemini_latency_ms'] = self.gemini_latency_ms.summary()
+        return stats
+
     def get_follow_up_questions(self, symptoms: List[str], language: str) -> List[str]:
         """Generate follow-up questions based on detected symptoms"""
         
@@ -0,0 +1,217 @@
+import argparse
+import json
+import logging
+import math
+import os
+import re
+import time
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from config.settings import Config
+from utils.cache import LRUCache
+
+# Character n-gram sizes, taken within word boundaries like sklearn's char_wb
+NGRAM_RANGE = (2, 4)
+
+def clean_symptom(symptom: str) -> str:
+    """Lower-cased symptom with punctuation dropped and whitespace collapsed"""
+    return " ".join(re.sub(r"[^\w\s']", " ", (symptom or '').lower()).split())
+
+def char_ngrams(text: str) -> Dict[str, int]:
+    """Counts of the character n-grams of each space-padded word"""
+    low, high = NGRAM_RANGE
+    counts = {}
+    for word in text.split():
+        padded = f" {word} "
+        for size in range(low, high + 1):
+            for start in range(len(padded) - size + 1):
+                ngram = padded[start:start + size]
+                counts[ngram] = counts.get(ngram, 0) + 1
+    return counts
+
+def load_symptom_vocabulary(path: str) -> Dict[str, List[str]]:
+    """Canonical symptoms with their aliases from a JSON or text file.
+
+    JSON is either a list of canonical terms or an object mapping each
+    canonical term to a list of aliases. Text files hold one canonical term
+    per line, optionally followed by ':' and comma-separated aliases; lines
+    starting with '#' are ignored.
+    """
+    with open(path, encoding='utf-8') as vocabulary_file:
+        if path.lower().endswith('.json'):
+            data = json.load(vocabulary_file)
+            if isinstance(data, list):
+                return {term: [] for term in data}
+            return {term: list(aliases or []) for term, aliases in data.items()}
+
+        vocabulary = {}
+        for line in vocabulary_file:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            term, _, aliases = line.partition(':')
+            vocabulary[term.strip()] = [alias.strip() for alias in aliases.split(',') if alias.strip()]
+        return vocabulary
+
+class SymptomNormalizer:
+    """Maps free-text symptoms to a canonical vocabulary.
+
+    Every canonical term and alias is a TF-IDF vector over character
+    n-grams, kept as an inverted index from n-gram to (term, weight). A
+    lookup scores only the terms sharing an n-gram with the query and maps
+    it to the canonical term of the most similar entry when the cosine
+    similarity reaches `threshold`; otherwise the cleaned text is kept.
+    Exact matches and repeated queries skip the scoring.
+    """
+
+    def __init__(self, vocabulary: Dict[str, List[str]], threshold: float = 0.7, memo_size: int = 10000):
+        self.threshold = threshold
+        self.vocabulary = vocabulary
+
+        surfaces = {}
+        for canonical, aliases in vocabulary.items():
+            for surface in [canonical] + list(aliases):
+                surfaces.setdefault(clean_symptom(surface), clean_symptom(canonical))
+        surfaces.pop('', None)
+
+        self._exact = surfaces
+        self._canonical = list(surfaces.values())
+
+        term_ngrams = [char_ngrams(surface) for surface in surfaces]
+        document_frequency = Counter(ngram for ngrams in term_ngrams for ngram in ngrams)
+        documents = len(term_ngrams)
+        self._idf = {
+            ngram: math.log((1 + documents) / (1 + frequency)) + 1
+            for ngram, frequency in document_frequency.items()
+        }
+        # N-grams never seen in the vocabulary still count towards the query norm
+        self._unknown_idf = math.log(1 + documents) + 1
+
+        # Posting lists laid out back to back, CSR style: n-gram -> (start, end) slice
+        postings = {}
+        for term, ngrams in enumerate(term_ngrams):
+            weights = {ngram: count * self._idf[ngram] for ngram, count in ngrams.items()}
+            norm = math.sqrt(sum(weight * weight for weight in weights.values()))
+            for ngram, weight in weights.items():
+                postings.setdefault(ngram, []).append((term, weight / norm))
+        
+        self._ngram_ids = {}
+        indptr, terms, weights = [0], [], []
+        for ngram, entries in postings.items():
+            self._ngram_ids[ngram] = len(indptr) - 1
+            terms.extend(term for term, _ in entries)
+            weights.extend(weight for _, weight in entries)
+            indptr.append(len(terms))
+        self._indptr = np.array(indptr, dtype=np.int64)
+        self._terms = np.array(terms, dtype=np.int64)
+        self._weights = np.array(weights, dtype=np.float64)
+
+        self._memo = LRUCache(max_entries=memo_size, name='symptom-normalizer')
+
+    def __len__(self) -> int:
+        return len(self._exact)
+
+    def match(self, symptom: str) -> Tuple[Optional[str], float]:
+        """Nearest canonical term and its cosine similarity"""
+        text = clean_symptom(symptom)
+        if not text:
+            return None, 0.0
+        if text in self._exact:
+            return self._exact[text], 1.0
+
+        cached = self._memo.get(text)
+        if cached is not None:
+            return cached
+
+        norm = 0.0
+        ids, query_weights = [], []
+        for ngram, count in char_ngrams(text).items():
+            weight = count * self._idf.get(ngram, self._unknown_idf)
+            norm += weight * weight
+            ngram_id = self._ngram_ids.get(ngram)
+            if ngram_id is not None:
+                ids.append(ngram_id)
+                query_weights.append(weight)
+
+        if ids:
+            # Gather every posting of the query's n-grams in one vectorized step
+            ids = np.array(ids)
+            starts = self._indptr[ids]
+            lengths = self._indptr[ids + 1] - starts
+            positions = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(lengths.sum())
+            scores = np.bincount(
+                self._terms[positions], weights=self._weights[positions] * np.repeat(query_weights, lengths),
+                minlength=len(self._canonical)
+            )
+            term = int(scores.argmax())
+            result = (self._canonical[term], round(float(scores[term]) / math.sqrt(norm), 4))
+        else:
+            result = (None, 0.0)
+
+        self._memo.set(text, result)
+        return result
+
+    def normalize(self, symptom: str) -> str:
+        """Canonical term for a symptom, or its cleaned text when nothing is close enough"""
+        canonical, score = self.match(symptom)
+        return canonical if canonical is not None and score >= self.threshold else clean_symptom(symptom)
+
+    def normalize_all(self, symptoms: List[str]) -> List[str]:
+        """Normalize each symptom, keeping order and dropping empty entries"""
+        return [self.normalize(symptom) for symptom in symptoms if symptom and symptom.strip()]
+
+    def get_stats(self) -> Dict:
+        """Vocabulary size and lookup memo statistics"""
+        return {
+            'canonical_terms': len(self.vocabulary),
+            'surface_forms': len(self._exact),
+            'ngrams': len(self._ngram_ids),
+            'threshold': self.threshold,
+            'memo': self._memo.get_stats()
+        }
+
+def load_symptom_normalizer(config: Config = None) -> Optional[SymptomNormalizer]:
+    """Build the normalizer, or None when it is disabled or has no vocabulary file"""
+    config = config or Config()
+    logger = logging.getLogger(__name__)
+
+    if not config.SYMPTOM_NORMALIZER_ENABLED:
+        return None
+
+    if not os.path.exists(config.SYMPTOM_VOCABULARY_PATH):
+        logger.info(f"No symptom vocabulary at {config.SYMPTOM_VOCABULARY_PATH}, symptoms are not normalized")
+        return None
+
+    return SymptomNormalizer(
+        load_symptom_vocabulary(config.SYMPTOM_VOCABULARY_PATH),
+        threshold=config.SYMPTOM_NORMALIZER_THRESHOLD
+    )
+
+def main():
+    parser = argparse.ArgumentParser(description="Map free-text symptoms to the canonical vocabulary")
+    parser.add_argument('symptoms', nargs='+')
+    parser.add_argument('--vocabulary', default=Config.SYMPTOM_VOCABULARY_PATH)
+    parser.add_argument('--threshold', type=float, default=Config.SYMPTOM_NORMALIZER_THRESHOLD)
+
+    args = parser.parse_args()
+    normalizer = SymptomNormalizer(load_symptom_vocabulary(args.vocabulary), threshold=args.threshold)
+
+    results = []
+    for symptom in args.symptoms:
+        started = time.perf_counter()
+        canonical, score = normalizer.match(symptom)
+        elapsed_us = (time.perf_counter() - started) * 1e6
+        results.append({
+            'symptom': symptom,
+            'nearest': canonical,
+            'similarity': score,
+            'normalized': normalizer.normalize(symptom),
+            'us': round(elapsed_us, 1)
+        })
+    print(json.dumps(results, indent=2, ensure_ascii=False))
+
+if __name__ == '__main__':
+    main()
@@ -1,12 +1,14 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request, jsonify, stream_with_context
+import json
 import logging
-from services.chat_service import ChatService
+from services.model_registry import model_registry
 
 chat_bp = Blueprint('chat', __name__)
 logger = logging.getLogger(__name__)
 
-# Initialize chat service
-chat_service = ChatService()
+def get_chat_service():
+    """Process-wide chat service, built on first request after fork"""
+    return model_registry.get('chat_service')
 
 @chat_bp.route('/message', methods=['POST'])
 def send_message():
@@ -21,12 +23,13 @@ def send_message():
         user_message = data['message'].strip()
         user_id = data['user_id']
         location = data.get('location', None)
+        explain = bool(data.get('explain', False))
         
         if not user_message:
             return jsonify({'error': 'Message cannot be empty'}), 400
         
         # Process message
-        response = chat_service.process_message(user_message, user_id, location)
+        response = get_chat_service().process_message(user_message, user_id, location, explain=explain)
         
         return jsonify(response)
         
@@ -34,12 +37,61 @@ def send_message():
         logger.error(f"Error in chat endpoint: {e}")
         return jsonify({'error': 'Internal server error'}), 500
 
+@chat_bp.route('/stream', methods=['POST'])
+def stream_message():
+    """Chat endpoint streaming the reply as Server-Sent Events.
+    
+    Events: 'meta' (triage, diagnosis, hospitals, follow-ups), 'token'
+    (reply text as it is generated), then 'done' with the same payload as
+    /message, or 'error'.
+    """
+    data = request.get_json(silent=True)
+    
+    if not data or 'message' not in data or 'user_id' not in data:
+        return jsonify({'error': 'Missing required fields: message, user_id'}), 400
+    
+    user_message = data['message'].strip()
+    if not user_message:
+        return jsonify({'error': 'Message cannot be empty'}), 400
+    
+    events = get_chat_service().stream_message(
+        user_message, data['user_id'], data.get('location', None), explain=bool(data.get('explain', False))
+    )
+    
+    def generate():
+        try:
+            for event, payload in events:
+                yield f"event: {event}\ndata: {json.dumps(payload, ensure_ascii=False)}\n\n"
+        except Exception as e:
+            logger.error(f"Error in chat stream: {e}")
+            yield f"event: error\ndata: {json.dumps({'error': 'Internal server error'})}\n\n"
+    
+    # Proxies must not buffer the stream, or tokens arrive all at once
+    return Response(
+        stream_with_context(generate()), mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+@chat_bp.route('/enrichment/<enrichment_id>', methods=['GET'])
+def get_enrichment(enrichment_id):
+    """Diagnosis and follow-ups attached to an emergency reply after it was sent"""
+    try:
+        enrichment = get_chat_service().get_enrichment(enrichment_id)
+        if enrichment is None:
+            return jsonify({'error': 'Unknown or expired enrichment'}), 404
+        
+        return jsonify(dict(enrichment, id=enrichment_id))
+        
+    except Exception as e:
+        logger.error(f"Error getting enrichment: {e}")
+        return jsonify({'error': 'Internal server error'}), 500
+
 @chat_bp.route('/history/<user_id>', methods=['GET'])
 def get_chat_history(user_id):
     """Get user's chat history"""
     try:
         limit = request.args.get('limit', 10, type=int)
-        history = chat_service.get_user_history(user_id)
+        history = get_chat_service().get_user_history(user_id)
         
         return jsonify(history)
         
@@ -1,15 +1,18 @@
 from flask import Blueprint, request, jsonify
 import logging
-from services.location_service import LocationService
-from services.database_service import DatabaseService
+from services.model_registry import model_registry
 from utils.validators import validate_location_data, validate_user_profile
 
 health_bp = Blueprint('health', __name__)
 logger = logging.getLogger(__name__)
 
-# Initialize services
-location_service = LocationService()
-database_service = DatabaseService()
+def get_location_service():
+    """Process-wide location service"""
+    return model_registry.get('location_service')
+
+def get_database_service():
+    """Process-wide database service"""
+    return model_registry.get('database_service')
 
 @health_bp.route('/hospitals/nearby', methods=['POST'])
 def find_nearby_hospitals():
@@ -29,7 +32,7 @@ def find_nearby_hospitals():
             return jsonify({'error': error_msg}), 400
         
         # Find hospitals
-        hospitals = location_service.find_nearby_hospitals(location, severity)
+        hospitals = get_location_service().find_nearby_hospitals(location, severity)
         
         return jsonify({
             'hospitals': hospitals,
@@ -46,7 +49,7 @@ def find_nearby_hospitals():
 def get_emergency_contacts(city):
     """Get emergency contacts for a city"""
     try:
-        contacts = location_service.get_emergency_contacts(city)
+        contacts = get_location_service().get_emergency_contacts(city)
         
         return jsonify({
             'city': city,
@@ -76,7 +79,7 @@ def get_directions():
                 return jsonify({'error': f'Invalid {field}: {error_msg}'}), 400
         
         # Get directions
-        directions = location_service.get_directions(data['origin'], data['destination'])
+        directions = get_location_service().get_directions(data['origin'], data['destination'])
         
         return jsonify({
             'directions': directions,
@@ -94,7 +97,7 @@ def user_profile(user_id):
     try:
         if request.method == 'GET':
             # Get user profile
-            history = database_service.get_user_history(user_id)
+            history = get_database_service().get_user_history(user_id)
             user_data = history.get('user_data', {})
             
             return jsonify({
@@ -115,7 +118,7 @@ def user_profile(user_id):
                 return jsonify({'error': error_msg}), 400
             
             # Store profile
-            database_service.store_user_profile(user_id, data)
+            get_database_service().store_user_profile(user_id, data)
             
             return jsonify({
                 'message': 'Profile updated successfully',
@@ -130,7 +133,7 @@ def user_profile(user_id):
 def get_medical_history(user_id):
     """Get user's medical history"""
     try:
-        medical_history = database_service.get_user_medical_history(user_id)
+        medical_history = get_database_service().get_user_medical_history(user_id)
         
         return jsonify({
             'user_id': user_id,
@@ -164,7 +167,7 @@ def submit_feedback():
             return jsonify({'error': error_msg}), 400
         
         # Store feedback
-        database_service.store_feedback(user_id, conversation_id, feedback)
+        get_database_service().store_feedback(user_id, conversation_id, feedback)
         
         return jsonify({'message': 'Feedback submitted successfully'})
         
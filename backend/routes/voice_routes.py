@@ -1,16 +1,15 @@
 from flask import Blueprint, request, jsonify, send_file
 import logging
 import io
-from services.voice_service import VoiceService
-from services.chat_service import ChatService
+from services.model_registry import model_registry
 from utils.validators import validate_audio_data, validate_user_input
 
 voice_bp = Blueprint('voice', __name__)
 logger = logging.getLogger(__name__)
 
-# Initialize services
-voice_service = VoiceService()
-chat_service = ChatService()
+def get_voice_service():
+    """Process-wide voice service"""
+    return model_registry.get('voice_service')
 
 @voice_bp.route('/speech-to-text', methods=['POST'])
 def speech_to_text():
@@ -36,7 +35,7 @@ def speech_to_text():
         language = request.form.get('language', 'en-IN')
         
         # Process audio
-        result = voice_service.speech_to_text(audio_data, language)
+        result = get_voice_service().speech_to_text(audio_data, language)
         
         return jsonify(result)
         
@@ -48,6 +47,6 @@ def speech_to_text():
 def get_supported_languages():
     """Get list of supported languages for voice"""
     return jsonify({
-        'languages': voice_service.language_codes,
+        'languages': get_voice_service().language_codes,
         'default': 'english'
     })
\ No newline at end of file
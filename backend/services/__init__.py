@@ -3,5 +3,6 @@ from .chat_service import ChatService
 from .location_service import LocationService
 from .voice_service import VoiceService
 from .database_service import DatabaseService
+from .model_registry import ModelRegistry, model_registry
 
-__all__ = ['ChatService', 'LocationService', 'VoiceService', 'DatabaseService']
\ No newline at end of file
+__all__ = ['ChatService', 'LocationService', 'VoiceService', 'DatabaseService', 'ModelRegistry', 'model_registry']
\ No newline at end of file
@@ -1,31 +1,87 @@
-from typing import Dict, List
+from typing import Dict, Iterator, List, Optional, Tuple
 import logging
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from datetime import datetime
 
-from models.symptom_detector import SymptomDetector
-from models.disease_identifier import DiseaseIdentifier
-from models.gemini_handler import GeminiHandler
-from services.location_service import LocationService
-from services.database_service import DatabaseService
+from config.settings import Config
+from services.model_registry import model_registry
+from services.emergency_triage import EmergencyTriage
+from utils.cache import LRUCache
+from utils.constants import API_CONFIG
+from utils.deadline import Deadline
+from utils.metrics import Histogram, RollingStats
+
+# Stages of a request that check the deadline, in order
+REQUEST_STAGES = (
+    'symptom_detection', 'classification', 'follow_up_questions', 'translation', 'hospital_search', 'reply',
+    'store_conversation'
+)
+
+# Share of the request budget a stage used, in percent
+STAGE_BUDGET_BUCKETS = (1, 2, 5, 10, 25, 50, 75, 100)
 
 class ChatService:
-    def __init__(self):
+    def __init__(self, symptom_detector=None, disease_identifier=None, gemini_handler=None,
+                 location_service=None, database_service=None):
         self.logger = logging.getLogger(__name__)
         
-        # Initialize all components
-        self.symptom_detector = SymptomDetector()
-        self.disease_identifier = DiseaseIdentifier()
-        self.gemini_handler = GeminiHandler()
-        self.location_service = LocationService()
-        self.database_service = DatabaseService()
+        # Share process-wide instances unless specific components are injected
+        self.symptom_detector = symptom_detector or model_registry.get('symptom_detector')
+        self.disease_identifier = disease_identifier or model_registry.get('disease_identifier')
+        self.gemini_handler = gemini_handler or model_registry.get('gemini_handler')
+        self.location_service = location_service or model_registry.get('location_service')
+        self.database_service = database_service or model_registry.get('database_service')
+        
+        # Emergencies are answered before any model call; diagnosis and
+        # follow-ups are attached afterwards on a background thread
+        self.config = Config()
+        self.emergency_triage = EmergencyTriage()
+        self.enrichment_executor = ThreadPoolExecutor(
+            max_workers=self.config.ENRICHMENT_WORKERS, thread_name_prefix='emergency-enrichment'
+        )
+        self.enrichments = LRUCache(
+            max_entries=self.config.ENRICHMENT_CACHE_SIZE,
+            ttl_seconds=self.config.ENRICHMENT_CACHE_TTL,
+            name='emergency-enrichments'
+        )
+        self.time_to_emergency_reply_ms = RollingStats()
+        
+        # General replies drafted by the symptom detection call vs. a separate guidance call
+        self._stats_lock = threading.Lock()
+        self.general_replies = {'fused': 0, 'guidance': 0, 'template': 0}
+        
+        # Every request runs against API_CONFIG['request_timeout']; stages out of
+        # budget degrade instead of running
+        self.stage_budget = {stage: Histogram(STAGE_BUDGET_BUCKETS) for stage in REQUEST_STAGES + ('total',)}
+        self.skipped_stages = {stage: 0 for stage in REQUEST_STAGES}
         
         self.logger.info("ChatService initialized successfully")
 
-    def process_message(self, user_input: str, user_id: str, location: Dict = None) -> Dict:
-        """Main method to process user message"""
+    def process_message(self, user_input: str, user_id: str, location: Dict = None, explain: bool = False) -> Dict:
+        """Main method to process user message; `explain` adds per-symptom attribution.
+        
+        The whole request gets API_CONFIG['request_timeout'] seconds. A
+        stage without enough time left degrades: keyword symptom detection,
+        remembered translations only, no hospital search, or a template
+        reply. Those stages are listed in "skipped_stages".
+        """
+        started = time.perf_counter()
+        deadline = Deadline(API_CONFIG['request_timeout'])
+        skipped = []
         try:
-            # Step 1: Analyze input for symptoms
-            symptom_analysis = self.symptom_detector.analyze_input(user_input)
+            # Step 0: Local emergency triage, ahead of language detection and every model call
+            triage = self.emergency_triage.check(user_input)
+            if triage is not None:
+                return self._process_emergency_fast_path(user_input, user_id, location, triage, started, explain)
+            
+            # Step 1: Analyze input for symptoms; in fused mode the same Gemini
+            # call also drafts the reply for general conversation
+            symptom_analysis = self._analyze_input(user_input, deadline, skipped)
+            draft_reply = symptom_analysis.pop("reply", None)
             
             response_data = {
                 "user_message": user_input,
@@ -36,13 +92,17 @@ class ChatService:
             
             if symptom_analysis["has_symptoms"]:
                 # Step 2: User has symptoms - process medical flow
-                response_data.update(self._process_medical_flow(symptom_analysis, location))
+                response_data.update(self._process_medical_flow(symptom_analysis, location, explain, deadline, skipped))
             else:
                 # Step 3: General conversation
-                response_data.update(self._process_general_conversation(user_input, symptom_analysis["original_language"]))
+                response_data.update(self._process_general_conversation(
+                    user_input, symptom_analysis["original_language"], draft_reply, deadline, skipped
+                ))
+            response_data["skipped_stages"] = skipped
             
-            # Step 4: Store conversation in database
-            self._store_conversation(user_id, response_data)
+            # Step 4: Store conversation in database, in the background when out of time
+            self._store_within_deadline(user_id, response_data, deadline)
+            self.stage_budget['total'].record(self._budget_used(deadline.elapsed(), deadline))
             
             return response_data
             
@@ -50,14 +110,162 @@ class ChatService:
             self.logger.error(f"Error processing message: {e}")
             return self._create_error_response(str(e))
 
-    def _process_medical_flow(self, symptom_analysis: Dict, location: Dict = None) -> Dict:
+    def stream_message(self, user_input: str, user_id: str, location: Dict = None,
+                       explain: bool = False) -> Iterator[Tuple[str, Dict]]:
+        """process_message as (event, data) pairs for a streaming response.
+        
+        'meta' carries every structured field as soon as triage and
+        classification are done, 'token' carries the reply text as Gemini
+        generates it, and 'done' carries the full response, identical to
+        what process_message returns. The conversation is stored once the
+        reply is complete.
+        """
+        started = time.perf_counter()
+        deadline = Deadline(API_CONFIG['request_timeout'])
+        skipped = []
+        response_data = None
+        try:
+            triage = self.emergency_triage.check(user_input)
+            if triage is not None:
+                yield "done", self._process_emergency_fast_path(user_input, user_id, location, triage, started, explain)
+                return
+            
+            symptom_analysis = self._analyze_input(user_input, deadline, skipped)
+            draft_reply = symptom_analysis.pop("reply", None)
+            
+            response_data = {
+                "user_message": user_input,
+                "timestamp": datetime.now().isoformat(),
+                "user_id": user_id,
+                "symptom_analysis": symptom_analysis
+            }
+            
+            if symptom_analysis["has_symptoms"]:
+                # Medical replies are templates; only the general path waits on Gemini
+                response_data.update(self._process_medical_flow(symptom_analysis, location, explain, deadline, skipped))
+                chunks = [response_data["bot_reply"]]
+            else:
+                response_data.update(self._general_response(None))
+                language = symptom_analysis["original_language"]
+                if draft_reply:
+                    chunks, source = [draft_reply], 'fused'
+                elif not deadline.has(self.config.LLM_MIN_BUDGET_SECONDS):
+                    chunks, source = [self.gemini_handler.fallback_guidance(language)], 'template'
+                    self._skip('reply', skipped)
+                else:
+                    chunks, source = self.gemini_handler.stream_health_guidance(
+                        user_input, language, timeout=deadline.remaining()
+                    ), 'guidance'
+                with self._stats_lock:
+                    self.general_replies[source] += 1
+            response_data["skipped_stages"] = skipped
+            
+            yield "meta", {key: value for key, value in response_data.items() if key != "bot_reply"}
+            
+            parts = []
+            for chunk in chunks:
+                parts.append(chunk)
+                yield "token", {"text": chunk}
+            response_data["bot_reply"] = "".join(parts).strip()
+            
+        except Exception as e:
+            self.logger.error(f"Error streaming message: {e}")
+            yield "error", self._create_error_response(str(e))
+            return
+        
+        self._store_within_deadline(user_id, response_data, deadline)
+        self.stage_budget['total'].record(self._budget_used(deadline.elapsed(), deadline))
+        yield "done", response_data
+
+    @contextmanager
+    def _stage(self, stage: str, deadline: Deadline):
+        """Record the share of the request budget a stage used"""
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.stage_budget[stage].record(self._budget_used(time.monotonic() - started, deadline))
+
+    @staticmethod
+    def _budget_used(seconds: float, deadline: Deadline) -> float:
+        return 100.0 * seconds / deadline.budget
+
+    def _skip(self, stage: str, skipped: List[str]):
+        """Note a stage that degraded because the deadline was too close"""
+        skipped.append(stage)
+        with self._stats_lock:
+            self.skipped_stages[stage] += 1
+
+    def _analyze_input(self, user_input: str, deadline: Deadline, skipped: List[str]) -> Dict:
+        """Symptom analysis within the time left; Gemini is skipped when too little remains"""
+        with self._stage('symptom_detection', deadline):
+            symptom_analysis = self.symptom_detector.analyze_input(
+                user_input, draft_reply=self.config.FUSED_LLM_CALL, timeout=deadline.remaining()
+            )
+        if symptom_analysis.pop("gemini_skipped", False):
+            self._skip('symptom_detection', skipped)
+        return symptom_analysis
+
+    def _find_hospitals(self, location: Dict, severity: str, deadline: Deadline, skipped: List[str]) -> List[Dict]:
+        """Nearby hospitals, or none when the Maps calls would not fit in the time left"""
+        if not deadline.has(self.config.MAPS_MIN_BUDGET_SECONDS):
+            self._skip('hospital_search', skipped)
+            return []
+        with self._stage('hospital_search', deadline):
+            return self.location_service.find_nearby_hospitals(location, severity, deadline=deadline)
+
+    def _store_within_deadline(self, user_id: str, response_data: Dict, deadline: Deadline):
+        """Store the conversation, off the request thread when the deadline is close"""
+        if deadline.has(self.config.STORE_MIN_BUDGET_SECONDS):
+            with self._stage('store_conversation', deadline):
+                self._store_conversation(user_id, response_data)
+        else:
+            self.enrichment_executor.submit(self._store_conversation, user_id, dict(response_data))
+
+    def _translate_templates(self, disease_prediction: Dict, follow_up_questions: List[str], language: str,
+                             deadline: Deadline, skipped: List[str]) -> Tuple[Dict, List[str]]:
+        """Recommendations and follow-up questions in the user's language, in one translation call.
+        
+        Without time left for Gemini only remembered translations are used.
+        """
+        remembered_only = not deadline.has(self.config.LLM_MIN_BUDGET_SECONDS)
+        if remembered_only:
+            self._skip('translation', skipped)
+        
+        recommendations = list(disease_prediction['recommendations'])
+        with self._stage('translation', deadline):
+            translated = self.gemini_handler.translate_batch(
+                recommendations + list(follow_up_questions), language,
+                timeout=deadline.remaining(), remembered_only=remembered_only
+            )
+        split = len(recommendations)
+        return dict(disease_prediction, recommendations=translated[:split]), translated[split:]
+
+    def _process_medical_flow(self, symptom_analysis: Dict, location: Dict = None, explain: bool = False,
+                              deadline: Deadline = None, skipped: List[str] = None) -> Dict:
         """Process medical-related conversation"""
+        deadline = deadline or Deadline(API_CONFIG['request_timeout'])
+        skipped = [] if skipped is None else skipped
         symptoms = symptom_analysis["symptoms"]
         language = symptom_analysis["original_language"]
         urgency = symptom_analysis["urgency"]
         
         # Get disease prediction
-        disease_prediction = self.disease_identifier.predict_disease(symptoms)
+        with self._stage('classification', deadline):
+            disease_prediction = self.disease_identifier.predict_disease(symptoms, explain=explain)
+        
+        # Get follow-up questions
+        with self._stage('follow_up_questions', deadline):
+            follow_up_questions = self.disease_identifier.get_follow_up_questions(
+                disease_prediction["disease"], 
+                symptoms,
+                disease_prediction.get("differential")
+            )
+        
+        if language != 'english':
+            disease_prediction, follow_up_questions = self._translate_templates(
+                disease_prediction, follow_up_questions, language, deadline, skipped
+            )
         
         # Generate appropriate response based on urgency
         if urgency == "high" or disease_prediction["severity"] == "high":
@@ -66,7 +274,7 @@ class ChatService:
             
             # Find nearby hospitals if location provided
             if location:
-                hospitals = self.location_service.find_nearby_hospitals(location, "high")
+                hospitals = self._find_hospitals(location, "high", deadline, skipped)
         
         else:
             # Generate helpful medical advice
@@ -74,13 +282,7 @@ class ChatService:
             hospitals = []
             
             if location and disease_prediction["severity"] == "medium":
-                hospitals = self.location_service.find_nearby_hospitals(location, "medium")
-        
-        # Get follow-up questions
-        follow_up_questions = self.disease_identifier.get_follow_up_questions(
-            disease_prediction["disease"], 
-            symptoms
-        )
+                hospitals = self._find_hospitals(location, "medium", deadline, skipped)
         
         return {
             "message_type": "medical",
@@ -92,12 +294,113 @@ class ChatService:
             "requires_immediate_attention": disease_prediction["requires_immediate_attention"]
         }
 
-    def _process_general_conversation(self, user_input: str, language: str) -> Dict:
-        """Process general conversation"""
+    def _process_emergency_fast_path(self, user_input: str, user_id: str, location: Optional[Dict],
+                                     triage: Dict, started: float, explain: bool = False) -> Dict:
+        """Reply with the emergency template and hospitals now, enrich in the background"""
+        hospitals = []
+        if location:
+            try:
+                hospitals = self.location_service.find_nearby_hospitals(location, "high")
+            except Exception as e:
+                self.logger.error(f"Error finding hospitals for emergency: {e}")
         
-        # Use Gemini for general health guidance
-        bot_reply = self.gemini_handler.generate_health_guidance(user_input, language)
+        enrichment_id = uuid.uuid4().hex
+        response_data = {
+            "user_message": user_input,
+            "timestamp": datetime.now().isoformat(),
+            "user_id": user_id,
+            "message_type": "medical",
+            "bot_reply": triage['reply'],
+            "triage": {
+                "emergency": True,
+                "language": triage['language'],
+                "matched_keywords": triage['matched_keywords']
+            },
+            "disease_prediction": None,
+            "hospitals": hospitals,
+            "follow_up_questions": [],
+            "urgency_level": "high",
+            "requires_immediate_attention": True,
+            "enrichment": {"id": enrichment_id, "status": "pending"}
+        }
         
+        self.enrichments.set(enrichment_id, {"status": "pending"})
+        self.enrichment_executor.submit(self._enrich_emergency, enrichment_id, dict(response_data), explain)
+        
+        self.time_to_emergency_reply_ms.record((time.perf_counter() - started) * 1000)
+        return response_data
+
+    def _enrich_emergency(self, enrichment_id: str, response_data: Dict, explain: bool = False):
+        """Run the full symptom analysis and diagnosis behind an emergency reply"""
+        try:
+            symptom_analysis = self.symptom_detector.analyze_input(response_data['user_message'])
+            
+            # Fall back to the matched emergency terms when no symptoms were extracted
+            symptoms = symptom_analysis.get("symptoms") or response_data['triage']['matched_keywords']
+            disease_prediction = self.disease_identifier.predict_disease(symptoms, explain=explain)
+            
+            enrichment = {
+                "status": "complete",
+                "symptom_analysis": symptom_analysis,
+                "disease_prediction": disease_prediction,
+                "follow_up_questions": self.disease_identifier.get_follow_up_questions(
+                    disease_prediction["disease"], symptoms, disease_prediction.get("differential")
+                )
+            }
+        except Exception as e:
+            self.logger.error(f"Error enriching emergency reply: {e}")
+            enrichment = {"status": "failed", "error": str(e)}
+        
+        self.enrichments.set(enrichment_id, enrichment)
+        
+        response_data.update({key: value for key, value in enrichment.items() if key != "status"})
+        response_data["enrichment"] = {"id": enrichment_id, "status": enrichment["status"]}
+        self._store_conversation(response_data['user_id'], response_data)
+
+    def get_enrichment(self, enrichment_id: str) -> Optional[Dict]:
+        """Diagnosis attached to an emergency reply, or None if unknown or expired"""
+        return self.enrichments.get(enrichment_id)
+
+    def get_stats(self) -> Dict:
+        """Emergency fast-path, general reply and request deadline statistics"""
+        return {
+            'emergency_fast_path': self.time_to_emergency_reply_ms.count,
+            'time_to_emergency_reply_ms': self.time_to_emergency_reply_ms.summary(),
+            'enrichments': self.enrichments.get_stats(),
+            'general_replies': dict(self.general_replies),
+            'skipped_stages': dict(self.skipped_stages),
+            'stage_budget_pct': {stage: histogram.summary() for stage, histogram in self.stage_budget.items()}
+        }
+
+    def _process_general_conversation(self, user_input: str, language: str, draft_reply: str = None,
+                                      deadline: Deadline = None, skipped: List[str] = None) -> Dict:
+        """Process general conversation, reusing a reply drafted during symptom detection"""
+        deadline = deadline or Deadline(API_CONFIG['request_timeout'])
+        skipped = [] if skipped is None else skipped
+        
+        if draft_reply:
+            bot_reply = draft_reply
+            source = 'fused'
+        elif not deadline.has(self.config.LLM_MIN_BUDGET_SECONDS):
+            bot_reply = self.gemini_handler.fallback_guidance(language)
+            source = 'template'
+            self._skip('reply', skipped)
+        else:
+            # Use Gemini for general health guidance
+            with self._stage('reply', deadline):
+                bot_reply = self.gemini_handler.generate_health_guidance(
+                    user_input, language, timeout=deadline.remaining()
+                )
+            source = 'guidance'
+        
+        with self._stats_lock:
+            self.general_replies[source] += 1
+        
+        return self._general_response(bot_reply)
+
+    @staticmethod
+    def _general_response(bot_reply: str) -> Dict:
+        """Response fields for a general (non-medical) reply"""
         return {
             "message_type": "general",
             "bot_reply": bot_reply,
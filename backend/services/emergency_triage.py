@@ -0,0 +1,36 @@
+from typing import Dict, Optional
+
+from utils.constants import EMERGENCY_KEYWORDS, EMERGENCY_KEYWORD_TRANSLATIONS, RESPONSE_TEMPLATES
+from utils.keyword_matcher import KeywordMatcher
+from utils.language import script_language
+
+class EmergencyTriage:
+    """Local emergency check that runs before any model or LLM call.
+
+    One automaton holds the emergency keywords of every supported language,
+    labelled with their language, so a message is checked in a single pass
+    without language detection.
+    """
+
+    def __init__(self):
+        keywords = {keyword: 'english' for keyword in EMERGENCY_KEYWORDS}
+        for language, translations in EMERGENCY_KEYWORD_TRANSLATIONS.items():
+            keywords.update({keyword: language for keyword in translations})
+        self.matcher = KeywordMatcher(keywords)
+
+    def check(self, text: str) -> Optional[Dict]:
+        """Emergency reply for the message, or None when nothing urgent is mentioned"""
+        matches = self.matcher.find_all(text, overlapping=False)
+        if not matches:
+            return None
+
+        # Prefer the script of the whole message; Latin text replies in English
+        language = script_language(text) or 'english'
+        if language not in RESPONSE_TEMPLATES['emergency']:
+            language = matches[0].label if matches[0].label in RESPONSE_TEMPLATES['emergency'] else 'english'
+
+        return {
+            'language': language,
+            'matched_keywords': [match.keyword for match in matches],
+            'reply': RESPONSE_TEMPLATES['emergency'][language]
+        }
@@ -0,0 +1,321 @@
+import logging
+import os
+import queue
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Dict, Iterator
+
+import google.generativeai as genai
+from google.api_core import exceptions as google_exceptions
+
+from config.settings import Config
+from utils.metrics import RollingStats
+from utils.singleflight import SingleFlight
+
+# Errors worth another attempt: rate limiting, overload and dropped connections
+TRANSIENT_ERRORS = (
+    google_exceptions.TooManyRequests,
+    google_exceptions.ResourceExhausted,
+    google_exceptions.ServiceUnavailable,
+    google_exceptions.InternalServerError,
+    google_exceptions.DeadlineExceeded,
+    TimeoutError,
+    ConnectionError
+)
+
+class LLMUnavailable(RuntimeError):
+    """The gateway refused or gave up on a call; callers use their local fallback"""
+
+class CircuitBreaker:
+    """Fails fast after repeated errors instead of queueing behind a struggling API.
+
+    Opens after `failure_threshold` consecutive failed calls. While open,
+    calls are rejected until `reset_seconds` have passed; then a single
+    trial call is let through, and its outcome closes or reopens the
+    circuit.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_seconds: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self._lock = threading.Lock()
+        self.state = 'closed'
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.times_opened = 0
+
+    def allow(self) -> bool:
+        """Whether a call may go out now"""
+        with self._lock:
+            if self.state == 'closed':
+                return True
+            if self.state == 'open' and time.monotonic() - self.opened_at >= self.reset_seconds:
+                self.state = 'half_open'
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = 'closed'
+            self.consecutive_failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self.consecutive_failures += 1
+            if self.state == 'half_open' or self.consecutive_failures >= self.failure_threshold:
+                if self.state != 'open':
+                    self.times_opened += 1
+                self.state = 'open'
+                self.opened_at = time.monotonic()
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return {
+                'state': self.state,
+                'consecutive_failures': self.consecutive_failures,
+                'times_opened': self.times_opened
+            }
+
+class LLMGateway:
+    """Single path for every Gemini call in the process.
+
+    Configures the client once and bounds how much a slow API can hold up
+    request handling: at most `LLM_MAX_CONCURRENCY` calls are in flight,
+    callers wait at most `LLM_QUEUE_TIMEOUT` for a slot, each attempt is
+    abandoned after `LLM_TIMEOUT`, transient errors are retried with
+    jittered exponential backoff, and a circuit breaker rejects calls
+    outright while the API keeps failing. Every refusal raises
+    LLMUnavailable (or the last error), which callers already treat as
+    "use the local fallback".
+    """
+
+    def __init__(self, config: Config = None):
+        self.config = config or Config()
+        self.logger = logging.getLogger(__name__)
+
+        genai.configure(api_key=self.config.GEMINI_API_KEY)
+        self.model = genai.GenerativeModel(self.config.LLM_MODEL)
+
+        self.max_concurrency = self.config.LLM_MAX_CONCURRENCY
+        self.breaker = CircuitBreaker(self.config.LLM_BREAKER_THRESHOLD, self.config.LLM_BREAKER_RESET_SECONDS)
+
+        # Slots are released when the API call returns, not when the caller
+        # stops waiting, so abandoned calls still count against the limit
+        self._slots = threading.BoundedSemaphore(self.max_concurrency)
+        self._executor = None
+        self._executor_pid = None
+        self._executor_lock = threading.Lock()
+
+        self._stats_lock = threading.Lock()
+        self.waiting = 0
+        self.in_flight = 0
+        self.counts = {
+            'calls': 0, 'streams': 0, 'succeeded': 0, 'failed': 0, 'retries': 0, 'timeouts': 0,
+            'rejected_circuit_open': 0, 'rejected_queue_full': 0
+        }
+        self.calls_by_caller: Dict[str, int] = {}
+        # Identical prompts already in flight wait for that call instead of making their own
+        self.flight = SingleFlight('gemini-prompts')
+        self.latency_ms = RollingStats()
+        self.queue_wait_ms = RollingStats()
+        self.first_chunk_ms = RollingStats()
+
+    def _pool(self) -> ThreadPoolExecutor:
+        """Worker pool for the current process; threads do not survive a fork"""
+        with self._executor_lock:
+            if self._executor is None or self._executor_pid != os.getpid():
+                self._executor = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix='llm')
+                self._executor_pid = os.getpid()
+            return self._executor
+
+    def _count(self, key: str, amount: int = 1):
+        with self._stats_lock:
+            self.counts[key] += amount
+
+    def generate(self, prompt: str, caller: str = 'default', timeout: float = None, **kwargs):
+        """Gemini response for a prompt, within `timeout` seconds overall.
+
+        Extra keyword arguments go to `generate_content`. Concurrent calls
+        with the same prompt and arguments share one API call and its
+        response, which callers must not modify.
+        """
+        timeout = self.config.LLM_DEADLINE if timeout is None else timeout
+
+        with self._stats_lock:
+            self.counts['calls'] += 1
+            self.calls_by_caller[caller] = self.calls_by_caller.get(caller, 0) + 1
+
+        key = (prompt, repr(sorted(kwargs.items())))
+        return self.flight.do(key, self._generate, prompt, caller, timeout, kwargs, wait_timeout=timeout)
+
+    def _generate(self, prompt: str, caller: str, timeout: float, kwargs: Dict):
+        """One gateway call: circuit check, then attempts with retry"""
+        deadline = time.monotonic() + timeout
+
+        if not self.breaker.allow():
+            self._count('rejected_circuit_open')
+            raise LLMUnavailable("Gemini circuit is open")
+
+        attempt = 0
+        while True:
+            try:
+                response = self._attempt(prompt, deadline, kwargs)
+            except LLMUnavailable:
+                # A saturated queue means the API is not keeping up either
+                self.breaker.record_failure()
+                raise
+            except Exception as e:
+                transient = isinstance(e, TRANSIENT_ERRORS)
+                delay = random.uniform(0, self.config.LLM_RETRY_BASE_DELAY * 2 ** attempt)
+
+                if not transient or attempt >= self.config.LLM_MAX_RETRIES or time.monotonic() + delay >= deadline:
+                    self._count('failed')
+                    self.breaker.record_failure()
+                    raise
+
+                attempt += 1
+                self._count('retries')
+                self.logger.warning(f"Retrying Gemini call for {caller} after {type(e).__name__} (attempt {attempt})")
+                time.sleep(delay)
+                continue
+
+            self._count('succeeded')
+            self.breaker.record_success()
+            return response
+
+    def _acquire_slot(self, deadline: float):
+        """Wait for a free slot, at most LLM_QUEUE_TIMEOUT or until the deadline"""
+        started = time.perf_counter()
+        with self._stats_lock:
+            self.waiting += 1
+        try:
+            wait = max(0.0, min(self.config.LLM_QUEUE_TIMEOUT, deadline - time.monotonic()))
+            acquired = self._slots.acquire(timeout=wait)
+        finally:
+            with self._stats_lock:
+                self.waiting -= 1
+        self.queue_wait_ms.record((time.perf_counter() - started) * 1000)
+
+        if not acquired:
+            self._count('rejected_queue_full')
+            raise LLMUnavailable("No free Gemini slot")
+
+        with self._stats_lock:
+            self.in_flight += 1
+
+    def _attempt(self, prompt: str, deadline: float, kwargs: Dict):
+        """One call on the worker pool, bounded by the remaining time"""
+        self._acquire_slot(deadline)
+        started = time.perf_counter()
+        try:
+            future = self._pool().submit(self.model.generate_content, prompt, **kwargs)
+        except Exception:
+            self._release()
+            raise
+        future.add_done_callback(lambda _: self._release())
+
+        try:
+            response = future.result(timeout=max(0.0, min(self.config.LLM_TIMEOUT, deadline - time.monotonic())))
+        except FutureTimeoutError:
+            self._count('timeouts')
+            raise TimeoutError("Gemini call timed out")
+        self.latency_ms.record((time.perf_counter() - started) * 1000)
+        return response
+
+    def stream(self, prompt: str, caller: str = 'default', timeout: float = None, **kwargs) -> Iterator[str]:
+        """Text chunks of a streamed Gemini response, as they arrive.
+
+        Each chunk must arrive within LLM_TIMEOUT of the previous one and
+        the whole stream within `timeout`. Streams are not retried, since
+        text already sent to the user cannot be taken back. Closing the
+        iterator early stops reading the response.
+        """
+        timeout = self.config.LLM_DEADLINE if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+
+        with self._stats_lock:
+            self.counts['calls'] += 1
+            self.counts['streams'] += 1
+            self.calls_by_caller[caller] = self.calls_by_caller.get(caller, 0) + 1
+
+        if not self.breaker.allow():
+            self._count('rejected_circuit_open')
+            raise LLMUnavailable("Gemini circuit is open")
+        try:
+            self._acquire_slot(deadline)
+        except LLMUnavailable:
+            self.breaker.record_failure()
+            raise
+
+        chunks = queue.Queue()
+        cancelled = threading.Event()
+
+        def produce():
+            try:
+                for part in self.model.generate_content(prompt, stream=True, **kwargs):
+                    if cancelled.is_set():
+                        break
+                    chunks.put(('chunk', part.text))
+                chunks.put(('end', None))
+            except Exception as e:
+                chunks.put(('error', e))
+            finally:
+                self._release()
+
+        started = time.perf_counter()
+        try:
+            self._pool().submit(produce)
+        except Exception:
+            self._release()
+            raise
+
+        first_chunk = True
+        try:
+            while True:
+                try:
+                    kind, value = chunks.get(timeout=max(0.0, min(self.config.LLM_TIMEOUT, deadline - time.monotonic())))
+                except queue.Empty:
+                    self._count('timeouts')
+                    raise TimeoutError("Gemini stream stalled")
+                if kind == 'error':
+                    raise value
+                if kind == 'end':
+                    break
+                if first_chunk:
+                    self.first_chunk_ms.record((time.perf_counter() - started) * 1000)
+                    first_chunk = False
+                yield value
+        except Exception:
+            self._count('failed')
+            self.breaker.record_failure()
+            raise
+        else:
+            self._count('succeeded')
+            self.breaker.record_success()
+            self.latency_ms.record((time.perf_counter() - started) * 1000)
+        finally:
+            cancelled.set()
+
+    def _release(self):
+        with self._stats_lock:
+            self.in_flight -= 1
+        self._slots.release()
+
+    def get_stats(self) -> Dict:
+        """Queue depth, in-flight calls, outcomes, latency and circuit state"""
+        with self._stats_lock:
+            stats = {
+                'queue_depth': self.waiting,
+                'in_flight': self.in_flight,
+                'max_concurrency': self.max_concurrency,
+                **self.counts,
+                'calls_by_caller': dict(self.calls_by_caller)
+            }
+        stats['circuit'] = self.breaker.get_stats()
+        stats['singleflight'] = self.flight.get_stats()
+        stats['latency_ms'] = self.latency_ms.summary()
+        stats['queue_wait_ms'] = self.queue_wait_ms.summary()
+        stats['first_chunk_ms'] = self.first_chunk_ms.summary()
+        return stats
@@ -2,6 +2,8 @@ import googlemaps
 from typing import Dict, List, Tuple
 import logging
 from config.settings import Config
+from utils.deadline import Deadline
+from utils.singleflight import SingleFlight
 
 class LocationService:
     def __init__(self):
@@ -11,6 +13,10 @@ class LocationService:
         # Initialize Google Maps client
         self.gmaps = googlemaps.Client(key=self.config.GOOGLE_MAPS_API_KEY)
         
+        # Users in one place asking at the same moment share a single Places call
+        self.places_flight = SingleFlight('places-nearby')
+        self.details_flight = SingleFlight('place-details')
+        
         # Emergency contacts for Indian cities
         self.emergency_contacts = {
             'mumbai': ['+91-22-24177777', '+91-22-24171111'],
@@ -20,8 +26,12 @@ class LocationService:
             'bangalore': ['+91-80-22344444', '+91-80-22555555']
         }
 
-    def find_nearby_hospitals(self, user_location: Dict, severity: str) -> List[Dict]:
-        """Find nearby hospitals based on severity"""
+    def find_nearby_hospitals(self, user_location: Dict, severity: str, deadline: Deadline = None) -> List[Dict]:
+        """Find nearby hospitals based on severity.
+        
+        With a `deadline`, places are no longer looked up once it has
+        passed and the hospitals found so far are returned.
+        """
         try:
             # Extract coordinates
             if 'lat' in user_location and 'lng' in user_location:
@@ -45,12 +55,7 @@ class LocationService:
             
             for search_type in search_types:
                 try:
-                    places_result = self.gmaps.places_nearby(
-                        location=location,
-                        radius=radius,
-                        type=search_type,
-                        language='en'
-                    )
+                    places_result = self._places_nearby(location, radius, search_type)
                     all_places.extend(places_result.get('results', []))
                 except Exception as e:
                     self.logger.error(f"Error searching for {search_type}: {e}")
@@ -58,6 +63,9 @@ class LocationService:
             # Process and rank results
             hospitals = []
             for place in all_places[:10]:  # Limit to top 10
+                if deadline is not None and deadline.expired():
+                    self.logger.warning(f"Request deadline reached after {len(hospitals)} hospitals")
+                    break
                 try:
                     hospital_info = self._process_hospital_info(place, location)
                     if hospital_info:
@@ -74,6 +82,20 @@ class LocationService:
             self.logger.error(f"Error finding hospitals: {e}")
             return []
 
+    def _places_nearby(self, location: Tuple, radius: int, search_type: str) -> Dict:
+        """Places search, shared by concurrent searches from (nearly) the same spot.
+        
+        Coordinates are rounded to PLACES_COORDINATE_DECIMALS so that users a
+        few metres apart make the same request; distances still use each
+        user's exact location.
+        """
+        decimals = self.config.PLACES_COORDINATE_DECIMALS
+        search_location = (round(location[0], decimals), round(location[1], decimals))
+        return self.places_flight.do(
+            (search_location, radius, search_type), self.gmaps.places_nearby,
+            location=search_location, radius=radius, type=search_type, language='en'
+        )
+
     def _process_hospital_info(self, place: Dict, user_location: Tuple) -> Dict:
         """Process individual hospital information"""
         try:
@@ -118,7 +140,7 @@ class LocationService:
         """Get detailed information about a place"""
         try:
             fields = ['phone_number', 'website', 'opening_hours']
-            details = self.gmaps.place(place_id=place_id, fields=fields)
+            details = self.details_flight.do(place_id, self.gmaps.place, place_id=place_id, fields=fields)
             return details.get('result', {})
         except Exception as e:
             self.logger.error(f"Error getting place details: {e}")
@@ -172,6 +194,13 @@ class LocationService:
         
         return c * r
 
+    def get_stats(self) -> Dict:
+        """Places calls made and collapsed onto concurrent identical ones"""
+        return {
+            'places_nearby': self.places_flight.get_stats(),
+            'place_details': self.details_flight.get_stats()
+        }
+
     def get_emergency_contacts(self, city: str) -> List[str]:
         """Get emergency contacts for a city"""
         city_lower = city.lower()
@@ -0,0 +1,190 @@
+import gc
+import logging
+import os
+import threading
+import time
+from typing import Callable, Dict
+
+from config.settings import Config
+from utils.helpers import get_process_memory_mb, get_memory_sharing_mb
+
+def _build_symptom_detector():
+    from models.symptom_detector import SymptomDetector
+    return SymptomDetector()
+
+def _build_disease_identifier():
+    from models.disease_identifier import DiseaseIdentifier
+    return DiseaseIdentifier()
+
+def _build_gemini_handler():
+    from models.gemini_handler import GeminiHandler
+    return GeminiHandler()
+
+def _build_llm_gateway():
+    from services.llm_gateway import LLMGateway
+    return LLMGateway()
+
+def _build_location_service():
+    from services.location_service import LocationService
+    return LocationService()
+
+def _build_database_service():
+    from services.database_service import DatabaseService
+    return DatabaseService()
+
+def _build_voice_service():
+    from services.voice_service import VoiceService
+    return VoiceService()
+
+def _build_chat_service():
+    from services.chat_service import ChatService
+    return ChatService()
+
+# Components ChatService is built from
+CHAT_SERVICE_COMPONENTS = (
+    'symptom_detector', 'disease_identifier', 'gemini_handler',
+    'location_service', 'database_service'
+)
+
+class ModelRegistry:
+    """Process-wide owner of heavy models and API clients.
+    
+    Every component is built at most once per process and shared by all
+    blueprints. Calling `preload()` in the gunicorn master (with --preload)
+    loads model weights before workers fork, so workers share those pages
+    copy-on-write instead of each holding a private copy.
+    """
+    
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(ModelRegistry, cls).__new__(cls)
+            cls._instance._initialized = False
+        return cls._instance
+
+    def __init__(self):
+        if self._initialized:
+            return
+        
+        self.config = Config()
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.RLock()
+        self._components = {}
+        self._memory_mb = {}
+        self._load_seconds = {}
+        self._preloaded_pid = None
+        self._preloaded = set()
+        self._factories: Dict[str, Callable] = {
+            'symptom_detector': _build_symptom_detector,
+            'disease_identifier': _build_disease_identifier,
+            'gemini_handler': _build_gemini_handler,
+            'llm_gateway': _build_llm_gateway,
+            'location_service': _build_location_service,
+            'database_service': _build_database_service,
+            'voice_service': _build_voice_service,
+            'chat_service': _build_chat_service
+        }
+        self._initialized = True
+
+    def register(self, name: str, factory: Callable):
+        """Register or replace the factory for a component"""
+        with self._lock:
+            self._factories[name] = factory
+            self._components.pop(name, None)
+
+    def get(self, name: str):
+        """Get a component, building it on first use"""
+        component = self._components.get(name)
+        if component is not None:
+            return component
+        
+        with self._lock:
+            if name not in self._components:
+                if name not in self._factories:
+                    raise KeyError(f"Unknown component: {name}")
+                
+                rss_before = get_process_memory_mb()
+                nested_before = sum(self._memory_mb.values())
+                started = time.perf_counter()
+                self._components[name] = self._factories[name]()
+                self._load_seconds[name] = round(time.perf_counter() - started, 2)
+                
+                # Don't count components that were built as dependencies of this one
+                nested_mb = sum(self._memory_mb.values()) - nested_before
+                self._memory_mb[name] = round(get_process_memory_mb() - rss_before - nested_mb, 1)
+                
+                self.logger.info(
+                    f"Loaded {name} in {self._load_seconds[name]}s (+{self._memory_mb[name]} MB)"
+                )
+            
+            return self._components[name]
+
+    def is_loaded(self, name: str) -> bool:
+        """Check whether a component has been built in this process"""
+        return name in self._components
+
+    def preload(self, names=None):
+        """Load fork-safe heavy components up front, typically in the gunicorn master.
+        
+        Only model weights are preloaded by default: gRPC-backed clients
+        (Gemini, Firestore) must be created after fork, so they stay lazy.
+        """
+        names = names or self.config.PRELOAD_COMPONENTS
+        
+        for name in names:
+            try:
+                self.get(name)
+            except Exception as e:
+                self.logger.error(f"Error preloading {name}: {e}")
+        
+        # Move everything allocated so far out of the GC's generations, so
+        # collections in the workers don't touch (and un-share) those pages
+        gc.collect()
+        if hasattr(gc, 'freeze'):
+            gc.freeze()
+        
+        self._preloaded_pid = os.getpid()
+        self._preloaded = set(self._components)
+        self.logger.info(f"Preloaded {', '.join(names)} ({self.preloaded_memory_mb()} MB)")
+
+    def preloaded_memory_mb(self) -> float:
+        """Resident memory attributed to components loaded so far"""
+        return round(sum(self._memory_mb.values()), 1)
+
+    def memory_report(self) -> Dict:
+        """Memory held by each component and how much of it this worker saves"""
+        forked = self._preloaded_pid is not None and self._preloaded_pid != os.getpid()
+        process_memory = get_memory_sharing_mb()
+        
+        # chat and voice routes each used to build their own ChatService
+        deduplicated_mb = sum(
+            self._memory_mb.get(name, 0) for name in CHAT_SERVICE_COMPONENTS
+            if name in self._components
+        )
+        
+        # Pages inherited from the preloaded master stay shared until written
+        inherited_mb = 0.0
+        if forked:
+            inherited_mb = sum(self._memory_mb.get(name, 0) for name in self._preloaded)
+            if process_memory['shared'] is not None:
+                inherited_mb = min(inherited_mb, process_memory['shared'])
+        
+        return {
+            'pid': os.getpid(),
+            'forked_from_preloaded_master': forked,
+            'preloaded_components': sorted(self._preloaded),
+            'components': {
+                name: {'rss_mb': self._memory_mb.get(name), 'load_seconds': self._load_seconds.get(name)}
+                for name in self._components
+            },
+            'process_memory_mb': process_memory,
+            'saved_per_worker_mb': {
+                'deduplicated': round(deduplicated_mb, 1),
+                'shared_with_master': round(inherited_mb, 1),
+                'total': round(deduplicated_mb + inherited_mb, 1)
+            }
+        }
+
+# Global instance
+model_registry = ModelRegistry()
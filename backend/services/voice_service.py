@@ -6,7 +6,7 @@ import tempfile
 from pydub import AudioSegment
 from typing import Dict, Optional
 import logging
-from langdetect import detect
+from utils.language import detect_language
 
 class VoiceService:
     def __init__(self):
@@ -117,18 +117,7 @@ class VoiceService:
     
     def detect_language(self, text: str) -> str:
         """Detect language of text"""
-        try:
-            detected = detect(text)
-            language_map = {
-                'hi': 'hindi',
-                'ta': 'tamil',
-                'te': 'telugu',
-                'bn': 'bengali',
-                'en': 'english'
-            }
-            return language_map.get(detected, 'english')
-        except:
-            return 'english'
+        return detect_language(text)
     
     def process_audio_input(self, audio_data: bytes) -> Dict:
         """Process audio input and return text with language detection"""
@@ -1,6 +1,20 @@
 # Tests package init
 from .test_api import TestAPI
 from .test_symptom_detection import TestSymptomDetection
-from .test_disease_model import TestDiseaseModel
+from .test_disease_model import (
+    TestDiseaseModel, TestInferenceBatcher, TestDifferentialRanking, TestOnnxBackend, TestCascadeClassifier,
+    TestInferenceServer, TestPredictionExplanation, TestSymptomNormalizer, TestLabelMetadata,
+    TestAdaptiveQuestioner, TestBatchEvaluation, TestManagedModel
+)
+from .test_chat_service import TestEmergencyTriage, TestChatService, TestLocationService, TestLLMGateway
+from .test_utils import (
+    TestLRUCache, TestPersistentLRUCache, TestSemanticCache, TestSingleFlight, TestLanguageDetection,
+    TestKeywordMatcher
+)
 
-__all__ = ['TestAPI', 'TestSymptomDetection', 'TestDiseaseModel']
\ No newline at end of file
+__all__ = ['TestAPI', 'TestSymptomDetection', 'TestDiseaseModel', 'TestInferenceBatcher', 'TestDifferentialRanking',
+           'TestOnnxBackend', 'TestCascadeClassifier', 'TestInferenceServer', 'TestPredictionExplanation',
+           'TestSymptomNormalizer', 'TestLabelMetadata', 'TestAdaptiveQuestioner', 'TestBatchEvaluation',
+           'TestManagedModel', 'TestLRUCache', 'TestPersistentLRUCache', 'TestSemanticCache', 'TestSingleFlight',
+           'TestLanguageDetection', 'TestKeywordMatcher', 'TestEmergencyTriage', 'TestChatService',
+           'TestLocationService', 'TestLLMGateway']
@@ -71,6 +71,16 @@ class TestAPI(unittest.TestCase):
         )
         self.assertEqual(response.status_code, 400)
     
+    def test_chat_stream_validation(self):
+        """Test the streaming endpoint rejects incomplete requests before streaming"""
+        for payload in ({'user_id': 'test_user'}, {'message': 'Hello'}, {'message': '  ', 'user_id': 'test_user'}):
+            response = self.client.post(
+                '/api/chat/stream',
+                data=json.dumps(payload),
+                content_type='application/json'
+            )
+            self.assertEqual(response.status_code, 400)
+    
     def test_hospital_search_endpoint(self):
         """Test hospital search endpoint"""
         payload = {
@@ -0,0 +1,536 @@
+import unittest
+import json
+import shutil
+import sys
+import os
+import tempfile
+import threading
+import time
+from unittest import mock
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from google.api_core.exceptions import ServiceUnavailable, TooManyRequests
+
+from config.settings import Config
+from utils.constants import API_CONFIG
+from services.chat_service import ChatService
+from services.llm_gateway import LLMGateway, LLMUnavailable
+from models.gemini_handler import GeminiHandler
+from services.emergency_triage import EmergencyTriage
+from services.location_service import LocationService
+
+class _FakeSymptomDetector:
+    def __init__(self):
+        self.release = threading.Event()
+        self.calls = []
+
+    def analyze_input(self, text, draft_reply=False, timeout=None):
+        self.calls.append(text)
+        self.release.wait(5)
+        return {
+            "has_symptoms": True,
+            "symptoms": ["chest pain"],
+            "original_language": "english",
+            "urgency": "high",
+            "medical_context": True,
+            "confidence": 0.9
+        }
+
+class _FakeDiseaseIdentifier:
+    def predict_disease(self, symptoms, explain=False):
+        return {
+            "disease": "Heart attack",
+            "confidence": 0.8,
+            "severity": "high",
+            "recommendations": ["Seek immediate medical attention"],
+            "requires_immediate_attention": True,
+            "differential": []
+        }
+
+    def get_follow_up_questions(self, disease, symptoms, differential=None):
+        return ["Does the pain spread to your arm?"]
+
+class _FakeLocationService:
+    def find_nearby_hospitals(self, location, severity, deadline=None):
+        return [{"name": "City Hospital", "severity": severity}]
+
+class _FakeDatabaseService:
+    def __init__(self):
+        self.stored = []
+        self.event = threading.Event()
+
+    def store_conversation(self, user_id, conversation_data):
+        self.stored.append(conversation_data)
+        self.event.set()
+
+class _FusedSymptomDetector:
+    """Returns what a fused Gemini call would, recording whether a reply was requested"""
+
+    def __init__(self, analysis):
+        self.analysis = analysis
+        self.draft_requests = []
+
+    def analyze_input(self, text, draft_reply=False, timeout=None):
+        self.draft_requests.append(draft_reply)
+        return dict(self.analysis)
+
+class _FakeGeminiHandler:
+    def __init__(self):
+        self.calls = []
+
+    def generate_health_guidance(self, user_input, language, timeout=None):
+        self.calls.append(user_input)
+        return "Separate guidance reply"
+
+    def fallback_guidance(self, language):
+        return "Template reply"
+
+class _TranslatingGeminiHandler:
+    def __init__(self):
+        self.calls = []
+
+    def translate_batch(self, texts, target_language, timeout=None, remembered_only=False):
+        self.calls.append((list(texts), remembered_only))
+        return list(texts) if remembered_only else [f"[{target_language}] {text}" for text in texts]
+
+class _StreamingGeminiHandler:
+    def __init__(self, chunks):
+        self.chunks = chunks
+
+    def stream_health_guidance(self, user_input, language, timeout=None):
+        yield from self.chunks
+
+def build_chat_service(**overrides):
+    """ChatService wired to in-memory fakes instead of models and API clients"""
+    components = {
+        'symptom_detector': _FakeSymptomDetector(),
+        'disease_identifier': _FakeDiseaseIdentifier(),
+        'gemini_handler': object(),
+        'location_service': _FakeLocationService(),
+        'database_service': _FakeDatabaseService()
+    }
+    components.update(overrides)
+    return ChatService(**components)
+
+class TestEmergencyTriage(unittest.TestCase):
+
+    def setUp(self):
+        self.triage = EmergencyTriage()
+
+    def test_matches_every_language(self):
+        """Test emergencies are caught and answered in the message's language"""
+        test_cases = [
+            ("I have severe CHEST PAIN", "english"),
+            ("मुझे सीने में दर्द हो रहा है", "hindi"),
+            ("எனக்கு நெஞ்சு வலி", "tamil"),
+            ("నాకు ఛాతీ నొప్పి", "telugu"),
+            ("আমার বুকে ব্যথা", "bengali")
+        ]
+
+        for text, language in test_cases:
+            with self.subTest(text=text):
+                result = self.triage.check(text)
+                self.assertIsNotNone(result)
+                self.assertEqual(result['language'], language)
+                self.assertIn('108', result['reply'])
+
+    def test_non_emergency(self):
+        """Test ordinary symptoms do not trigger the fast path"""
+        self.assertIsNone(self.triage.check("I have a mild cough"))
+
+class TestChatService(unittest.TestCase):
+
+    def test_emergency_reply_before_enrichment(self):
+        """Test the emergency reply returns while the diagnosis is still running"""
+        service = build_chat_service()
+        response = service.process_message("chest pain, can't breathe", "user-1", {"lat": 12.9, "lng": 77.6})
+
+        self.assertTrue(response['requires_immediate_attention'])
+        self.assertIn('108', response['bot_reply'])
+        self.assertEqual(response['hospitals'][0]['severity'], 'high')
+        self.assertEqual(response['enrichment']['status'], 'pending')
+        self.assertEqual(service.get_enrichment(response['enrichment']['id'])['status'], 'pending')
+
+        service.symptom_detector.release.set()
+        self.assertTrue(service.database_service.event.wait(5))
+
+        enrichment = service.get_enrichment(response['enrichment']['id'])
+        self.assertEqual(enrichment['status'], 'complete')
+        self.assertEqual(enrichment['disease_prediction']['disease'], 'Heart attack')
+        self.assertEqual(service.database_service.stored[0]['enrichment']['status'], 'complete')
+        self.assertEqual(service.get_stats()['time_to_emergency_reply_ms']['count'], 1)
+    
+    def test_fused_reply_skips_guidance_call(self):
+        """Test a reply drafted during symptom detection is used without a second Gemini call"""
+        detector = _FusedSymptomDetector({
+            "has_symptoms": False, "symptoms": [], "original_language": "english", "urgency": "low",
+            "medical_context": False, "confidence": 0.9, "reply": "Drink plenty of water."
+        })
+        gemini_handler = _FakeGeminiHandler()
+        service = build_chat_service(symptom_detector=detector, gemini_handler=gemini_handler)
+        
+        response = service.process_message("How much water should I drink every day?", "user-2")
+        
+        self.assertEqual(response['bot_reply'], "Drink plenty of water.")
+        self.assertNotIn('reply', response['symptom_analysis'])
+        self.assertEqual(gemini_handler.calls, [])
+        self.assertEqual(detector.draft_requests, [service.config.FUSED_LLM_CALL])
+        self.assertEqual(service.get_stats()['general_replies'], {'fused': 1, 'guidance': 0, 'template': 0})
+    
+    def test_structured_fields_drive_medical_flow(self):
+        """Test extracted symptoms and urgency still drive the diagnosis"""
+        detector = _FusedSymptomDetector({
+            "has_symptoms": True, "symptoms": ["fever", "cough"], "original_language": "english",
+            "urgency": "medium", "medical_context": True, "confidence": 0.9, "reply": ""
+        })
+        disease_identifier = _FakeDiseaseIdentifier()
+        with mock.patch.object(disease_identifier, 'predict_disease',
+                               wraps=disease_identifier.predict_disease) as predict:
+            service = build_chat_service(symptom_detector=detector, disease_identifier=disease_identifier)
+            response = service.process_message("fever and cough for two days", "user-3")
+        
+        predict.assert_called_once_with(["fever", "cough"], explain=False)
+        self.assertEqual(response['message_type'], 'medical')
+        self.assertEqual(response['urgency_level'], 'medium')
+    
+    def test_advice_translated_in_one_call(self):
+        """Test recommendations and follow-up questions are translated together for non-English users"""
+        detector = _FusedSymptomDetector({
+            "has_symptoms": True, "symptoms": ["fever"], "original_language": "hindi",
+            "urgency": "medium", "medical_context": True, "confidence": 0.9
+        })
+        gemini_handler = _TranslatingGeminiHandler()
+        service = build_chat_service(symptom_detector=detector, gemini_handler=gemini_handler)
+        response = service.process_message("मुझे बुखार है", "user-9")
+        
+        self.assertEqual(gemini_handler.calls, [
+            (["Seek immediate medical attention", "Does the pain spread to your arm?"], False)
+        ])
+        self.assertEqual(response['disease_prediction']['recommendations'], ["[hindi] Seek immediate medical attention"])
+        self.assertEqual(response['follow_up_questions'], ["[hindi] Does the pain spread to your arm?"])
+        
+        with mock.patch.dict(API_CONFIG, {'request_timeout': 0.5}):
+            response = service.process_message("मुझे बुखार है", "user-9")
+        self.assertTrue(gemini_handler.calls[-1][1])  # remembered translations only
+        self.assertEqual(response['skipped_stages'], ['translation'])
+    
+    def test_out_of_budget_stages_degrade(self):
+        """Test stages without enough time left fall back and are listed as skipped"""
+        general = _FusedSymptomDetector({
+            "has_symptoms": False, "symptoms": [], "original_language": "english", "urgency": "low",
+            "medical_context": False, "confidence": 0.9
+        })
+        gemini_handler = _FakeGeminiHandler()
+        service = build_chat_service(symptom_detector=general, gemini_handler=gemini_handler)
+        
+        with mock.patch.dict(API_CONFIG, {'request_timeout': 0.5}):
+            response = service.process_message("How much water should I drink?", "user-6")
+        
+        self.assertEqual(response['bot_reply'], "Template reply")
+        self.assertEqual(response['skipped_stages'], ['reply'])
+        self.assertEqual(gemini_handler.calls, [])
+        # Too little time left to wait for the database, so it is written in the background
+        self.assertTrue(service.database_service.event.wait(5))
+        self.assertEqual(service.database_service.stored[0]['skipped_stages'], ['reply'])
+        
+        medical = _FusedSymptomDetector({
+            "has_symptoms": True, "symptoms": ["fever"], "original_language": "english",
+            "urgency": "medium", "medical_context": True, "confidence": 0.9
+        })
+        service = build_chat_service(symptom_detector=medical)
+        with mock.patch.dict(API_CONFIG, {'request_timeout': 2}):
+            response = service.process_message("fever since yesterday", "user-7", {"lat": 20.3, "lng": 85.8})
+        
+        self.assertEqual(response['hospitals'], [])
+        self.assertEqual(response['skipped_stages'], ['hospital_search'])
+        self.assertEqual(service.get_stats()['skipped_stages']['hospital_search'], 1)
+    
+    def test_stage_budget_recorded(self):
+        """Test each stage's share of the request budget lands in its histogram"""
+        detector = _FusedSymptomDetector({
+            "has_symptoms": True, "symptoms": ["fever"], "original_language": "english",
+            "urgency": "medium", "medical_context": True, "confidence": 0.9
+        })
+        service = build_chat_service(symptom_detector=detector)
+        response = service.process_message("fever since yesterday", "user-8", {"lat": 20.3, "lng": 85.8})
+        
+        self.assertEqual(response['skipped_stages'], [])
+        self.assertEqual(response['hospitals'][0]['severity'], 'high')
+        budget = service.get_stats()['stage_budget_pct']
+        for stage in ('symptom_detection', 'classification', 'hospital_search', 'follow_up_questions',
+                      'store_conversation', 'total'):
+            self.assertEqual(budget[stage]['count'], 1, stage)
+            self.assertEqual(budget[stage]['buckets']['le_1'], 1, stage)
+        self.assertEqual(budget['reply']['count'], 0)
+    
+    def test_stream_events(self):
+        """Test the stream sends structured fields first, then reply tokens, then the stored response"""
+        detector = _FusedSymptomDetector({
+            "has_symptoms": False, "symptoms": [], "original_language": "english", "urgency": "low",
+            "medical_context": False, "confidence": 0.9
+        })
+        service = build_chat_service(
+            symptom_detector=detector, gemini_handler=_StreamingGeminiHandler(["Drink ", "more ", "water."])
+        )
+        
+        events = []
+        for event, data in service.stream_message("How much water should I drink?", "user-4"):
+            events.append(event)
+            if event != "done":
+                self.assertEqual(service.database_service.stored, [])
+            if event == "meta":
+                self.assertEqual(data['message_type'], 'general')
+                self.assertNotIn('bot_reply', data)
+        
+        self.assertEqual(events, ["meta", "token", "token", "token", "done"])
+        self.assertEqual(data['bot_reply'], "Drink more water.")
+        self.assertEqual(service.database_service.stored, [data])
+        self.assertEqual(service.get_stats()['general_replies'], {'fused': 0, 'guidance': 1, 'template': 0})
+    
+    def test_stream_emergency(self):
+        """Test an emergency is answered with a single final event"""
+        service = build_chat_service()
+        events = list(service.stream_message("chest pain, can't breathe", "user-5"))
+        service.symptom_detector.release.set()
+        
+        self.assertEqual([event for event, _ in events], ["done"])
+        self.assertTrue(events[0][1]['requires_immediate_attention'])
+
+class _FakeGenerativeModel:
+    """Raises the queued errors in order, then answers; optionally blocks on an event"""
+    def __init__(self, errors=(), release=None):
+        self.errors = list(errors)
+        self.release = release
+        self.calls = 0
+        self.active = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def generate_content(self, prompt, stream=False):
+        with self._lock:
+            self.calls += 1
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        try:
+            if self.release is not None:
+                self.release.wait(5)
+            if self.errors:
+                raise self.errors.pop(0)
+            if stream:
+                return [mock.Mock(text=word) for word in ("reply ", "to ", prompt)]
+            return mock.Mock(text=f"reply to {prompt}")
+        finally:
+            with self._lock:
+                self.active -= 1
+
+class TestLocationService(unittest.TestCase):
+
+    def test_nearby_searches_collapse(self):
+        """Test users a few metres apart searching together share the Places calls"""
+        gmaps = mock.Mock()
+        
+        def places_nearby(**kwargs):
+            # Hold each search until the other two users have joined it
+            deadline = time.monotonic() + 2
+            while service.places_flight.collapsed < 2 * gmaps.places_nearby.call_count and time.monotonic() < deadline:
+                time.sleep(0.005)
+            return {'results': [{
+                'place_id': 'p1', 'name': 'PHC', 'rating': 4.0, 'types': ['hospital'],
+                'geometry': {'location': {'lat': 20.301, 'lng': 85.821}}
+            }]}
+        
+        gmaps.places_nearby.side_effect = places_nearby
+        gmaps.place.return_value = {'result': {'phone': '0674-000000'}}
+        gmaps.distance_matrix.side_effect = RuntimeError("no key")
+        with mock.patch('services.location_service.googlemaps.Client', return_value=gmaps):
+            service = LocationService()
+        
+        results = []
+        locations = [{'lat': 20.30001, 'lng': 85.82001}, {'lat': 20.30002, 'lng': 85.82003}, {'lat': 20.3, 'lng': 85.82}]
+        threads = [
+            threading.Thread(target=lambda location=location: results.append(
+                service.find_nearby_hospitals(location, 'medium')
+            ))
+            for location in locations
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(5)
+        
+        self.assertEqual(gmaps.places_nearby.call_count, 2)  # hospital and clinic searches, once each
+        self.assertEqual(service.get_stats()['places_nearby']['collapsed'], 4)
+        self.assertEqual([hospitals[0]['phone'] for hospitals in results], ['0674-000000'] * 3)
+
+class TestLLMGateway(unittest.TestCase):
+
+    def _gateway(self, model, **settings):
+        config = Config()
+        config.LLM_RETRY_BASE_DELAY = 0.001
+        for name, value in settings.items():
+            setattr(config, name, value)
+        gateway = LLMGateway(config)
+        gateway.model = model
+        return gateway
+
+    def test_transient_errors_retried(self):
+        """Test overload errors are retried and other errors are not"""
+        gateway = self._gateway(_FakeGenerativeModel([ServiceUnavailable("busy"), TooManyRequests("slow down")]))
+        self.assertEqual(gateway.generate("hi").text, "reply to hi")
+        self.assertEqual(gateway.get_stats()['retries'], 2)
+        
+        gateway = self._gateway(_FakeGenerativeModel([ValueError("bad prompt")]))
+        with self.assertRaises(ValueError):
+            gateway.generate("hi")
+        self.assertEqual(gateway.model.calls, 1)
+    
+    def test_timeout(self):
+        """Test a hung call is abandoned after the per-attempt timeout"""
+        release = threading.Event()
+        gateway = self._gateway(_FakeGenerativeModel(release=release), LLM_TIMEOUT=0.05, LLM_MAX_RETRIES=0)
+        try:
+            with self.assertRaises(TimeoutError):
+                gateway.generate("hi")
+            self.assertEqual(gateway.get_stats()['timeouts'], 1)
+        finally:
+            release.set()
+    
+    def test_circuit_breaker(self):
+        """Test repeated failures open the circuit and a trial call closes it again"""
+        model = _FakeGenerativeModel([ValueError("down")] * 2)
+        gateway = self._gateway(model, LLM_BREAKER_THRESHOLD=2, LLM_BREAKER_RESET_SECONDS=0.05)
+        for _ in range(2):
+            with self.assertRaises(ValueError):
+                gateway.generate("hi")
+        
+        with self.assertRaises(LLMUnavailable):
+            gateway.generate("hi")
+        self.assertEqual(model.calls, 2)
+        self.assertEqual(gateway.get_stats()['circuit']['state'], 'open')
+        
+        time.sleep(0.06)
+        self.assertEqual(gateway.generate("hi").text, "reply to hi")
+        self.assertEqual(gateway.get_stats()['circuit']['state'], 'closed')
+    
+    def test_concurrency_cap(self):
+        """Test calls beyond the limit wait in the queue and are rejected when no slot frees up"""
+        release = threading.Event()
+        model = _FakeGenerativeModel(release=release)
+        gateway = self._gateway(model, LLM_MAX_CONCURRENCY=2, LLM_QUEUE_TIMEOUT=5)
+        
+        results = []
+        threads = [
+            threading.Thread(target=lambda prompt=f"hi {index}": results.append(gateway.generate(prompt)))
+            for index in range(4)
+        ]
+        for thread in threads:
+            thread.start()
+        deadline = time.monotonic() + 2
+        while (gateway.get_stats()['queue_depth'] < 2 or model.active < 2) and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(gateway.get_stats()['queue_depth'], 2)
+        self.assertEqual(gateway.get_stats()['in_flight'], 2)
+        
+        release.set()
+        for thread in threads:
+            thread.join(5)
+        self.assertEqual(len(results), 4)
+        self.assertEqual(model.peak, 2)
+        
+        blocked = threading.Event()
+        gateway = self._gateway(_FakeGenerativeModel(release=blocked), LLM_MAX_CONCURRENCY=1, LLM_QUEUE_TIMEOUT=0.05)
+        try:
+            threading.Thread(target=gateway.generate, args=("first",), daemon=True).start()
+            while gateway.get_stats()['in_flight'] < 1:
+                time.sleep(0.01)
+            with self.assertRaises(LLMUnavailable):
+                gateway.generate("second")
+            self.assertEqual(gateway.get_stats()['rejected_queue_full'], 1)
+        finally:
+            blocked.set()
+    
+    def test_identical_prompts_collapse(self):
+        """Test concurrent calls with the same prompt share one API call"""
+        release = threading.Event()
+        model = _FakeGenerativeModel(release=release)
+        gateway = self._gateway(model)
+        
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(gateway.generate("same"))) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        deadline = time.monotonic() + 2
+        while gateway.get_stats()['singleflight']['collapsed'] < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        release.set()
+        for thread in threads:
+            thread.join(5)
+        
+        self.assertEqual(model.calls, 1)
+        self.assertEqual([result.text for result in results], ["reply to same"] * 3)
+        self.assertEqual(gateway.get_stats()['singleflight']['collapsed'], 2)
+    
+    def test_stream(self):
+        """Test streamed chunks pass through and a stalled stream times out"""
+        gateway = self._gateway(_FakeGenerativeModel())
+        self.assertEqual(list(gateway.stream("hi")), ["reply ", "to ", "hi"])
+        stats = gateway.get_stats()
+        self.assertEqual((stats['streams'], stats['succeeded'], stats['in_flight']), (1, 1, 0))
+        self.assertEqual(stats['first_chunk_ms']['count'], 1)
+        
+        release = threading.Event()
+        gateway = self._gateway(_FakeGenerativeModel(release=release), LLM_TIMEOUT=0.05)
+        try:
+            with self.assertRaises(TimeoutError):
+                list(gateway.stream("hi"))
+        finally:
+            release.set()
+    
+    def test_translation_memory(self):
+        """Test missed strings go out in one batched call and translations persist across handlers"""
+        class TranslatingModel(_FakeGenerativeModel):
+            garbled = False
+            
+            def generate_content(self, prompt, stream=False):
+                super().generate_content(prompt)
+                if self.garbled:
+                    return mock.Mock(text="Sorry, here is the translation: नींद")
+                strings = json.loads(prompt.split("Strings: ")[1].split("\n")[0])
+                return mock.Mock(text=json.dumps({"translations": [f"hi:{text}" for text in strings]}))
+        
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, True)
+        model = TranslatingModel()
+        with mock.patch.object(Config, 'TRANSLATION_MEMORY_PATH', os.path.join(directory, 'memory.sqlite3')):
+            handler = GeminiHandler(self._gateway(model))
+            self.assertEqual(handler.translate_batch(["Rest", "Drink water", "Rest"], "hindi"),
+                             ["hi:Rest", "hi:Drink water", "hi:Rest"])
+            self.assertEqual(handler.translate_batch(["Rest", "See a doctor"], "hindi"), ["hi:Rest", "hi:See a doctor"])
+            self.assertEqual(model.calls, 2)
+            self.assertEqual(handler.translate_response("Rest", "english"), "Rest")
+            
+            restarted = GeminiHandler(self._gateway(model))
+            self.assertEqual(restarted.translate_response("Drink water", "hindi"), "hi:Drink water")
+            self.assertEqual(restarted.translate_batch(["Sleep"], "hindi", remembered_only=True), ["Sleep"])
+            self.assertEqual(model.calls, 2)
+            
+            model.garbled = True
+            self.assertEqual(restarted.translate_response("Sleep", "tamil"), "Sleep")
+            self.assertIsNone(restarted.translation_memory.get(("tamil", "Sleep")))
+        stats = restarted.get_stats()['translations']
+        self.assertEqual((stats['batches'], stats['batches_failed']), (1, 1))
+    
+    def test_streamed_guidance_falls_back(self):
+        """Test streamed guidance is cached when complete and replaced by the fallback on failure"""
+        handler = GeminiHandler(self._gateway(_FakeGenerativeModel([ValueError("down")])))
+        fallback = list(handler.stream_health_guidance("Is yoga good for sleep?", "english"))
+        self.assertEqual(fallback, [GeminiHandler.fallback_guidance("english")])
+        
+        self.assertEqual(''.join(handler.stream_health_guidance("Is yoga good for sleep?", "english")),
+                         "reply to " + handler._guidance_prompt("Is yoga good for sleep?", "english"))
+        self.assertEqual(len(list(handler.stream_health_guidance("Is yoga good for sleep?", "english"))), 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,11 +1,30 @@
 import unittest
 import sys
 import os
+import threading
+import tempfile
+import json
+import shutil
+from unittest import mock
+
+import numpy as np
 
 # Add parent directory to path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from config.settings import Config
 from models.disease_identifier import DiseaseIdentifier
+from models.inference_batcher import InferenceBatcher
+from models.model_lifecycle import ManagedModel
+from models.inference_backends import (
+    PARITY_SAMPLES, TransformersBackend, OnnxBackend, export_onnx, rank_top_k, softmax
+)
+from models.cascade_classifier import FastClassifier, cascade_report
+from models.inference_server import InferenceServer, RemoteBackend
+from models.evaluate import evaluate, read_cases
+from models.symptom_normalizer import SymptomNormalizer, load_symptom_vocabulary
+from models.adaptive_questioner import AdaptiveQuestioner, replay, simulate_cases
+from models.label_metadata import LabelMetadata, load_label_metadata, load_overrides
 
 class TestDiseaseModel(unittest.TestCase):
     
@@ -26,6 +45,22 @@ class TestDiseaseModel(unittest.TestCase):
         self.assertIn('confidence', result)
         self.assertIn('severity', result)
         self.assertIn('recommendations', result)
+        self.assertIn('differential', result)
+        self.assertEqual(result['differential'][0]['disease'], result['disease'])
+    
+    def test_prediction_cache_ignores_order(self):
+        """Test the same symptom set in any order is classified once"""
+        first = self.identifier.predict_disease(["Fever", "cough"])
+        hits_before = self.identifier.prediction_cache.hits
+        second = self.identifier.predict_disease(["cough", " fever ", "cough"])
+        
+        self.assertEqual(self.identifier.prediction_cache.hits, hits_before + 1)
+        self.assertEqual(first['disease'], second['disease'])
+        self.assertEqual(second['symptoms_analyzed'], ["cough", " fever ", "cough"])
+        
+        # A new model version never serves the old predictions
+        self.identifier.set_model_version('test-version')
+        self.assertEqual(len(self.identifier.prediction_cache), 0)
     
     def test_severity_assessment(self):
         """Test severity assessment"""
@@ -56,5 +91,576 @@ class TestDiseaseModel(unittest.TestCase):
         self.assertIsInstance(questions, list)
         self.assertLessEqual(len(questions), 4)  # Should return max 4 questions
 
+class TestInferenceBatcher(unittest.TestCase):
+
+    def setUp(self):
+        """Set up test fixtures"""
+        self.batches = []
+        self.release = threading.Event()
+        
+        def batch_fn(items):
+            self.release.wait(1)
+            self.batches.append(list(items))
+            return [item.upper() for item in items]
+        
+        self.batcher = InferenceBatcher(batch_fn, max_batch_size=4, max_wait_ms=50)
+    
+    def tearDown(self):
+        self.batcher.shutdown()
+    
+    def test_concurrent_requests_are_batched(self):
+        """Test concurrent requests share a batch and get their own results"""
+        futures = [self.batcher.submit(text) for text in ['a', 'b', 'c']]
+        self.release.set()
+        
+        self.assertEqual([f.result(timeout=2) for f in futures], ['A', 'B', 'C'])
+        self.assertEqual(self.batches, [['a', 'b', 'c']])
+    
+    def test_batch_size_limit(self):
+        """Test batches never exceed the configured size"""
+        futures = [self.batcher.submit(str(i)) for i in range(10)]
+        self.release.set()
+        
+        for future in futures:
+            future.result(timeout=2)
+        self.assertTrue(all(len(batch) <= 4 for batch in self.batches))
+        
+        stats = self.batcher.get_stats()
+        self.assertEqual(stats['queue_wait_ms']['count'], 10)
+        self.assertEqual(stats['batch_size']['count'], len(self.batches))
+    
+    def test_errors_propagate_to_callers(self):
+        """Test a failing batch raises in every caller"""
+        def failing_fn(items):
+            raise ValueError("model failure")
+        
+        batcher = InferenceBatcher(failing_fn, max_batch_size=2, max_wait_ms=1)
+        with self.assertRaises(ValueError):
+            batcher.predict('x', timeout=2)
+        self.assertEqual(batcher.get_stats()['failed_batches'], 1)
+        batcher.shutdown()
+
+class TestDifferentialRanking(unittest.TestCase):
+
+    def test_ranked_best_first(self):
+        """Test candidates come back in descending probability order"""
+        probabilities = softmax(np.array([[0.1, 2.0, 0.5, 1.0], [3.0, 0.0, 0.2, 0.1]]))
+        ranked = rank_top_k(probabilities, 3)
+        
+        self.assertEqual([index for index, _ in ranked[0]], [1, 3, 2])
+        self.assertEqual([index for index, _ in ranked[1]], [0, 2, 3])
+    
+    def test_cumulative_cutoff(self):
+        """Test ranking stops once the cutoff probability mass is covered"""
+        probabilities = np.array([[0.5, 0.3, 0.15, 0.05], [0.95, 0.03, 0.01, 0.01]])
+        ranked = rank_top_k(probabilities, 4, cumulative_cutoff=0.75)
+        
+        self.assertEqual([index for index, _ in ranked[0]], [0, 1])
+        self.assertEqual([index for index, _ in ranked[1]], [0])
+
+class TestOnnxBackend(unittest.TestCase):
+
+    def setUp(self):
+        """Export the quantized classifier next to the PyTorch one"""
+        try:
+            config = Config()
+            self.output_dir = tempfile.mkdtemp()
+            export_onnx(config.SYMPTOM_MODEL_NAME, self.output_dir, config.HUGGINGFACE_CACHE_DIR)
+            self.reference = TransformersBackend(config.SYMPTOM_MODEL_NAME, config.HUGGINGFACE_CACHE_DIR)
+            self.quantized = OnnxBackend(self.output_dir)
+        except Exception as e:
+            self.skipTest(f"ONNX export failed: {e}")
+    
+    def tearDown(self):
+        shutil.rmtree(self.output_dir, ignore_errors=True)
+    
+    def test_parity_with_pytorch(self):
+        """Test int8 ONNX keeps top-1 labels and scores close to fp32 PyTorch"""
+        self.assertEqual(self.reference.labels, self.quantized.labels)
+        
+        reference = softmax(self.reference.logits(PARITY_SAMPLES))
+        quantized = softmax(self.quantized.logits(PARITY_SAMPLES))
+        
+        agreement = (reference.argmax(axis=1) == quantized.argmax(axis=1)).mean()
+        self.assertGreaterEqual(agreement, 0.9)
+        self.assertLess(abs(reference - quantized).max(), 0.1)
+
+class TestCascadeClassifier(unittest.TestCase):
+
+    def setUp(self):
+        """Distill a tiny student from hand-written teacher labels"""
+        self.labels = ['common cold', 'jaundice', 'migraine']
+        self.texts = [
+            'runny nose, sneezing', 'sneezing, sore throat', 'runny nose, cough',
+            'yellow eyes, dark urine', 'yellow skin, dark urine', 'yellow eyes, fatigue',
+            'severe headache, sensitivity to light', 'headache, nausea', 'severe headache, blurred vision'
+        ]
+        # Label 1 never wins in the teacher, so the student must not see it either
+        self.teacher_labels = [0, 0, 0, 2, 2, 2, 2, 2, 2]
+        try:
+            self.fast = FastClassifier.train(self.texts, self.teacher_labels, self.labels)
+        except ImportError as e:
+            self.skipTest(f"scikit-learn not available: {e}")
+    
+    def test_probabilities_use_teacher_label_order(self):
+        """Test student output is laid out over the full transformer label set"""
+        probabilities = self.fast.predict_proba(['runny nose, sneezing'])
+        
+        self.assertEqual(probabilities.shape, (1, len(self.labels)))
+        self.assertEqual(probabilities[0, 1], 0.0)
+        self.assertEqual(probabilities.argmax(axis=1)[0], 0)
+    
+    def test_save_and_load(self):
+        """Test a saved student predicts the same after loading"""
+        directory = tempfile.mkdtemp()
+        try:
+            path = os.path.join(directory, 'fast_classifier.pkl')
+            self.fast.save(path)
+            loaded = FastClassifier.load(path)
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+        
+        self.assertEqual(loaded.version, self.fast.version)
+        self.assertEqual(loaded.training_texts, frozenset(self.texts))
+        np.testing.assert_allclose(loaded.predict_proba(self.texts), self.fast.predict_proba(self.texts))
+    
+    def test_report_counts_escalations(self):
+        """Test every text escalates when the threshold cannot be met"""
+        teacher = np.eye(len(self.labels))[self.teacher_labels]
+        report = cascade_report(self.fast, self.texts, teacher, threshold=1.01)
+        
+        self.assertEqual(report['escalation_rate'], 1.0)
+        self.assertEqual(report['served_by_fast_model'], 0)
+        self.assertEqual(report['cascade_agreement'], 1.0)
+
+class _FakeBackend:
+    name = 'fake'
+    labels = ['short', 'medium', 'long']
+
+    def logits(self, texts):
+        if 'boom' in texts:
+            raise ValueError('boom')
+        return np.array([[10.0 - len(text), 0.0, len(text) - 10.0] for text in texts], dtype=np.float32)
+
+class TestInferenceServer(unittest.TestCase):
+
+    def setUp(self):
+        """Serve a fake classifier on a temporary socket"""
+        self.directory = tempfile.mkdtemp()
+        self.server = InferenceServer(_FakeBackend(), os.path.join(self.directory, 'inference.sock'), max_wait_ms=20)
+        self.server.bind()
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        self.client = RemoteBackend(self.server.socket_path, timeout=5)
+    
+    def tearDown(self):
+        self.client.close()
+        self.server.shutdown()
+        self.thread.join(timeout=5)
+        shutil.rmtree(self.directory, ignore_errors=True)
+    
+    def test_logits_match_local_backend(self):
+        """Test logits come back through shared memory unchanged"""
+        texts = ['fever', 'cough, cold, sore throat', 'x' * 5000]
+        
+        self.assertEqual(self.client.labels, _FakeBackend.labels)
+        self.assertEqual(self.client.name, 'remote:fake')
+        np.testing.assert_array_equal(self.client.logits(texts), _FakeBackend().logits(texts))
+        np.testing.assert_array_equal(self.client.logits(texts[:1]), _FakeBackend().logits(texts[:1]))
+    
+    def test_clients_share_batches(self):
+        """Test requests from separate connections are batched together"""
+        clients = [RemoteBackend(self.server.socket_path, timeout=5) for _ in range(4)]
+        threads = [threading.Thread(target=client.logits, args=(['fever'],)) for client in clients]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        stats = self.server.get_stats()
+        self.assertEqual(stats['requests'], 4)
+        self.assertLess(stats['batcher']['batch_size']['count'], 4)
+        for client in clients:
+            client.close()
+    
+    def test_threads_do_not_share_a_connection(self):
+        """Test concurrent calls from one client are batched instead of serialized"""
+        threads = [threading.Thread(target=self.client.logits, args=(['fever'],)) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        self.assertLess(self.server.get_stats()['batcher']['batch_size']['count'], 4)
+        self.assertGreater(self.client.get_stats()['idle_connections'], 1)
+    
+    def test_server_errors_reach_client(self):
+        """Test a failing batch raises in the client and the connection stays usable"""
+        with self.assertRaises(RuntimeError):
+            self.client.logits(['boom'])
+        
+        self.assertEqual(self.client.logits(['fever']).shape, (1, 3))
+
+class _KeywordBackend:
+    """Scores 'flu' by how many flu symptoms a text mentions and counts forward passes"""
+    name = 'keyword'
+    labels = ['flu', 'allergy']
+    
+    def __init__(self):
+        self.calls = []
+    
+    def logits(self, texts):
+        self.calls.append(list(texts))
+        return np.array([
+            [2.0 * text.count('fever') + 1.0 * text.count('cough'), 1.0]
+            for text in texts
+        ], dtype=np.float32)
+
+class TestPredictionExplanation(unittest.TestCase):
+
+    def setUp(self):
+        """Build a DiseaseIdentifier around a keyword backend"""
+        self.backend = _KeywordBackend()
+        with mock.patch('models.disease_identifier.load_backend', return_value=self.backend), \
+                mock.patch('models.disease_identifier.load_fast_classifier', return_value=None):
+            self.identifier = DiseaseIdentifier()
+    
+    def tearDown(self):
+        if self.identifier.batcher is not None:
+            self.identifier.batcher.shutdown()
+    
+    def test_single_forward_pass(self):
+        """Test the full list and every leave-one-out variant are scored together"""
+        explanation = self.identifier.explain_prediction(['Fever', 'cough', 'rash'], 'flu')
+        
+        self.assertEqual(len(self.backend.calls), 1)
+        self.assertEqual(len(self.backend.calls[0]), 4)
+        self.assertEqual(explanation['variants_scored'], 4)
+        self.assertEqual(explanation['label'], 'flu')
+    
+    def test_contributions_ranked(self):
+        """Test symptoms that drive the label get the largest contribution"""
+        explanation = self.identifier.explain_prediction(['rash', 'cough', 'fever'])
+        
+        symptoms = [item['symptom'] for item in explanation['contributions']]
+        self.assertEqual(symptoms, ['fever', 'cough', 'rash'])
+        self.assertAlmostEqual(explanation['contributions'][-1]['contribution'], 0.0)
+    
+    def test_variant_cap(self):
+        """Test symptoms past the cap are reported but not scored"""
+        with mock.patch.dict('models.disease_identifier.MODEL_CONFIG', {'explanation_max_variants': 2}):
+            explanation = self.identifier.explain_prediction(['fever', 'cough', 'rash', 'itching'])
+        
+        self.assertEqual(len(self.backend.calls[0]), 3)
+        self.assertEqual(explanation['not_evaluated'], ['rash', 'itching'])
+    
+    def test_predict_disease_attaches_explanation(self):
+        """Test explain=True adds the attribution to the prediction"""
+        result = self.identifier.predict_disease(['fever', 'cough'], explain=True)
+        
+        self.assertEqual(result['explanation']['label'], result['disease'])
+        self.assertNotIn('explanation', self.identifier.predict_disease(['fever', 'cough']))
+    
+    def test_empty_symptoms_not_classified(self):
+        """Test an empty symptom list returns the fallback instead of a label for ''"""
+        result = self.identifier.predict_disease([])
+        batch = self.identifier.predict_disease_batch([[' '], ['fever']])
+        
+        self.assertEqual(result['disease'], 'Unable to determine')
+        self.assertEqual(batch[0]['disease'], 'Unable to determine')
+        self.assertNotEqual(batch[1]['disease'], 'Unable to determine')
+        self.assertTrue(all('' not in call for call in self.backend.calls))
+
+class TestSymptomNormalizer(unittest.TestCase):
+
+    def setUp(self):
+        self.normalizer = SymptomNormalizer({
+            'stomach pain': ['tummy ache', 'abdominal pain'],
+            'headache': ['head ache'],
+            'fever': []
+        })
+    
+    def test_nearest_canonical_term(self):
+        """Test aliases, spelling variants and case map to the canonical term"""
+        test_cases = [
+            ("tummy ache", "stomach pain"),
+            ("Stomach pains", "stomach pain"),
+            ("abdominal  Pain!", "stomach pain"),
+            ("head aches", "headache"),
+            ("fever", "fever")
+        ]
+        
+        for symptom, expected in test_cases:
+            with self.subTest(symptom=symptom):
+                self.assertEqual(self.normalizer.normalize(symptom), expected)
+    
+    def test_unmatched_symptoms_kept(self):
+        """Test symptoms far from the vocabulary keep their cleaned text"""
+        self.assertEqual(self.normalizer.normalize("Blurred Vision"), "blurred vision")
+        self.assertEqual(self.normalizer.normalize_all(["", " ", "fever"]), ["fever"])
+    
+    def test_vocabulary_loader(self):
+        """Test JSON and text vocabulary files load the same mapping"""
+        directory = tempfile.mkdtemp()
+        try:
+            json_path = os.path.join(directory, 'vocabulary.json')
+            text_path = os.path.join(directory, 'vocabulary.txt')
+            with open(json_path, 'w') as vocabulary_file:
+                vocabulary_file.write('{"stomach pain": ["tummy ache", "belly pain"], "fever": []}')
+            with open(text_path, 'w') as vocabulary_file:
+                vocabulary_file.write("# canonical: aliases\nstomach pain: tummy ache, belly pain\nfever\n")
+            
+            expected = {'stomach pain': ['tummy ache', 'belly pain'], 'fever': []}
+            self.assertEqual(load_symptom_vocabulary(json_path), expected)
+            self.assertEqual(load_symptom_vocabulary(text_path), expected)
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+    
+    def test_shared_prediction_cache_entry(self):
+        """Test differently worded symptoms reach the classifier as one canonical text"""
+        backend = _KeywordBackend()
+        with mock.patch('models.disease_identifier.load_backend', return_value=backend), \
+                mock.patch('models.disease_identifier.load_fast_classifier', return_value=None), \
+                mock.patch('models.disease_identifier.load_symptom_normalizer', return_value=self.normalizer), \
+                mock.patch.object(Config, 'INFERENCE_BATCHING', False):
+            identifier = DiseaseIdentifier()
+        
+        identifier.predict_disease(['tummy ache', 'fever'])
+        identifier.predict_disease(['Stomach pains', 'fever'])
+        
+        self.assertEqual(backend.calls, [['fever, stomach pain']])
+        self.assertEqual(identifier.prediction_cache.get_stats()['hits'], 1)
+
+class TestLabelMetadata(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'label_metadata.json')
+    
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+    
+    def test_table_covers_every_label(self):
+        """Test each label gets severity, advice, questions, category and risk score once"""
+        table = LabelMetadata.build(['Heart attack', 'Common Cold', 'Urinary tract infection'])
+        
+        self.assertEqual(table.get('Heart attack')['severity'], 'high')
+        self.assertEqual(table.get('heart attack')['category'], 'cardiovascular')
+        self.assertEqual(table.get('Heart attack')['risk_score'], 7)
+        self.assertEqual(table.get('Common Cold')['severity'], 'low')
+        self.assertIn("🧼 Maintain good hygiene", table.get('Urinary tract infection')['recommendations'])
+        self.assertEqual(len(table.get('Urinary tract infection')['follow_up_questions']), 4)
+        self.assertIs(table.get('Heart attack'), table.get('Heart attack'))
+    
+    def test_overrides_and_export(self):
+        """Test an exported table can be edited and loaded back as overrides"""
+        LabelMetadata.build(['flu', 'allergy']).export(self.path)
+        overrides = load_overrides(self.path)
+        overrides['allergy'] = {'severity': 'high', 'recommendations': ["Use your epinephrine injector"]}
+        with open(self.path, 'w') as table_file:
+            json.dump(overrides, table_file)
+        
+        with mock.patch.object(Config, 'LABEL_METADATA_PATH', self.path):
+            table = load_label_metadata(['flu', 'allergy'])
+        
+        self.assertEqual(table.get('allergy')['severity'], 'high')
+        self.assertEqual(table.get('allergy')['recommendations'], ["Use your epinephrine injector"])
+        self.assertEqual(table.get('flu')['severity'], 'low')
+        
+        templates = table.template_strings()
+        self.assertIn("Use your epinephrine injector", templates)
+        self.assertIn("Do you check your blood sugar regularly?", templates)  # rules for labels outside the table
+        self.assertEqual(len(templates), len(set(templates)))
+    
+    def test_invalid_override_rejected(self):
+        """Test unknown fields and severities fail at load time"""
+        with self.assertRaises(ValueError):
+            LabelMetadata.build(['flu'], {'flu': {'severity': 'urgent'}})
+        with self.assertRaises(ValueError):
+            LabelMetadata.build(['flu'], {'flu': {'colour': 'red'}})
+    
+    def test_prediction_uses_table(self):
+        """Test predictions read severity and advice from the table"""
+        with open(self.path, 'w') as table_file:
+            json.dump({'flu': {'severity': 'high', 'follow_up_questions': ["Any trouble breathing?"]}}, table_file)
+        
+        with mock.patch('models.disease_identifier.load_backend', return_value=_KeywordBackend()), \
+                mock.patch('models.disease_identifier.load_fast_classifier', return_value=None), \
+                mock.patch.object(Config, 'INFERENCE_BATCHING', False), \
+                mock.patch.object(Config, 'LABEL_METADATA_PATH', self.path):
+            identifier = DiseaseIdentifier()
+        
+        result = identifier.predict_disease(['fever', 'cough'])
+        self.assertEqual(result['disease'], 'flu')
+        self.assertTrue(result['requires_immediate_attention'])
+        self.assertEqual(result['category'], 'respiratory')
+        self.assertEqual(identifier.get_follow_up_questions('flu', []), ["Any trouble breathing?"])
+
+class TestAdaptiveQuestioner(unittest.TestCase):
+
+    def setUp(self):
+        """Fever points to flu, sneezing to allergy, fatigue to neither"""
+        likelihoods = np.array([[0.9, 0.05], [0.1, 0.9], [0.5, 0.5]])
+        self.questioner = AdaptiveQuestioner(likelihoods, ['fever', 'sneezing', 'fatigue'], ['flu', 'allergy'])
+    
+    def test_most_informative_question_first(self):
+        """Test the question that splits the differential is asked before an uninformative one"""
+        prior = self.questioner.prior([{'disease': 'flu', 'probability': 0.5}, {'disease': 'allergy', 'probability': 0.5}])
+        questions = self.questioner.next_questions(prior, known=['fever'], count=3)
+        
+        self.assertEqual(questions[0]['symptom'], 'sneezing')
+        self.assertNotIn('fever', [question['symptom'] for question in questions])
+        self.assertNotIn('fatigue', [question['symptom'] for question in questions])
+    
+    def test_update_moves_posterior(self):
+        """Test confirming and denying a symptom shifts probability towards the matching disease"""
+        prior = self.questioner.prior()
+        self.assertGreater(self.questioner.update(prior, 'fever', True)[0], 0.9)
+        self.assertGreater(self.questioner.update(prior, 'fever', False)[1], 0.8)
+        np.testing.assert_array_equal(self.questioner.update(prior, 'unknown', True), prior)
+    
+    def test_build_and_round_trip(self):
+        """Test the matrix is built in one classifier pass and survives save/load"""
+        backend = _KeywordBackend()
+        questioner = AdaptiveQuestioner.build(backend, ['fever', 'cough', 'sneezing'])
+        self.assertEqual(len(backend.calls), 1)
+        self.assertEqual(questioner.likelihoods.shape, (3, 2))
+        self.assertGreater(questioner.likelihoods[0, 0], questioner.likelihoods[0, 1])
+        
+        directory = tempfile.mkdtemp()
+        try:
+            path = os.path.join(directory, 'matrix.npz')
+            questioner.save(path)
+            loaded = AdaptiveQuestioner.load(path)
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+        
+        self.assertEqual(loaded.symptoms, questioner.symptoms)
+        self.assertEqual(loaded.labels, ['flu', 'allergy'])
+        np.testing.assert_allclose(loaded.likelihoods, questioner.likelihoods)
+    
+    def test_replay_beats_fixed_order(self):
+        """Test information gain reaches confidence in no more turns than a fixed order"""
+        cases = simulate_cases(self.questioner, 200)
+        adaptive = replay(self.questioner, cases, threshold=0.9)
+        fixed = replay(self.questioner, cases, threshold=0.9, strategy='fixed')
+        
+        self.assertEqual(adaptive['cases'], len(cases))
+        self.assertLessEqual(adaptive['average_turns'], fixed['average_turns'])
+        self.assertLess(adaptive['decision_ms_p95'], 5)
+    
+    def test_identifier_asks_adaptive_questions(self):
+        """Test follow-ups lead with the symptoms that separate the differential, never a known one"""
+        with mock.patch('models.disease_identifier.load_backend', return_value=_KeywordBackend()), \
+                mock.patch('models.disease_identifier.load_fast_classifier', return_value=None), \
+                mock.patch('models.disease_identifier.load_adaptive_questioner', return_value=self.questioner), \
+                mock.patch.object(Config, 'INFERENCE_BATCHING', False):
+            identifier = DiseaseIdentifier()
+        
+        prediction = identifier.predict_disease(['fatigue'])
+        questions = identifier.get_follow_up_questions(prediction['disease'], ['fatigue'], prediction['differential'])
+        
+        self.assertEqual(len(questions), 4)
+        self.assertEqual(questions[:2], ["Do you also have fever?", "Do you also have sneezing?"])
+        self.assertEqual(questions[2:], identifier.get_follow_up_questions(prediction['disease'], ['fatigue'])[:2])
+
+class TestBatchEvaluation(unittest.TestCase):
+
+    def setUp(self):
+        """Write a small labeled case file in both supported formats"""
+        self.directory = tempfile.mkdtemp()
+        self.jsonl_path = os.path.join(self.directory, 'cases.jsonl')
+        with open(self.jsonl_path, 'w') as case_file:
+            case_file.write('{"symptoms": ["fever", "cough"], "disease": "Flu"}\n')
+            case_file.write('{"symptoms": "sneezing; itchy eyes", "disease": "flu"}\n')
+            case_file.write('{"symptoms": ["fever"]}\n')
+        
+        self.csv_path = os.path.join(self.directory, 'cases.csv')
+        with open(self.csv_path, 'w') as case_file:
+            case_file.write('id,symptoms,disease\na,"fever, cough",flu\nb,rash,\n')
+        
+        with mock.patch('models.disease_identifier.load_backend', return_value=_KeywordBackend()), \
+                mock.patch('models.disease_identifier.load_fast_classifier', return_value=None):
+            self.identifier = DiseaseIdentifier()
+    
+    def tearDown(self):
+        if self.identifier.batcher is not None:
+            self.identifier.batcher.shutdown()
+        shutil.rmtree(self.directory, ignore_errors=True)
+    
+    def test_read_cases(self):
+        """Test symptom strings are split and missing labels are None"""
+        cases = list(read_cases(self.csv_path))
+        
+        self.assertEqual(cases[0]['id'], 'a')
+        self.assertEqual(cases[0]['symptoms'], ['fever', 'cough'])
+        self.assertIsNone(cases[1]['label'])
+        self.assertEqual(list(read_cases(self.jsonl_path))[1]['symptoms'], ['sneezing', 'itchy eyes'])
+    
+    def test_report_and_output(self):
+        """Test every row is written and accuracy only counts labeled rows"""
+        output_path = os.path.join(self.directory, 'predictions.jsonl')
+        with open(output_path, 'w') as output:
+            report = evaluate(self.identifier, read_cases(self.jsonl_path), batch_size=2, threads=2, output=output)
+        
+        with open(output_path) as output:
+            self.assertEqual(len(output.readlines()), 3)
+        
+        self.assertEqual(report['rows'], 3)
+        self.assertEqual(report['labeled_rows'], 2)
+        self.assertEqual(report['accuracy'], 0.5)
+        self.assertEqual(report['differential_accuracy'], 1.0)
+        self.assertEqual(report['batch_latency_ms']['count'], 2)
+        self.assertEqual(sum(report['label_distribution'].values()), 3)
+
+class TestManagedModel(unittest.TestCase):
+
+    def setUp(self):
+        """Set up test fixtures"""
+        self.loads = 0
+
+        def loader():
+            self.loads += 1
+            return {'weights': self.loads}
+        
+        self.managed = ManagedModel('test', loader, idle_timeout=0)
+    
+    def test_loads_on_first_use_only(self):
+        """Test the model is loaded lazily and reused"""
+        self.assertFalse(self.managed.is_loaded)
+        self.assertEqual(self.loads, 0)
+        
+        with self.managed.use() as model:
+            self.assertEqual(model['weights'], 1)
+        with self.managed.use():
+            pass
+        
+        self.assertEqual(self.loads, 1)
+        self.assertTrue(self.managed.is_loaded)
+    
+    def test_unload_and_reload(self):
+        """Test unloading frees the model and records events"""
+        with self.managed.use():
+            pass
+        
+        self.assertTrue(self.managed.unload())
+        self.assertFalse(self.managed.is_loaded)
+        self.assertFalse(self.managed.unload())
+        
+        with self.managed.use() as model:
+            self.assertEqual(model['weights'], 2)
+        
+        stats = self.managed.get_stats()
+        self.assertEqual([e['event'] for e in stats['events']], ['load', 'unload', 'load'])
+        self.assertEqual(stats['unload_count'], 1)
+    
+    def test_recently_used_model_is_kept(self):
+        """Test idle eviction skips a model that was just used"""
+        with self.managed.use():
+            pass
+        
+        self.assertFalse(self.managed.unload(min_idle=60))
+        self.assertTrue(self.managed.is_loaded)
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
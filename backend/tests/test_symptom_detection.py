@@ -1,17 +1,28 @@
 import unittest
 import sys
 import os
+import tempfile
+import shutil
+from unittest import mock
 
 # Add parent directory to path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from config.settings import Config
 from models.symptom_detector import SymptomDetector
+from services.llm_gateway import LLMGateway
 
 class TestSymptomDetection(unittest.TestCase):
     
     def setUp(self):
         """Set up test fixtures"""
-        self.detector = SymptomDetector()
+        self.directory = tempfile.mkdtemp()
+        self.cache_path = os.path.join(self.directory, 'gemini_symptoms.sqlite3')
+        with mock.patch.object(Config, 'SYMPTOM_CACHE_PATH', self.cache_path):
+            self.detector = SymptomDetector(LLMGateway())
+    
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
     
     def test_english_symptom_detection(self):
         """Test symptom detection in English"""
@@ -69,6 +80,88 @@ class TestSymptomDetection(unittest.TestCase):
             self.detector.keyword_based_detection("मुझे दर्द है", "hindi")
         )
     
+    def test_local_extraction(self):
+        """Test the lexicon translates symptoms to canonical English"""
+        test_cases = [
+            ("I have a headache and fever", "english", ["headache", "fever"]),
+            ("tummy ache since yesterday", "english", ["stomach pain"]),
+            ("मेरे पेट में दर्द है", "hindi", ["stomach pain"]),
+            ("எனக்கு தலைவலி", "tamil", ["headache"])
+        ]
+        
+        for text, language, expected in test_cases:
+            with self.subTest(text=text):
+                result = self.detector.local_symptom_detection(text, language)
+                self.assertEqual(result['symptoms'], expected)
+                self.assertGreaterEqual(result['confidence'], 0.8)
+        
+        urgent = self.detector.local_symptom_detection("chest pain and shortness of breath", "english")
+        self.assertEqual(urgent['urgency'], 'high')
+    
+    def test_gemini_only_below_threshold(self):
+        """Test confident lexicon matches skip Gemini and negations do not"""
+        gemini_result = {"has_symptoms": False, "symptoms": [], "confidence": 0.9}
+        with mock.patch.object(self.detector, 'gemini_symptom_detection', return_value=gemini_result) as gemini:
+            confident = self.detector.analyze_input("I have a headache and fever")
+            self.detector.analyze_input("I have no fever at all")
+        
+        self.assertEqual(confident['detection_method'], 'lexicon')
+        self.assertEqual(gemini.call_count, 1)
+        self.assertEqual(self.detector.get_stats()['llm_calls_avoided'], 1)
+    
+    def test_gemini_failure_keeps_symptoms(self):
+        """Test the fallback after a Gemini error still names the symptoms"""
+        with mock.patch.object(self.detector.llm.model, 'generate_content', side_effect=RuntimeError("quota")):
+            result = self.detector.gemini_symptom_detection("I have fever but no cough", "english")
+        
+        self.assertEqual(result['symptoms'], ["fever", "cough"])
+        self.assertLessEqual(result['confidence'], 0.5)
+        self.assertEqual(self.detector.get_stats()['gemini_failed'], 1)
+    
+    def test_gemini_skipped_without_budget(self):
+        """Test too little time left for Gemini goes straight to the keyword fallback"""
+        with mock.patch.object(self.detector.llm.model, 'generate_content') as gemini:
+            result = self.detector.analyze_input("fever and a strange feeling since the trip", timeout=0.1)
+        
+        gemini.assert_not_called()
+        self.assertTrue(result['gemini_skipped'])
+        self.assertEqual(result['detection_method'], 'keyword')
+        self.assertIn('fever', result['symptoms'])
+        self.assertEqual(self.detector.get_stats()['gemini_skipped'], 1)
+    
+    def test_gemini_results_cached(self):
+        """Test repeated complaints are answered from the persistent cache"""
+        response = mock.Mock(text='{"has_symptoms": true, "symptoms": ["fever"], "confidence": 0.9}')
+        with mock.patch.object(self.detector.llm.model, 'generate_content', return_value=response) as gemini:
+            first = self.detector.gemini_symptom_detection("bukhar hai", "hindi")
+            first['symptoms'].append('mutated')
+            second = self.detector.gemini_symptom_detection("  Bukhar  hai! ", "hindi")
+            self.detector.gemini_symptom_detection("bukhar hai", "english")
+        
+        self.assertEqual(gemini.call_count, 2)
+        self.assertEqual(second['symptoms'], ["fever"])
+        self.assertEqual(self.detector.get_stats()['gemini_cache']['hits'], 1)
+        
+        with mock.patch.object(Config, 'SYMPTOM_CACHE_PATH', self.cache_path):
+            restarted = SymptomDetector(self.detector.llm)
+        with mock.patch.object(restarted.llm.model, 'generate_content') as gemini:
+            self.assertEqual(restarted.gemini_symptom_detection("bukhar hai", "hindi")['symptoms'], ["fever"])
+        gemini.assert_not_called()
+        self.assertGreaterEqual(restarted.get_stats()['latency_saved_ms'], 0.0)
+    
+    def test_fused_call_drafts_reply(self):
+        """Test one Gemini call returns both the detection fields and a reply"""
+        response = mock.Mock(text='{"has_symptoms": false, "symptoms": [], "original_language": "english", '
+                                  '"urgency": "low", "medical_context": false, "confidence": 0.9, '
+                                  '"reply": "Eat more vegetables."}')
+        with mock.patch.object(self.detector.llm.model, 'generate_content', return_value=response) as gemini:
+            result = self.detector.analyze_input("What foods are good for the heart?", draft_reply=True)
+        
+        self.assertEqual(gemini.call_count, 1)
+        self.assertIn('"reply"', gemini.call_args[0][0])
+        self.assertEqual(result['reply'], "Eat more vegetables.")
+        self.assertFalse(result['has_symptoms'])
+    
     def test_follow_up_questions(self):
         """Test follow-up question generation"""
         symptoms = ["headache", "fever"]
@@ -0,0 +1,272 @@
+import unittest
+import sys
+import os
+import time
+import tempfile
+import threading
+import shutil
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.cache import LRUCache, PersistentLRUCache
+from utils.semantic_cache import SemanticCache
+from utils.singleflight import SingleFlight
+from utils.language import detect_language, script_language
+from utils.keyword_matcher import KeywordMatcher
+from utils.helpers import extract_medical_entities, is_emergency_keyword
+
+class TestLRUCache(unittest.TestCase):
+
+    def test_lru_eviction(self):
+        """Test the least recently used entry is evicted first"""
+        cache = LRUCache(max_entries=2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+        
+        self.assertIn('a', cache)
+        self.assertNotIn('b', cache)
+        self.assertEqual(cache.get_stats()['evictions'], 1)
+    
+    def test_ttl_expiry(self):
+        """Test entries expire after the TTL"""
+        cache = LRUCache(max_entries=10, ttl_seconds=0.05)
+        cache.set('a', 1)
+        self.assertEqual(cache.get('a'), 1)
+        
+        time.sleep(0.1)
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(cache.get_stats()['expirations'], 1)
+    
+    def test_memory_bound(self):
+        """Test the byte budget evicts entries"""
+        cache = LRUCache(max_entries=1000, max_bytes=2000)
+        for i in range(50):
+            cache.set(i, ['x' * 50])
+        
+        stats = cache.get_stats()
+        self.assertLessEqual(stats['bytes'], 2000)
+        self.assertLess(stats['entries'], 50)
+    
+    def test_hit_miss_counters(self):
+        """Test hit and miss counters"""
+        cache = LRUCache()
+        cache.set('a', 1)
+        cache.get('a')
+        cache.get('b')
+        
+        stats = cache.get_stats()
+        self.assertEqual((stats['hits'], stats['misses']), (1, 1))
+        self.assertEqual(stats['hit_rate'], 0.5)
+
+class TestPersistentLRUCache(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'cache.sqlite3')
+    
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+    
+    def test_survives_restart(self):
+        """Test entries and their recency order are reloaded from disk"""
+        cache = PersistentLRUCache(self.path, max_entries=2)
+        cache.set(('fever', 'english', '1'), {'symptoms': ['fever']})
+        cache.set(('cough', 'english', '1'), {'symptoms': ['cough']})
+        cache.get(('fever', 'english', '1'))
+        
+        reloaded = PersistentLRUCache(self.path, max_entries=2)
+        self.assertEqual(reloaded.get(('fever', 'english', '1')), {'symptoms': ['fever']})
+        self.assertEqual(reloaded.get_stats()['loaded_from_disk'], 2)
+        
+        # 'cough' is now least recently used, so it is evicted on disk as well
+        reloaded.set(('rash', 'english', '1'), {'symptoms': ['rash']})
+        self.assertNotIn(('cough', 'english', '1'), PersistentLRUCache(self.path, max_entries=2))
+    
+    def test_expired_entries_not_reloaded(self):
+        """Test the TTL is wall-clock based across restarts"""
+        cache = PersistentLRUCache(self.path, ttl_seconds=0.05)
+        cache.set('a', 1)
+        time.sleep(0.1)
+        
+        self.assertEqual(len(PersistentLRUCache(self.path, ttl_seconds=0.05)), 0)
+    
+    def test_clear_removes_disk_entries(self):
+        """Test clear empties the file too"""
+        cache = PersistentLRUCache(self.path)
+        cache.set('a', 1)
+        cache.clear()
+        
+        self.assertEqual(len(PersistentLRUCache(self.path)), 0)
+
+class TestSemanticCache(unittest.TestCase):
+
+    def test_near_duplicate_hit(self):
+        """Test rephrasings above the threshold are served and unrelated questions are not"""
+        cache = SemanticCache(threshold=0.7)
+        cache.set("What should diabetics eat?", "diet answer", "english")
+        cache.set("How much water should I drink daily?", "water answer", "english")
+        
+        hit = cache.get("what should a diabetic eat", "english")
+        self.assertEqual(hit['value'], "diet answer")
+        self.assertGreaterEqual(hit['similarity'], 0.7)
+        self.assertIsNone(cache.get("Is yoga good for back pain?", "english"))
+        self.assertIsNone(cache.get("What should diabetics eat?", "hindi"))
+    
+    def test_incremental_merge(self):
+        """Test rows stay searchable across merges into the column-major index"""
+        cache = SemanticCache(merge_size=4)
+        questions = [f"question number {i} about topic {i * 7}" for i in range(25)]
+        for question in questions:
+            cache.set(question, question)
+        
+        for question in (questions[0], questions[9], questions[-1]):
+            with self.subTest(question=question):
+                self.assertEqual(cache.get(question)['value'], question)
+    
+    def test_size_bound_evicts_least_recent(self):
+        """Test the least recently used question is evicted"""
+        cache = SemanticCache(max_entries=2, merge_size=2)
+        cache.set("fever in children", "a")
+        cache.set("vaccines for babies", "b")
+        cache.get("fever in children")
+        cache.set("iron rich foods", "c")
+        
+        self.assertEqual(len(cache), 2)
+        self.assertIsNone(cache.get("vaccines for babies"))
+        self.assertEqual(cache.get("fever in children")['value'], "a")
+        self.assertEqual(cache.get_stats()['evictions'], 1)
+
+class TestSingleFlight(unittest.TestCase):
+
+    def _run_concurrently(self, flight, function, keys):
+        """Start one caller per key while `function` blocks, then let them all finish"""
+        release = threading.Event()
+        results, errors = [], []
+        
+        def call(key):
+            try:
+                results.append(flight.do(key, function, key, release))
+            except Exception as e:
+                errors.append(e)
+        
+        threads = [threading.Thread(target=call, args=(key,)) for key in keys]
+        for thread in threads:
+            thread.start()
+        deadline = time.time() + 2
+        while flight.get_stats()['executed'] + flight.get_stats()['collapsed'] < len(keys) and time.time() < deadline:
+            time.sleep(0.01)
+        release.set()
+        for thread in threads:
+            thread.join(5)
+        return results, errors
+
+    def test_concurrent_calls_collapse(self):
+        """Test identical concurrent calls share one execution and different keys do not"""
+        calls = []
+        
+        def lookup(key, release):
+            calls.append(key)
+            release.wait(5)
+            return {'key': key}
+        
+        flight = SingleFlight('lookups')
+        results, errors = self._run_concurrently(flight, lookup, ['a'] * 5 + ['b'])
+        
+        self.assertEqual(errors, [])
+        self.assertEqual(sorted(calls), ['a', 'b'])
+        self.assertEqual(sorted(result['key'] for result in results), ['a'] * 5 + ['b'])
+        stats = flight.get_stats()
+        self.assertEqual((stats['executed'], stats['collapsed'], stats['in_flight']), (2, 4, 0))
+        
+        # Nothing is cached once the call has returned
+        flight.do('a', lambda: None)
+        self.assertEqual(flight.get_stats()['executed'], 3)
+
+    def test_errors_shared(self):
+        """Test waiting callers get the leader's exception"""
+        def failing(key, release):
+            release.wait(5)
+            raise RuntimeError("quota")
+        
+        results, errors = self._run_concurrently(SingleFlight(), failing, ['a'] * 3)
+        
+        self.assertEqual(results, [])
+        self.assertEqual(len(errors), 3)
+        self.assertTrue(all(isinstance(error, RuntimeError) for error in errors))
+
+class TestLanguageDetection(unittest.TestCase):
+
+    def test_indic_scripts(self):
+        """Test each supported Indic language is decided by its script alone"""
+        test_cases = [
+            ("मुझे सिरदर्द है", "hindi"),
+            ("எனக்கு தலைவலி", "tamil"),
+            ("నాకు జ్వరం", "telugu"),
+            ("আমার জ্বর", "bengali"),
+            ("मुझे बुखार है, fever", "hindi")
+        ]
+        
+        for text, expected in test_cases:
+            with self.subTest(text=text):
+                self.assertEqual(script_language(text), expected)
+                self.assertEqual(detect_language(text), expected)
+    
+    def test_latin_and_mixed_fall_back(self):
+        """Test Latin-script and evenly mixed text are left to the statistical detector"""
+        self.assertIsNone(script_language("I have a headache"))
+        self.assertIsNone(script_language("fever and खांसी"))
+        self.assertEqual(detect_language("I have a headache and fever"), "english")
+    
+    def test_text_without_letters(self):
+        """Test empty or symbol-only text defaults to English"""
+        self.assertEqual(detect_language(""), "english")
+        self.assertEqual(detect_language("123 ?!"), "english")
+
+class TestKeywordMatcher(unittest.TestCase):
+
+    def test_spans_in_original_text(self):
+        """Test every overlapping match is found with its span"""
+        matcher = KeywordMatcher(['pain', 'chest pain', 'ache', 'headache'])
+        text = "Bad HEADACHE and chest   pain"
+        
+        matches = [(match.keyword, text[match.start:match.end]) for match in matcher.find_all(text)]
+        self.assertEqual(matches, [
+            ('headache', 'HEADACHE'), ('ache', 'ACHE'), ('chest pain', 'chest   pain'), ('pain', 'pain')
+        ])
+    
+    def test_multi_word_indic_terms(self):
+        """Test multi-word Devanagari keywords and their shorter parts"""
+        matcher = KeywordMatcher(['दर्द', 'सीने में दर्द', 'पेट दर्द'])
+        matches = matcher.find_all("मुझे सीने में दर्द है")
+        
+        self.assertEqual([match.keyword for match in matches], ['सीने में दर्द', 'दर्द'])
+        self.assertEqual(
+            [match.keyword for match in matcher.find_all("मुझे सीने में दर्द है", overlapping=False)],
+            ['सीने में दर्द']
+        )
+    
+    def test_labels_and_contains(self):
+        """Test keyword labels and the early-exit check"""
+        matcher = KeywordMatcher({'mild': 'severity', 'chest': 'body_parts'})
+        
+        self.assertEqual([match.label for match in matcher.find_all("mild chest pain")], ['severity', 'body_parts'])
+        self.assertTrue(matcher.contains("CHEST"))
+        self.assertFalse(matcher.contains("nothing here"))
+    
+    def test_helpers_use_matcher(self):
+        """Test emergency and entity helpers keep their results"""
+        self.assertTrue(is_emergency_keyword("Call an AMBULANCE"))
+        self.assertTrue(is_emergency_keyword("I can't breathe"))
+        self.assertFalse(is_emergency_keyword("mild cough"))
+        
+        entities = extract_medical_entities("Severe headache in my head for 3 days, often at night")
+        self.assertEqual(entities['duration'], [('3', 'day')])
+        self.assertEqual(entities['severity'], ['severe'])
+        self.assertEqual(entities['frequency'], ['often'])
+        self.assertEqual(entities['body_parts'], ['head', 'head'])
+
+if __name__ == '__main__':
+    unittest.main()
\ No newline at end of file
@@ -0,0 +1,234 @@
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable
+
+def estimate_size(value: Any) -> int:
+    """Approximate memory footprint of a JSON-like value in bytes"""
+    size = sys.getsizeof(value)
+    
+    if isinstance(value, dict):
+        size += sum(estimate_size(k) + estimate_size(v) for k, v in value.items())
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        size += sum(estimate_size(item) for item in value)
+    
+    return size
+
+class LRUCache:
+    """Thread-safe LRU cache with a TTL and entry-count and memory bounds"""
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = None, max_bytes: int = None,
+                 name: str = 'cache'):
+        self.name = name
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._bytes = 0
+        
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Get a cached value, refreshing its recency"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            
+            value, expires_at, size = entry
+            if expires_at is not None and expires_at < time.monotonic():
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return default
+            
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any):
+        """Store a value, evicting least recently used entries to stay in bounds"""
+        expires_at = time.monotonic() + self.ttl_seconds if self.ttl_seconds else None
+        self._set(key, value, expires_at)
+
+    def _set(self, key: Hashable, value: Any, expires_at: float):
+        """Store a value with an explicit monotonic expiry"""
+        size = estimate_size(key) + estimate_size(value) if self.max_bytes else 0
+        if self.max_bytes and size > self.max_bytes:
+            return
+        
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            
+            self._entries[key] = (value, expires_at, size)
+            self._bytes += size
+            
+            while self._entries and (
+                len(self._entries) > self.max_entries
+                or (self.max_bytes and self._bytes > self.max_bytes)
+            ):
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def delete(self, key: Hashable) -> bool:
+        """Remove a single entry"""
+        with self._lock:
+            if key not in self._entries:
+                return False
+            self._remove(key)
+            return True
+
+    def clear(self):
+        """Drop every entry"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def _remove(self, key: Hashable):
+        """Remove an entry; caller holds the lock"""
+        _, _, size = self._entries.pop(key)
+        self._bytes -= size
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
+
+    def get_stats(self) -> Dict:
+        """Hit/miss counters and current size"""
+        lookups = self.hits + self.misses
+        return {
+            'name': self.name,
+            'entries': len(self._entries),
+            'max_entries': self.max_entries,
+            'bytes': self._bytes if self.max_bytes else None,
+            'max_bytes': self.max_bytes,
+            'ttl_seconds': self.ttl_seconds,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+            'evictions': self.evictions,
+            'expirations': self.expirations
+        }
+
+
+class PersistentLRUCache(LRUCache):
+    """LRUCache mirrored to a SQLite file so entries survive restarts.
+    
+    Keys are strings or tuples of strings and values must be JSON
+    serializable. Lookups are served from memory; stores, evictions and
+    recency updates are written through, and unexpired entries are reloaded
+    most recently used first on start-up. Several worker processes may share
+    one file.
+    """
+
+    def __init__(self, path: str, max_entries: int = 1024, ttl_seconds: float = None,
+                 max_bytes: int = None, name: str = 'cache'):
+        super().__init__(max_entries=max_entries, ttl_seconds=ttl_seconds, max_bytes=max_bytes, name=name)
+        self.path = path
+        self._db_lock = threading.Lock()
+        self._db = None
+        self._db_pid = None
+        self.loaded = 0
+        
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._load()
+
+    def _connection(self) -> sqlite3.Connection:
+        """Connection for the current process; caller holds the database lock"""
+        # A connection must not cross a fork (e.g. gunicorn preload)
+        if self._db is None or self._db_pid != os.getpid():
+            self._db = sqlite3.connect(self.path, timeout=5, check_same_thread=False, isolation_level=None)
+            self._db.execute('PRAGMA journal_mode=WAL')
+            self._db.execute(
+                'CREATE TABLE IF NOT EXISTS entries ('
+                'key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL, last_used REAL NOT NULL)'
+            )
+            self._db_pid = os.getpid()
+        return self._db
+
+    def _execute(self, statement: str, parameters: tuple = ()) -> list:
+        """Run one statement; disk errors never fail a cache operation"""
+        try:
+            with self._db_lock:
+                return self._connection().execute(statement, parameters).fetchall()
+        except sqlite3.Error:
+            return []
+
+    @staticmethod
+    def _encode_key(key: Hashable) -> str:
+        return json.dumps(list(key) if isinstance(key, tuple) else key, ensure_ascii=False)
+
+    @staticmethod
+    def _decode_key(encoded: str) -> Hashable:
+        key = json.loads(encoded)
+        return tuple(key) if isinstance(key, list) else key
+
+    def _load(self):
+        """Reload unexpired entries, oldest first so recency order is kept"""
+        now = time.time()
+        self._execute('DELETE FROM entries WHERE expires_at IS NOT NULL AND expires_at <= ?', (now,))
+        rows = self._execute(
+            'SELECT key, value, expires_at FROM entries ORDER BY last_used DESC LIMIT ?', (self.max_entries,)
+        )
+        
+        offset = time.monotonic() - now
+        for key, value, expires_at in reversed(rows):
+            LRUCache._set(self, self._decode_key(key), json.loads(value),
+                          expires_at + offset if expires_at is not None else None)
+        self.loaded = len(self._entries)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Get a cached value, refreshing its recency in memory and on disk"""
+        missing = object()
+        value = super().get(key, missing)
+        if value is missing:
+            return default
+        
+        self._execute('UPDATE entries SET last_used = ? WHERE key = ?', (time.time(), self._encode_key(key)))
+        return value
+
+    def set(self, key: Hashable, value: Any):
+        """Store a value in memory and on disk"""
+        super().set(key, value)
+        if key not in self._entries:
+            return
+        
+        now = time.time()
+        self._execute(
+            'INSERT OR REPLACE INTO entries (key, value, expires_at, last_used) VALUES (?, ?, ?, ?)',
+            (self._encode_key(key), json.dumps(value, ensure_ascii=False),
+             now + self.ttl_seconds if self.ttl_seconds else None, now)
+        )
+
+    def _remove(self, key: Hashable):
+        """Remove an entry from memory and disk; caller holds the lock"""
+        super()._remove(key)
+        self._execute('DELETE FROM entries WHERE key = ?', (self._encode_key(key),))
+
+    def clear(self):
+        """Drop every entry, including the ones on disk"""
+        super().clear()
+        self._execute('DELETE FROM entries')
+
+    def get_stats(self) -> Dict:
+        """Hit/miss counters, current size and entries reloaded from disk"""
+        stats = super().get_stats()
+        stats['path'] = self.path
+        stats['loaded_from_disk'] = self.loaded
+        return stats
@@ -17,6 +17,26 @@ EMERGENCY_KEYWORDS = [
     'emergency', 'ambulance', 'help me', 'dying'
 ]
 
+# The same emergencies as reported in the other supported languages
+EMERGENCY_KEYWORD_TRANSLATIONS = {
+    'hindi': [
+        'सीने में दर्द', 'छाती में दर्द', 'दिल का दौरा', 'सांस नहीं', 'सांस लेने में तकलीफ',
+        'बेहोश', 'बहुत खून', 'लकवा', 'ज़हर', 'जहर', 'आपातकाल', 'एम्बुलेंस', 'बचाओ'
+    ],
+    'tamil': [
+        'நெஞ்சு வலி', 'மாரடைப்பு', 'மூச்சு விட முடியவில்லை', 'மூச்சுத் திணறல்',
+        'மயக்கம்', 'அதிக இரத்தப்போக்கு', 'விஷம்', 'அவசரம்', 'ஆம்புலன்ஸ்'
+    ],
+    'telugu': [
+        'ఛాతీ నొప్పి', 'గుండెపోటు', 'ఊపిరి ఆడటం లేదు', 'శ్వాస తీసుకోలేను',
+        'స్పృహ తప్పి', 'తీవ్ర రక్తస్రావం', 'విషం', 'అత్యవసర', 'అంబులెన్స్'
+    ],
+    'bengali': [
+        'বুকে ব্যথা', 'হার্ট অ্যাটাক', 'শ্বাস নিতে পারছি না', 'শ্বাসকষ্ট',
+        'অজ্ঞান', 'অনেক রক্ত', 'বিষ', 'জরুরি', 'অ্যাম্বুলেন্স'
+    ]
+}
+
 # Severity levels
 SEVERITY_LEVELS = {
     'LOW': 1,
@@ -69,6 +89,66 @@ SYMPTOM_TRANSLATIONS = {
     }
 }
 
+# Symptom terms in each supported language mapped to canonical English,
+# used by the local extractor in SymptomDetector
+SYMPTOM_LEXICON = {
+    'english': {
+        'pain': 'pain', 'ache': 'pain', 'hurt': 'pain', 'fever': 'fever', 'cough': 'cough',
+        'cold': 'cold', 'headache': 'headache', 'head ache': 'headache', 'nausea': 'nausea',
+        'vomiting': 'vomiting', 'throwing up': 'vomiting', 'diarrhea': 'diarrhea',
+        'loose motions': 'diarrhea', 'constipation': 'constipation', 'bleeding': 'bleeding',
+        'swelling': 'swelling', 'rash': 'skin rash', 'itching': 'itching', 'burning': 'burning sensation',
+        'numbness': 'numbness', 'weakness': 'weakness', 'dizziness': 'dizziness', 'fatigue': 'fatigue',
+        'tired': 'fatigue', 'breathless': 'shortness of breath', 'shortness of breath': 'shortness of breath',
+        'short of breath': 'shortness of breath', 'chest pain': 'chest pain', 'stomach pain': 'stomach pain',
+        'stomach ache': 'stomach pain', 'stomachache': 'stomach pain', 'tummy ache': 'stomach pain',
+        'back pain': 'back pain', 'joint pain': 'joint pain', 'body ache': 'body ache',
+        'sore throat': 'sore throat', 'runny nose': 'runny nose', 'sneezing': 'sneezing', 'chills': 'chills',
+        'sweating': 'sweating', 'cramps': 'cramps'
+    },
+    'hindi': {
+        'दर्द': 'pain', 'पीड़ा': 'pain', 'बुखार': 'fever', 'खांसी': 'cough', 'सर्दी': 'cold',
+        'सिरदर्द': 'headache', 'जी मिचलाना': 'nausea', 'उल्टी': 'vomiting', 'दस्त': 'diarrhea',
+        'कब्ज': 'constipation', 'खून': 'bleeding', 'सूजन': 'swelling', 'खुजली': 'itching',
+        'जलन': 'burning sensation', 'सुन्नता': 'numbness', 'कमजोरी': 'weakness', 'चक्कर': 'dizziness',
+        'थकान': 'fatigue', 'सांस फूलना': 'shortness of breath', 'सीने में दर्द': 'chest pain',
+        'पेट दर्द': 'stomach pain', 'पेट में दर्द': 'stomach pain', 'कमर दर्द': 'back pain'
+    },
+    'tamil': {
+        'வலி': 'pain', 'காய்ச்சல்': 'fever', 'இருமல்': 'cough', 'சளி': 'cold', 'தலைவலி': 'headache',
+        'குமட்டல்': 'nausea', 'வாந்தி': 'vomiting', 'வயிற்றுப்போக்கு': 'diarrhea',
+        'மலச்சிக்கல்': 'constipation', 'இரத்தம்': 'bleeding', 'வீக்கம்': 'swelling',
+        'அரிப்பு': 'itching', 'எரிச்சல்': 'burning sensation', 'பலவீனம்': 'weakness'
+    },
+    'telugu': {
+        'నొప్పి': 'pain', 'జ్వరం': 'fever', 'దగ్గు': 'cough', 'జలుబు': 'cold', 'తలనొప్పి': 'headache',
+        'వాంతులు': 'vomiting', 'విరేచనలు': 'diarrhea', 'మలబద్దకం': 'constipation', 'రక్తం': 'bleeding',
+        'వాపు': 'swelling'
+    },
+    'bengali': {
+        'ব্যথা': 'pain', 'জ্বর': 'fever', 'কাশি': 'cough', 'সর্দি': 'cold', 'মাথাব্যথা': 'headache',
+        'বমি': 'vomiting', 'ডায়রিয়া': 'diarrhea', 'কোষ্ঠকাঠিন্য': 'constipation', 'রক্ত': 'bleeding',
+        'ফোলা': 'swelling'
+    }
+}
+
+# Words that carry no symptom information, ignored when scoring lexicon coverage
+LEXICON_STOPWORDS = {
+    'english': {
+        'i', 'im', 'i\'m', 'me', 'my', 'a', 'an', 'the', 'and', 'or', 'have', 'has', 'having', 'had',
+        'am', 'is', 'are', 'was', 'been', 'got', 'get', 'getting', 'with', 'in', 'on', 'of', 'to', 'since',
+        'for', 'from', 'also', 'some', 'very', 'bit', 'little', 'today', 'yesterday', 'days', 'day',
+        'feel', 'feeling', 'suffering', 'please', 'doctor', 'help'
+    },
+    'hindi': {'मुझे', 'मेरे', 'मेरा', 'मेरी', 'और', 'है', 'हैं', 'था', 'में', 'को', 'का', 'की', 'के', 'हो', 'रहा', 'रही', 'भी', 'बहुत'},
+    'tamil': {'எனக்கு', 'என்', 'மற்றும்', 'உள்ளது', 'இருக்கிறது'},
+    'telugu': {'నాకు', 'నా', 'మరియు', 'ఉంది'},
+    'bengali': {'আমার', 'আমি', 'এবং', 'আছে', 'হচ্ছে'}
+}
+
+# Words that can flip a symptom mention ("no fever"), so the lexicon defers to the LLM
+NEGATION_WORDS = {'no', 'not', 'never', 'without', "don't", "dont", "didn't", 'नहीं', 'ना', 'இல்லை', 'లేదు', 'নেই', 'না'}
+
 # Response templates
 RESPONSE_TEMPLATES = {
     'greeting': {
@@ -79,7 +159,9 @@ RESPONSE_TEMPLATES = {
     'emergency': {
         'english': "🚨 This seems like an emergency. Please call 108 immediately or go to the nearest hospital.",
         'hindi': "🚨 यह एक आपातकालीन स्थिति लगती है। कृपया तुरंत 108 पर कॉल करें या निकटतम अस्पताल जाएं।",
-        'tamil': "🚨 இது அவசர நிலை போல் தெரிகிறது. உடனடியாக 108 ஐ அழைக்கவும் அல்லது அருகிலுள்ள மருத்துவமனைக்கு செல்லவும்."
+        'tamil': "🚨 இது அவசர நிலை போல் தெரிகிறது. உடனடியாக 108 ஐ அழைக்கவும் அல்லது அருகிலுள்ள மருத்துவமனைக்கு செல்லவும்.",
+        'telugu': "🚨 ఇది అత్యవసర పరిస్థితిలా ఉంది. దయచేసి వెంటనే 108కి కాల్ చేయండి లేదా దగ్గరలోని ఆసుపత్రికి వెళ్ళండి.",
+        'bengali': "🚨 এটি একটি জরুরি অবস্থা বলে মনে হচ্ছে। অনুগ্রহ করে এখনই 108-এ কল করুন বা নিকটতম হাসপাতালে যান।"
     }
 }
 
@@ -96,7 +178,10 @@ MODEL_CONFIG = {
     'symptom_confidence_threshold': 0.7,
     'disease_confidence_threshold': 0.6,
     'max_symptoms_per_request': 20,
-    'max_follow_up_questions': 5
+    'max_follow_up_questions': 5,
+    'differential_top_k': 5,  # alternatives returned with each prediction
+    'differential_cumulative_cutoff': 0.9,  # stop once this much probability is covered
+    'explanation_max_variants': 12  # leave-one-out variants scored per explanation
 }
 
 # Hospital search parameters
@@ -0,0 +1,23 @@
+import time
+
+class Deadline:
+    """Time budget for one request, checked by every stage that handles it"""
+
+    def __init__(self, seconds: float):
+        self.budget = seconds
+        self.started = time.monotonic()
+        self.expires_at = self.started + seconds
+
+    def remaining(self) -> float:
+        """Seconds left, never negative"""
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+
+    def has(self, seconds: float) -> bool:
+        """Whether at least `seconds` of the budget are left"""
+        return self.remaining() >= seconds
+
+    def expired(self) -> bool:
+        return self.remaining() <= 0.0
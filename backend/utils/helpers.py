@@ -4,6 +4,8 @@ from typing import List, Dict, Any
 from datetime import datetime
 import hashlib
 
+from utils.keyword_matcher import KeywordMatcher
+
 def format_symptoms(symptoms: List[str]) -> str:
     """Format symptoms list into readable string"""
     if not symptoms:
@@ -62,49 +64,50 @@ def format_distance(distance_km: float) -> str:
     else:
         return f"{distance_km:.1f} km"
 
+# High-risk symptoms and diseases for calculate_severity_score
+_HIGH_RISK_SYMPTOMS = (
+    'chest pain', 'difficulty breathing', 'severe bleeding',
+    'unconsciousness', 'severe headache', 'heart attack symptoms'
+)
+_HIGH_RISK_DISEASES = (
+    'heart attack', 'stroke', 'appendicitis', 'pneumonia',
+    'meningitis', 'sepsis'
+)
+
 def calculate_severity_score(symptoms: List[str], disease: str) -> int:
     """Calculate severity score (1-10)"""
     base_score = 3
     
-    # High-risk symptoms
-    high_risk_symptoms = [
-        'chest pain', 'difficulty breathing', 'severe bleeding',
-        'unconsciousness', 'severe headache', 'heart attack symptoms'
-    ]
-    
-    # High-risk diseases
-    high_risk_diseases = [
-        'heart attack', 'stroke', 'appendicitis', 'pneumonia',
-        'meningitis', 'sepsis'
-    ]
-    
     for symptom in symptoms:
-        for high_risk in high_risk_symptoms:
-            if high_risk.lower() in symptom.lower():
-                base_score += 3
-                break
+        symptom_lower = symptom.lower()
+        if any(high_risk in symptom_lower for high_risk in _HIGH_RISK_SYMPTOMS):
+            base_score += 3
     
-    for high_risk in high_risk_diseases:
-        if high_risk.lower() in disease.lower():
-            base_score += 4
-            break
+    disease_lower = disease.lower()
+    if any(high_risk in disease_lower for high_risk in _HIGH_RISK_DISEASES):
+        base_score += 4
     
     return min(base_score, 10)
 
+# Entity vocabularies matched in one pass by a shared automaton
+_MEDICAL_ENTITY_MATCHER = KeywordMatcher({
+    **{word: 'severity' for word in ('mild', 'moderate', 'severe', 'extreme', 'intense')},
+    **{word: 'frequency' for word in ('always', 'often', 'sometimes', 'rarely', 'never')},
+    **{word: 'body_parts' for word in ('head', 'chest', 'stomach', 'back', 'leg', 'arm', 'throat', 'eye')}
+})
+_DURATION_PATTERN = re.compile(r'(\d+)\s*(day|week|month|hour|minute)s?')
+
 def extract_medical_entities(text: str) -> Dict:
     """Extract medical entities from text"""
-    medical_patterns = {
-        'duration': r'(\d+)\s*(day|week|month|hour|minute)s?',
-        'severity': r'(mild|moderate|severe|extreme|intense)',
-        'frequency': r'(always|often|sometimes|rarely|never)',
-        'body_parts': r'(head|chest|stomach|back|leg|arm|throat|eye)'
-    }
+    text_lower = text.lower()
     
     entities = {}
-    for entity_type, pattern in medical_patterns.items():
-        matches = re.findall(pattern, text.lower())
-        if matches:
-            entities[entity_type] = matches
+    durations = _DURATION_PATTERN.findall(text_lower)
+    if durations:
+        entities['duration'] = durations
+    
+    for match in _MEDICAL_ENTITY_MATCHER.find_all(text_lower, overlapping=False):
+        entities.setdefault(match.label, []).append(match.keyword)
     
     return entities
 
@@ -145,13 +148,49 @@ def log_user_interaction(user_id: str, action: str, data: Dict = None):
     # In production, this would go to a logging service
     print(f"USER_INTERACTION: {json.dumps(log_entry)}")
 
+_EMERGENCY_MATCHER = KeywordMatcher([
+    'emergency', 'urgent', 'help', 'ambulance', 'hospital',
+    'chest pain', 'heart attack', 'stroke', 'bleeding',
+    'unconscious', 'severe pain', 'can\'t breathe'
+])
+
 def is_emergency_keyword(text: str) -> bool:
     """Check if text contains emergency keywords"""
-    emergency_words = [
-        'emergency', 'urgent', 'help', 'ambulance', 'hospital',
-        'chest pain', 'heart attack', 'stroke', 'bleeding',
-        'unconscious', 'severe pain', 'can\'t breathe'
-    ]
+    return _EMERGENCY_MATCHER.contains(text)
+
+def get_process_memory_mb() -> float:
+    """Get resident memory of the current process in MB"""
+    try:
+        with open('/proc/self/status') as status_file:
+            for line in status_file:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    
+    # Fall back to peak RSS where /proc is unavailable (KB on Linux, bytes on macOS)
+    import resource
+    import sys
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+def get_memory_sharing_mb() -> Dict:
+    """Break resident memory down into pages shared with other processes and private pages"""
+    breakdown = {'rss': get_process_memory_mb(), 'pss': None, 'shared': None, 'private': None}
     
-    text_lower = text.lower()
-    return any(word in text_lower for word in emergency_words)
\ No newline at end of file
+    try:
+        fields = {}
+        with open('/proc/self/smaps_rollup') as smaps_file:
+            for line in smaps_file:
+                parts = line.split()
+                if len(parts) >= 2 and parts[0].endswith(':') and parts[1].isdigit():
+                    fields[parts[0][:-1]] = int(parts[1]) / 1024
+        
+        breakdown['pss'] = round(fields.get('Pss', 0), 1)
+        breakdown['shared'] = round(fields.get('Shared_Clean', 0) + fields.get('Shared_Dirty', 0), 1)
+        breakdown['private'] = round(fields.get('Private_Clean', 0) + fields.get('Private_Dirty', 0), 1)
+    except OSError:
+        pass
+    
+    breakdown['rss'] = round(breakdown['rss'], 1)
+    return breakdown
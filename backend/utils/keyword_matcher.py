@@ -0,0 +1,112 @@
+from collections import deque
+from typing import Dict, Iterable, List, NamedTuple, Union
+
+class KeywordMatch(NamedTuple):
+    keyword: str
+    label: str
+    start: int
+    end: int
+
+def _normalize(keyword: str) -> str:
+    return " ".join(keyword.lower().split())
+
+class KeywordMatcher:
+    """Aho-Corasick automaton over a fixed keyword set.
+
+    Built once, then finds every keyword in a single left-to-right pass, so
+    matching cost grows with the text length and not with the vocabulary.
+    Matching is case-insensitive, a run of whitespace in the text matches the
+    single space in a multi-word keyword, and spans index the original text.
+    """
+
+    def __init__(self, keywords: Union[Iterable[str], Dict[str, str]]):
+        # Keywords map to a label, e.g. an entity type; a plain list labels each with itself
+        labels = keywords if isinstance(keywords, dict) else {keyword: keyword for keyword in keywords}
+
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[tuple]] = [[]]
+        self._max_length = 0
+
+        for keyword, label in labels.items():
+            normalized = _normalize(keyword)
+            if normalized:
+                self._insert(normalized, label)
+        self._build_fail_links()
+
+    def __len__(self) -> int:
+        return sum(len(output) for output in self._output)
+
+    def _insert(self, keyword: str, label: str):
+        state = 0
+        for char in keyword:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            state = next_state
+
+        self._output[state].append((keyword, label, len(keyword)))
+        self._max_length = max(self._max_length, len(keyword))
+
+    def _build_fail_links(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[next_state] = self._goto[fallback].get(char, 0)
+
+                # A state also ends every keyword its failure state ends
+                self._output[next_state] = self._output[next_state] + self._output[self._fail[next_state]]
+
+    def finditer(self, text: str):
+        """Yield every (possibly overlapping) keyword occurrence as a KeywordMatch"""
+        goto, fail, output = self._goto, self._fail, self._output
+        positions = deque(maxlen=self._max_length or 1)
+        state = 0
+        previous_space = False
+
+        for index, char in enumerate(text):
+            if char.isspace():
+                if previous_space:
+                    continue
+                previous_space = True
+                char = ' '
+            else:
+                previous_space = False
+                lowered = char.lower()
+                char = lowered if len(lowered) == 1 else char
+
+            positions.append(index)
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+
+            for keyword, label, length in output[state]:
+                yield KeywordMatch(keyword, label, positions[-length], index + 1)
+
+    def find_all(self, text: str, overlapping: bool = True) -> List[KeywordMatch]:
+        """All matches by start position; without overlaps, the leftmost-longest ones"""
+        matches = sorted(self.finditer(text), key=lambda match: (match.start, match.start - match.end))
+        if overlapping:
+            return matches
+
+        selected = []
+        end = 0
+        for match in matches:
+            if match.start >= end:
+                selected.append(match)
+                end = match.end
+        return selected
+
+    def contains(self, text: str) -> bool:
+        """Whether any keyword occurs, stopping at the first match"""
+        return next(self.finditer(text), None) is not None
@@ -0,0 +1,87 @@
+import threading
+from collections import deque
+from typing import Dict
+
+class RollingStats:
+    """Thread-safe running statistics over a window of recent samples"""
+
+    def __init__(self, window: int = 1000):
+        self._lock = threading.Lock()
+        self._samples = deque(maxlen=window)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, value: float):
+        """Record a single sample"""
+        with self._lock:
+            self._samples.append(value)
+            self.count += 1
+            self.total += value
+            if value > self.max:
+                self.max = value
+
+    def percentile(self, pct: float) -> float:
+        """Percentile over the current window (0-100)"""
+        with self._lock:
+            samples = sorted(self._samples)
+        
+        if not samples:
+            return 0.0
+        
+        index = min(len(samples) - 1, int(round(pct / 100.0 * (len(samples) - 1))))
+        return samples[index]
+
+    def summary(self, precision: int = 3) -> Dict:
+        """Summary suitable for logging or a JSON response"""
+        mean = self.total / self.count if self.count else 0.0
+        return {
+            'count': self.count,
+            'mean': round(mean, precision),
+            'p50': round(self.percentile(50), precision),
+            'p95': round(self.percentile(95), precision),
+            'max': round(self.max, precision)
+        }
+
+    def reset(self):
+        """Clear all recorded samples"""
+        with self._lock:
+            self._samples.clear()
+            self.count = 0
+            self.total = 0.0
+            self.max = 0.0
+
+class Histogram:
+    """Thread-safe cumulative counts of samples per upper bucket bound, Prometheus style"""
+
+    def __init__(self, buckets):
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        self._counts = [0] * (len(self.buckets) + 1)  # last slot: above every bound
+        self.count = 0
+        self.total = 0.0
+
+    def record(self, value: float):
+        """Record a single sample"""
+        slot = next((index for index, bound in enumerate(self.buckets) if value <= bound), len(self.buckets))
+        with self._lock:
+            self._counts[slot] += 1
+            self.count += 1
+            self.total += value
+
+    def summary(self, precision: int = 3) -> Dict:
+        """Samples at or below each bound, plus count and mean"""
+        with self._lock:
+            counts = list(self._counts)
+            count, total = self.count, self.total
+        
+        cumulative, buckets = 0, {}
+        for bound, bucket_count in zip(self.buckets, counts):
+            cumulative += bucket_count
+            buckets[f"le_{bound:g}"] = cumulative
+        buckets['le_inf'] = count
+        return {
+            'count': count,
+            'mean': round(total / count, precision) if count else 0.0,
+            'buckets': buckets
+        }
@@ -0,0 +1,199 @@
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+# Hashed feature space; collisions only blur rare n-grams slightly
+N_FEATURES = 2 ** 18
+
+class _SemanticIndex:
+    """Sparse TF-IDF rows of past questions for one language.
+
+    Rows live in a column-major matrix, so a lookup only touches the
+    posting lists of the query's n-grams. New rows wait in a small pending
+    segment that is merged in once it reaches `merge_size`; evicted rows
+    are masked out and dropped at the next merge once they dominate.
+    """
+
+    def __init__(self, vectorizer, merge_size: int):
+        self.vectorizer = vectorizer
+        self.merge_size = merge_size
+
+        self.document_frequency = np.zeros(N_FEATURES, dtype=np.int32)
+        self.rows: List[Tuple[np.ndarray, np.ndarray]] = []  # (feature indices, weights)
+        self.values: List[Any] = []
+        # Per-row state in arrays that grow by doubling; only the first len(rows) are used
+        self.alive = np.zeros(64, dtype=bool)
+        self.last_used = np.zeros(64, dtype=np.float64)
+        self.live = 0
+
+        self._main = None           # CSC matrix of rows [0, _main_rows)
+        self._main_rows = 0
+        self._pending = None        # CSR matrix of rows [_main_rows, len(rows)), built lazily
+
+    def _features(self, text: str):
+        counts = self.vectorizer.transform([text])
+        return counts.indices.astype(np.int32), counts.data.astype(np.float64)
+
+    def _weights(self, indices: np.ndarray, counts: np.ndarray) -> np.ndarray:
+        """Smoothed IDF weighting with L2 normalization"""
+        documents = self.live
+        idf = np.log((1 + documents) / (1 + self.document_frequency[indices])) + 1
+        weights = counts * idf
+        norm = np.linalg.norm(weights)
+        return weights / norm if norm else weights
+
+    def _matrix(self, rows: List[Tuple[np.ndarray, np.ndarray]]):
+        from scipy.sparse import csr_matrix
+
+        lengths = [len(indices) for indices, _ in rows]
+        indptr = np.zeros(len(rows) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=indptr[1:])
+        indices = np.concatenate([row[0] for row in rows]) if rows else np.zeros(0, dtype=np.int32)
+        data = np.concatenate([row[1] for row in rows]) if rows else np.zeros(0)
+        return csr_matrix((data, indices, indptr), shape=(len(rows), N_FEATURES))
+
+    def search(self, text: str) -> Tuple[Optional[int], float]:
+        """Most similar live row and its cosine similarity"""
+        if not self.live:
+            return None, 0.0
+
+        indices, counts = self._features(text)
+        if not len(indices):
+            return None, 0.0
+        weights = self._weights(indices, counts)
+
+        scores = np.zeros(len(self.rows))
+        if self._main_rows:
+            scores[:self._main_rows] = self._main[:, indices] @ weights
+        if len(self.rows) > self._main_rows:
+            if self._pending is None:
+                self._pending = self._matrix(self.rows[self._main_rows:])
+            scores[self._main_rows:] = self._pending[:, indices] @ weights
+
+        scores[~self.alive[:len(self.rows)]] = -1.0
+        row = int(np.argmax(scores))
+        return row, float(scores[row])
+
+    def add(self, text: str, value: Any, now: float) -> Optional[int]:
+        """Index a question; returns None when it has no features"""
+        indices, counts = self._features(text)
+        if not len(indices):
+            return None
+
+        row = len(self.rows)
+        if row == len(self.alive):
+            self.alive = np.concatenate([self.alive, np.zeros(row, dtype=bool)])
+            self.last_used = np.concatenate([self.last_used, np.zeros(row)])
+
+        self.document_frequency[indices] += 1
+        self.live += 1
+        self.rows.append((indices, self._weights(indices, counts)))
+        self.values.append(value)
+        self.alive[row] = True
+        self.last_used[row] = now
+        self._pending = None
+
+        if len(self.rows) - self._main_rows >= self.merge_size:
+            self._merge()
+        return len(self.rows) - 1
+
+    def evict_oldest(self):
+        """Drop the least recently used live row"""
+        size = len(self.rows)
+        row = int(np.argmin(np.where(self.alive[:size], self.last_used[:size], np.inf)))
+        self.alive[row] = False
+        self.document_frequency[self.rows[row][0]] -= 1
+        self.values[row] = None
+        self.live -= 1
+
+    def _merge(self):
+        """Fold pending rows into the column-major matrix, compacting evicted rows"""
+        if len(self.rows) - self.live > self.live:
+            keep = np.flatnonzero(self.alive)
+            self.rows = [self.rows[row] for row in keep]
+            self.values = [self.values[row] for row in keep]
+            self.alive = np.concatenate([self.alive[keep], np.zeros(len(keep) + 64, dtype=bool)])
+            self.last_used = np.concatenate([self.last_used[keep], np.zeros(len(keep) + 64)])
+
+        self._main = self._matrix(self.rows).tocsc()
+        self._main_rows = len(self.rows)
+        self._pending = None
+
+class SemanticCache:
+    """Answers for near-duplicate questions, matched by character n-gram TF-IDF.
+
+    Each namespace (e.g. language) has its own index. A lookup returns the
+    cached value of the most similar past question when its cosine
+    similarity reaches `threshold`. Size is bounded by `max_entries` per
+    namespace, evicting the least recently used question.
+    """
+
+    def __init__(self, max_entries: int = 10000, threshold: float = 0.85, merge_size: int = 1024,
+                 name: str = 'semantic-cache'):
+        from sklearn.feature_extraction.text import HashingVectorizer
+
+        self.name = name
+        self.max_entries = max_entries
+        self.threshold = threshold
+        self.merge_size = merge_size
+
+        self._vectorizer = HashingVectorizer(
+            analyzer='char_wb', ngram_range=(3, 5), n_features=N_FEATURES,
+            alternate_sign=False, norm=None, lowercase=True
+        )
+        self._lock = threading.Lock()
+        self._indexes: Dict[str, _SemanticIndex] = {}
+        self._clock = 0.0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _tick(self) -> float:
+        self._clock += 1
+        return self._clock
+
+    def get(self, text: str, namespace: str = 'default') -> Optional[Dict]:
+        """{'value', 'similarity'} for the closest past question, or None below the threshold"""
+        with self._lock:
+            index = self._indexes.get(namespace)
+            row, similarity = index.search(text) if index is not None else (None, 0.0)
+
+            if row is None or similarity < self.threshold:
+                self.misses += 1
+                return None
+
+            index.last_used[row] = self._tick()
+            self.hits += 1
+            return {'value': index.values[row], 'similarity': round(similarity, 4)}
+
+    def set(self, text: str, value: Any, namespace: str = 'default'):
+        """Index a question with its answer"""
+        with self._lock:
+            index = self._indexes.get(namespace)
+            if index is None:
+                index = self._indexes[namespace] = _SemanticIndex(self._vectorizer, self.merge_size)
+
+            if index.add(text, value, self._tick()) is None:
+                return
+            while index.live > self.max_entries:
+                index.evict_oldest()
+                self.evictions += 1
+
+    def __len__(self) -> int:
+        return sum(index.live for index in self._indexes.values())
+
+    def get_stats(self) -> Dict:
+        """Hit/miss counters and entries per namespace"""
+        lookups = self.hits + self.misses
+        return {
+            'name': self.name,
+            'entries': {namespace: index.live for namespace, index in self._indexes.items()},
+            'max_entries': self.max_entries,
+            'threshold': self.threshold,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+            'evictions': self.evictions
+        }
@@ -0,0 +1,79 @@
+import threading
+from typing import Any, Callable, Dict, Hashable
+
+class _Call:
+    """One in-flight call and the callers waiting on it"""
+    __slots__ = ('done', 'result', 'error', 'waiters')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+class SingleFlight:
+    """Collapses concurrent identical calls into one.
+
+    The first caller for a key runs the function; callers arriving with
+    the same key while it is running wait for it and get the same result,
+    or the same exception. Nothing is kept once the call returns, so this
+    only removes duplicate concurrent work and never serves stale data.
+    Shared results must not be modified by callers.
+    """
+
+    def __init__(self, name: str = 'singleflight'):
+        self.name = name
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+
+        self.executed = 0
+        self.collapsed = 0
+        self.max_waiters = 0
+
+    def do(self, key: Hashable, function: Callable, *args, wait_timeout: float = None, **kwargs) -> Any:
+        """Result of `function(*args, **kwargs)`, shared with concurrent callers using `key`.
+
+        A caller that finds the call already running waits at most
+        `wait_timeout` seconds for it before raising TimeoutError.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.executed += 1
+            else:
+                call.waiters += 1
+                self.collapsed += 1
+                self.max_waiters = max(self.max_waiters, call.waiters)
+
+        if not leader:
+            if not call.done.wait(wait_timeout):
+                raise TimeoutError(f"Timed out waiting for in-flight {self.name} call")
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = function(*args, **kwargs)
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def get_stats(self) -> Dict:
+        """Calls made, calls collapsed onto another caller's, and keys in flight"""
+        with self._lock:
+            requests = self.executed + self.collapsed
+            return {
+                'name': self.name,
+                'in_flight': len(self._calls),
+                'executed': self.executed,
+                'collapsed': self.collapsed,
+                'collapse_rate': round(self.collapsed / requests, 3) if requests else 0.0,
+                'max_waiters': self.max_waiters
+            }